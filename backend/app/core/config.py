@@ -7,14 +7,64 @@ class Settings(BaseSettings):
     app_name: str = "reply-comment-agent"
     env: str = "dev"
     database_url: str = "sqlite:///./data/app.db"
+    startup_create_tables: bool = True
+    migrate_on_startup: bool = True
+    migration_batch_size: int = 5000
+    migration_sleep_ms: float = 0.0
+    prewarm_enabled: bool = False
+    prewarm_kb_slugs: str = "default"
 
     glm_api_key: str = ""
     glm_base_url: str = "https://open.bigmodel.cn/api/paas/v4"
     glm_chat_model: str = "glm-4"
     glm_embed_model: str = "embedding-2"
+    glm_timeout_s: float = 10.0
+    glm_max_retries: int = 2
+    glm_max_connections: int = 20
 
     vector_dir: str = "./data/vectors"
+    vector_store_cache_size: int = 16
+    vector_search_workers: int = 4
+    vector_codec: str = "f32"
+    vector_serving_mode: str = "local"
+    vector_sidecar_socket: str = "./data/vector.sock"
     default_kb_slug: str = "default"
+    gc_keep_versions: int = 3
+    gc_interval_s: float = 0.0
+    gc_batch_size: int = 1000
+    event_hot_days: int = 30
+    event_archive_dir: str = "./data/archive"
+    event_archive_keep_months: int = 0
+    event_archive_interval_s: float = 0.0
+    event_archive_batch_size: int = 5000
+    lead_batch_chunk_size: int = 1000
+    lead_batch_workers: int = 0
+    lead_decay_half_life_h: float = 72.0
+    kb_import_batch_size: int = 500
+    kb_import_workers: int = 0
+    text_norm_cache_size: int = 65536
+
+    chunk_target_tokens: int = 200
+    chunk_max_tokens: int = 320
+    chunk_overlap_tokens: int = 40
+    reply_knowledge_budget_tokens: int = 600
+    reply_note_desc_tokens: int = 200
+    reply_dedupe_threshold: float = 0.8
+    reply_note_context_weight: float = 0.35
+    note_context_cache_size: int = 4096
+    reply_template_intents: str = "praise,empty"
+    reply_llm_min_confidence: float = 0.6
+    reply_knowledge_min_score: float = 0.6
+    reply_knowledge_direct_score: float = 0.85
+    reply_refine_workers: int = 4
+    reply_refine_max_entries: int = 10000
+    intent_model_path: str = ""
+    intent_model_temperature: float = 0.05
+    intent_model_min_confidence: float = 0.5
+    intent_model_min_similarity: float = 0.3
+    xhs_json_dir: str = ""
+    xhs_index_path: str = "./data/xhs_index.db"
+    xhs_analyze_batch_size: int = 512
 
 
 settings = Settings()
@@ -23,6 +23,11 @@ def create_db_and_tables() -> None:
         db_path = database_url.replace("sqlite:///./", "", 1)
         os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
     SQLModel.metadata.create_all(engine)
+    if settings.migrate_on_startup:
+        from app.core.migrate import run_migrations, start_backfills
+
+        if run_migrations(engine, defer_backfills=True).deferred:
+            start_backfills(engine)
 
 
 @contextmanager
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Dict
+
+import httpx
+
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def make_client(timeout_s: float, max_connections: int) -> httpx.Client:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return httpx.Client(timeout=timeout_s, limits=limits)
+
+
+def _backoff_s(attempt: int, resp: httpx.Response | None) -> float:
+    if resp is not None:
+        retry_after = (resp.headers.get("Retry-After") or "").strip()
+        try:
+            return min(5.0, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return min(5.0, 0.2 * (2**attempt)) * (0.5 + random.random() / 2)
+
+
+def post_json(client: httpx.Client, url: str, headers: Dict[str, str], payload: Dict[str, Any], max_retries: int) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        resp: httpx.Response | None = None
+        try:
+            resp = client.post(url, headers=headers, json=payload)
+            if resp.status_code not in _RETRY_STATUS or attempt >= max_retries:
+                resp.raise_for_status()
+                return resp.json()
+        except httpx.TransportError:
+            if attempt >= max_retries:
+                raise
+        time.sleep(_backoff_s(attempt, resp))
+        attempt += 1
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STATE_DDL = (
+    "CREATE TABLE IF NOT EXISTS schema_migration (id VARCHAR PRIMARY KEY, applied_at DATETIME NOT NULL, elapsed_ms INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS schema_backfill ("
+    "name VARCHAR PRIMARY KEY, last_key INTEGER NOT NULL DEFAULT 0, rows INTEGER NOT NULL DEFAULT 0, "
+    "done BOOLEAN NOT NULL DEFAULT 0, updated_at DATETIME NOT NULL)",
+)
+
+
+@dataclass
+class BackfillReport:
+    name: str
+    batches: int = 0
+    rows: int = 0
+    resumed_from: int = 0
+    done: bool = False
+
+
+@dataclass
+class MigrationReport:
+    applied: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    deferred: List[str] = field(default_factory=list)
+    backfills: List[BackfillReport] = field(default_factory=list)
+
+
+class Migrator:
+    def __init__(self, engine: Engine, batch_size: Optional[int] = None, sleep_ms: Optional[float] = None, max_batches: Optional[int] = None):
+        self.engine = engine
+        self.batch_size = max(1, batch_size or settings.migration_batch_size)
+        self.sleep_s = max(0.0, settings.migration_sleep_ms if sleep_ms is None else sleep_ms) / 1000.0
+        self.max_batches = max_batches
+        self.backfills: List[BackfillReport] = []
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.engine).has_table(table)
+
+    def columns(self, table: str) -> List[str]:
+        return [c["name"] for c in inspect(self.engine).get_columns(table)] if self.has_table(table) else []
+
+    def indexes(self, table: str) -> List[str]:
+        return [ix["name"] for ix in inspect(self.engine).get_indexes(table)] if self.has_table(table) else []
+
+    def execute(self, sql: str, params: Optional[dict] = None) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text(sql), params or {})
+
+    def add_column(self, table: str, column: str, ddl: str) -> bool:
+        if not self.has_table(table) or column in self.columns(table):
+            return False
+        try:
+            self.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {ddl}')
+        except OperationalError:
+            if column in self.columns(table):
+                return False
+            raise
+        return True
+
+    def create_index(self, name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+        if self.has_table(table):
+            cols = ", ".join(f'"{c}"' for c in columns)
+            self.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" ON {table} ({cols})')
+
+    def drop_index(self, name: str) -> None:
+        self.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+    def _progress(self, name: str) -> Tuple[int, int, bool]:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT OR IGNORE INTO schema_backfill (name, last_key, rows, done, updated_at) VALUES (:n, 0, 0, 0, :t)"),
+                {"n": name, "t": datetime.utcnow()},
+            )
+            row = conn.execute(text("SELECT last_key, rows, done FROM schema_backfill WHERE name = :n"), {"n": name}).one()
+            return int(row[0]), int(row[1]), bool(row[2])
+
+    def backfill(
+        self,
+        name: str,
+        table: str,
+        columns: Sequence[str],
+        compute: Callable[[dict], Optional[dict]],
+        where: str = "1 = 1",
+    ) -> BackfillReport:
+        last_key, done_rows, done = self._progress(name)
+        report = BackfillReport(name=name, resumed_from=last_key, rows=done_rows, done=done)
+        self.backfills.append(report)
+        cols = ", ".join(f'"{c}"' for c in columns)
+        while not report.done:
+            if self.max_batches is not None and report.batches >= self.max_batches:
+                break
+            with self.engine.begin() as conn:
+                rows = conn.execute(
+                    text(f"SELECT rowid AS _key, {cols} FROM {table} WHERE rowid > :last AND ({where}) ORDER BY rowid LIMIT :n"),
+                    {"last": last_key, "n": self.batch_size},
+                ).mappings().all()
+                updates: Dict[Tuple[str, ...], List[dict]] = {}
+                for row in rows:
+                    values = compute(dict(row))
+                    if values:
+                        updates.setdefault(tuple(sorted(values)), []).append({**values, "_key": row["_key"]})
+                for keys, params in updates.items():
+                    assignments = ", ".join(f'"{k}" = :{k}' for k in keys)
+                    conn.execute(text(f"UPDATE {table} SET {assignments} WHERE rowid = :_key"), params)
+                if rows:
+                    last_key = int(rows[-1]["_key"])
+                report.rows += sum(len(p) for p in updates.values())
+                report.batches += 1
+                report.done = len(rows) < self.batch_size
+                conn.execute(
+                    text("UPDATE schema_backfill SET last_key = :k, rows = :r, done = :d, updated_at = :t WHERE name = :n"),
+                    {"k": last_key, "r": report.rows, "d": report.done, "t": datetime.utcnow(), "n": name},
+                )
+            if not report.done and self.sleep_s:
+                time.sleep(self.sleep_s)
+        return report
+
+
+def _ensure_state_tables(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for ddl in _STATE_DDL:
+            conn.execute(text(ddl))
+
+
+def load_migrations() -> List[Tuple[str, Callable[[Migrator], None]]]:
+    from app.migrations import MIGRATIONS
+
+    return [(name, importlib.import_module(f"app.migrations.{name}").upgrade) for name in MIGRATIONS]
+
+
+def applied_migrations(engine: Engine) -> Dict[str, datetime]:
+    _ensure_state_tables(engine)
+    with engine.connect() as conn:
+        return {r[0]: r[1] for r in conn.execute(text("SELECT id, applied_at FROM schema_migration"))}
+
+
+def run_migrations(
+    engine: Engine,
+    batch_size: Optional[int] = None,
+    sleep_ms: Optional[float] = None,
+    max_batches: Optional[int] = None,
+    target: Optional[str] = None,
+    defer_backfills: bool = False,
+) -> MigrationReport:
+    applied = applied_migrations(engine)
+    report = MigrationReport()
+    for name, upgrade in load_migrations():
+        if name in applied:
+            report.skipped.append(name)
+        else:
+            migrator = Migrator(engine, batch_size=batch_size, sleep_ms=sleep_ms, max_batches=0 if defer_backfills else max_batches)
+            started = time.time()
+            upgrade(migrator)
+            report.backfills.extend(migrator.backfills)
+            if any(not b.done for b in migrator.backfills):
+                if not defer_backfills:
+                    break
+                report.deferred.append(name)
+                if name == target:
+                    break
+                continue
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT OR IGNORE INTO schema_migration (id, applied_at, elapsed_ms) VALUES (:id, :t, :ms)"),
+                    {"id": name, "t": datetime.utcnow(), "ms": int((time.time() - started) * 1000)},
+                )
+            report.applied.append(name)
+        if name == target:
+            break
+    return report
+
+
+_backfill_thread: Optional[threading.Thread] = None
+
+
+def _backfill_loop(engine: Engine) -> None:
+    try:
+        report = run_migrations(engine)
+        if report.deferred or any(not b.done for b in report.backfills):
+            logger.warning("migration backfills incomplete: %s", [b.name for b in report.backfills if not b.done])
+    except Exception:
+        logger.exception("background migration backfill failed")
+
+
+def start_backfills(engine: Engine) -> Optional[threading.Thread]:
+    global _backfill_thread
+    if _backfill_thread is not None and _backfill_thread.is_alive():
+        return None
+    _backfill_thread = threading.Thread(target=_backfill_loop, args=(engine,), name="migration-backfill", daemon=True)
+    _backfill_thread.start()
+    return _backfill_thread
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="数据库迁移（分批回填，可中断续跑）")
+    p.add_argument("command", choices=["status", "upgrade"])
+    p.add_argument("--target", default=None, help="执行到该迁移为止")
+    p.add_argument("--batch-size", type=int, default=None)
+    p.add_argument("--sleep-ms", type=float, default=None, help="每批之间的休眠（限速）")
+    p.add_argument("--max-batches", type=int, default=None, help="本次最多执行多少批，剩余下次续跑")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    from dataclasses import asdict
+
+    from app.core.db import engine
+
+    args = _parse_args(argv)
+    if args.command == "status":
+        applied = applied_migrations(engine)
+        print(json.dumps({name: str(applied.get(name) or "pending") for name, _ in load_migrations()}, ensure_ascii=False))
+        return
+    from sqlmodel import SQLModel
+
+    from app import models as _models
+
+    SQLModel.metadata.create_all(engine)
+    report = run_migrations(engine, batch_size=args.batch_size, sleep_ms=args.sleep_ms, max_batches=args.max_batches, target=args.target)
+    print(json.dumps(asdict(report), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
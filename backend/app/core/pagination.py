@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else str(v) if not isinstance(v, (int, float)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid_cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid_cursor")
+    return values
+
+
+def parse_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError("invalid_cursor")
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[List[T], bool]:
+    return list(rows[:limit]), len(rows) > limit
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or DEFAULT_LIMIT, MAX_LIMIT))
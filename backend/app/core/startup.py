@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+
+HEAVY_MODULES = (
+    "numpy",
+    "faiss",
+    "rapidfuzz",
+    "httpx",
+    "app.modules.vector.service",
+    "app.modules.reply.service",
+)
+
+
+@dataclass
+class StartupState:
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    phases_ms: Dict[str, int] = field(default_factory=dict)
+    warmed_kbs: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    warmup_started: bool = False
+    ready: bool = False
+    ready_at: Optional[datetime] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, name: str, ms: int) -> None:
+        with self._lock:
+            self.phases_ms[name] = ms
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+            self.ready_at = datetime.utcnow()
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "warmup_started": self.warmup_started,
+                "started_at": self.started_at,
+                "ready_at": self.ready_at,
+                "phases_ms": dict(self.phases_ms),
+                "warmed_kbs": list(self.warmed_kbs),
+                "errors": dict(self.errors),
+            }
+
+
+state = StartupState()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        state.errors[name] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        state.record(name, int((time.perf_counter() - started) * 1000))
+
+
+def _create_tables() -> None:
+    from app.core.db import create_db_and_tables
+
+    create_db_and_tables()
+
+
+def _default_kb() -> None:
+    from app.core.db import session_scope
+    from app.modules.kb.service import ensure_default_kb
+
+    with session_scope() as session:
+        ensure_default_kb(session)
+
+
+def run_boot() -> bool:
+    steps = (("startup.create_tables", _create_tables),) if settings.startup_create_tables else ()
+    for name, fn in steps + (("startup.default_kb", _default_kb),):
+        try:
+            with phase(name):
+                fn()
+        except Exception:
+            return False
+    return True
+
+
+def _prewarm_slugs() -> List[str]:
+    return [s.strip() for s in (settings.prewarm_kb_slugs or "").split(",") if s.strip()]
+
+
+def _import_heavy_modules() -> None:
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            state.errors[f"import:{name}"] = str(e)
+
+
+def _warm_indexes() -> None:
+    from app.core.db import session_scope
+    from app.modules.kb.service import get_kb_by_slug
+    from app.modules.vector.service import warm_index
+
+    with session_scope() as session:
+        for slug in _prewarm_slugs():
+            kb = get_kb_by_slug(session, slug)
+            if not kb:
+                state.errors[f"kb:{slug}"] = "kb_not_found"
+                continue
+            if warm_index(session, kb.id) is not None:
+                state.warmed_kbs.append(slug)
+
+
+def _open_glm_clients() -> None:
+    from app.modules.reply.glm_chat import get_chat_client
+    from app.modules.vector.embedding import get_embedding_client
+
+    get_chat_client()
+    get_embedding_client()
+
+
+def run_warmup() -> None:
+    started = time.perf_counter()
+    steps = (("warmup.imports", _import_heavy_modules), ("warmup.indexes", _warm_indexes), ("warmup.glm", _open_glm_clients))
+    for name, fn in steps:
+        try:
+            with phase(name):
+                fn()
+        except Exception:
+            pass
+    state.record("warmup.total", int((time.perf_counter() - started) * 1000))
+    state.mark_ready()
+
+
+def run_startup() -> None:
+    if not run_boot():
+        return
+    if settings.prewarm_enabled:
+        run_warmup()
+    else:
+        state.mark_ready()
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    with state._lock:
+        if state.warmup_started:
+            return None
+        state.warmup_started = True
+    thread = threading.Thread(target=run_startup, name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, List, Sequence
+
+from app.core.config import settings
+
+
+_TRADITIONAL = (
+    "萬與醜專業叢東絲丟兩嚴喪個豐臨為麗舉麼義烏樂喬習鄉書買亂爭於虧雲亞產畝親褻億僅從侖倉儀們價眾優夥會傘偉傳傷倫偽體餘傭僉俠"
+    "侶僥偵側僑儈儂儕儔儼倆儷儉債傾傯僂僨償儲兒兌黨蘭關興茲養獸內岡冊寫軍農馮沖決況凍淨準涼減湊凜幾鳳憑凱擊鑿芻劃劉則剛創刪別"
+    "劑剮劍劇勸辦務勱動勵勁勞勢勳匯匱區醫華協單賣盧鹵衛卻廠廳曆厲壓厭廁廂廈縣參雙發變敘疊號嘆嘰嚇呂嗎啞噸聽啟員唄響喲嘩嘮嘯嚕"
+    "嚨嚮團園圍國圖圓聖場壞塊堅壇壩塢墳墜壘壟壯聲殼壺處備復夠頭誇夾奪奮獎妝婦媽嫵嬌孫學寧寶實寵審憲宮寬賓寢對尋導壽將爾塵嘗層"
+    "屬嶼歲豈島崗嶺峽幣師帳帶幫庫應廟廢開異棄張彌彎彈強歸當錄徹徑後徵態憐總戀懇惡悶惱懸慘慚慣憤憫戲戶撲執擴掃揚擾撫拋搶護報擔"
+    "擬攏揀擁攔擰撥擇掛摯擠揮撈損撿換搗據擄摟攪攜攝擺搖擯攤撐撓撻擋擲撣擷攢斂數齋斕斬斷無舊時曠昇曉曬暈暫暢朧術樸機殺雜權條來"
+    "楊極構樞棗櫃檸檔梘棟欄樹樣標檢樓欖槍歐歡歷殘毀畢氣漢湯溝沒滬淚潑澤潔灑濃涇渦漲潤瀾漿淺濁測濟渾濤澆濕溫灣滾滯滲滿濾漁濺瀉"
+    "瀏濱灘滅燈靈災燦煙熱煩燒燭燴燼愛爺牽犧狀猶獨狹獅獄獲貓獵獻瑪環現瑣璽瓊畫療瘋癢癥癮皚皺盞監蓋盤睜瞞矚礦碼磚硯確礎禮禍禪離"
+    "禿種積稱穩窮竊竅豎競筆筍築簡籃籠篩類糧糾紅紀紉約級紡紋納紐純紗紙紛細紳終組絆經結給絡絕統綁綠綢網維綿緊緒線緣編緩練縫纖縮"
+    "繼續罷聯職聞聰腦腫腸膚膠臉臟臘艦艱藝節範蘆蘇蘋莖薦莊藥萊蓮葉蔥蔣蕭薩藍蟲蝦蠟蠻補裝裡製複襪見規視覽覺觀觸計訂認討讓訓議訊"
+    "記講許論設訪證評識訴診詞譯試詩誠話該詳語誤說誰課調談請諒讀諸謝謀謎謂謊謙謹譜貝負貢財責賢敗貨質販貪貧購貯貫貼貴費貿賀資賈"
+    "賊賄賂賠賞賴贊贈贏趕趨跡踐躍車軌軒軟較載輕輔輛輝輪輸轉轟辭邊遼達遷過邁運還這進遠違連遲適選遺遙鄧鄰醬釀釋鑒針釘鉤鈕鈴鉛銀"
+    "銅銷鋪鋼錢錯鍋鍵鏡鐘鐵鑰長門閃閉問闖閑間閱闊隊陽陰陣階際陸險隨隱隸難雞雖電霧靜頁頂順須頓預領頻題額顏願顧顯風飛飢飯飲飾飽"
+    "餅館饅馬駐駕驗騙驚鬆鬥魚鮮鳥鴨鵝鹽麥黃點齊齒龍龜錶幹鬍週澀黴瑩頸鬚緻絨鍊鏈郵噴顆麵裏麽妳鍾膩紮憂慮誘"
+)
+_SIMPLIFIED = (
+    "万与丑专业丛东丝丢两严丧个丰临为丽举么义乌乐乔习乡书买乱争于亏云亚产亩亲亵亿仅从仑仓仪们价众优伙会伞伟传伤伦伪体余佣佥侠"
+    "侣侥侦侧侨侩侬侪俦俨俩俪俭债倾偬偻偾偿储儿兑党兰关兴兹养兽内冈册写军农冯冲决况冻净准凉减凑凛几凤凭凯击凿刍划刘则刚创删别"
+    "剂剐剑剧劝办务劢动励劲劳势勋汇匮区医华协单卖卢卤卫却厂厅历厉压厌厕厢厦县参双发变叙叠号叹叽吓吕吗哑吨听启员呗响哟哗唠啸噜"
+    "咙向团园围国图圆圣场坏块坚坛坝坞坟坠垒垄壮声壳壶处备复够头夸夹夺奋奖妆妇妈妩娇孙学宁宝实宠审宪宫宽宾寝对寻导寿将尔尘尝层"
+    "属屿岁岂岛岗岭峡币师帐带帮库应庙废开异弃张弥弯弹强归当录彻径后征态怜总恋恳恶闷恼悬惨惭惯愤悯戏户扑执扩扫扬扰抚抛抢护报担"
+    "拟拢拣拥拦拧拨择挂挚挤挥捞损捡换捣据掳搂搅携摄摆摇摈摊撑挠挞挡掷掸撷攒敛数斋斓斩断无旧时旷升晓晒晕暂畅胧术朴机杀杂权条来"
+    "杨极构枢枣柜柠档枧栋栏树样标检楼榄枪欧欢历残毁毕气汉汤沟没沪泪泼泽洁洒浓泾涡涨润澜浆浅浊测济浑涛浇湿温湾滚滞渗满滤渔溅泻"
+    "浏滨滩灭灯灵灾灿烟热烦烧烛烩烬爱爷牵牺状犹独狭狮狱获猫猎献玛环现琐玺琼画疗疯痒症瘾皑皱盏监盖盘睁瞒瞩矿码砖砚确础礼祸禅离"
+    "秃种积称稳穷窃窍竖竞笔笋筑简篮笼筛类粮纠红纪纫约级纺纹纳纽纯纱纸纷细绅终组绊经结给络绝统绑绿绸网维绵紧绪线缘编缓练缝纤缩"
+    "继续罢联职闻聪脑肿肠肤胶脸脏腊舰艰艺节范芦苏苹茎荐庄药莱莲叶葱蒋萧萨蓝虫虾蜡蛮补装里制复袜见规视览觉观触计订认讨让训议讯"
+    "记讲许论设访证评识诉诊词译试诗诚话该详语误说谁课调谈请谅读诸谢谋谜谓谎谦谨谱贝负贡财责贤败货质贩贪贫购贮贯贴贵费贸贺资贾"
+    "贼贿赂赔赏赖赞赠赢赶趋迹践跃车轨轩软较载轻辅辆辉轮输转轰辞边辽达迁过迈运还这进远违连迟适选遗遥邓邻酱酿释鉴针钉钩钮铃铅银"
+    "铜销铺钢钱错锅键镜钟铁钥长门闪闭问闯闲间阅阔队阳阴阵阶际陆险随隐隶难鸡虽电雾静页顶顺须顿预领频题额颜愿顾显风飞饥饭饮饰饱"
+    "饼馆馒马驻驾验骗惊松斗鱼鲜鸟鸭鹅盐麦黄点齐齿龙龟表干胡周涩霉莹颈须致绒链链邮喷颗面里么你钟腻扎忧虑诱"
+)
+
+_TABLE: Dict[int, str] = {cp: chr(cp - 0xFEE0) for cp in range(0xFF01, 0xFF5F)}
+_TABLE[0x3000] = " "
+_TABLE.update({ord(a): b for a, b in zip(_TRADITIONAL, _SIMPLIFIED)})
+_TABLE.update({cp: None for cp in (0x200B, 0x200C, 0x200D, 0xFE0E, 0xFE0F, 0xFEFF)})
+
+_STICKER_RE = re.compile(r"\[[^\[\]\x00\n]{1,12}?R\]|\[话题\]")
+_EMOJI_RE = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\u3030\u303D]+")
+_SPACE_RE = re.compile(r"[^\S\x00]+")
+_SEP = "\x00"
+
+_memo: Dict[str, str] = {}
+_memo_lock = threading.Lock()
+
+
+def _normalize_raw(text: str) -> str:
+    t = _STICKER_RE.sub(" ", text.translate(_TABLE))
+    t = _EMOJI_RE.sub(" ", t).lower()
+    return _SPACE_RE.sub(" ", t)
+
+
+def _remember(pairs: Dict[str, str]) -> None:
+    limit = max(0, settings.text_norm_cache_size)
+    if not limit:
+        return
+    with _memo_lock:
+        if len(_memo) + len(pairs) > limit:
+            _memo.clear()
+        _memo.update(pairs)
+
+
+def normalize_text(text: str) -> str:
+    if not text:
+        return ""
+    hit = _memo.get(text)
+    if hit is not None:
+        return hit
+    out = _normalize_raw(text.replace(_SEP, " ")).strip()
+    _remember({text: out})
+    return out
+
+
+def normalize_batch(texts: Sequence[str]) -> List[str]:
+    out: List[str] = []
+    missing: Dict[str, None] = {}
+    for t in texts:
+        t = t or ""
+        hit = _memo.get(t)
+        out.append(hit if hit is not None else t)
+        if hit is None and t:
+            missing[t] = None
+    if not missing:
+        return out
+    keys = list(missing)
+    joined = _normalize_raw(_SEP.join(k.replace(_SEP, " ") for k in keys))
+    fresh = {k: v.strip() for k, v in zip(keys, joined.split(_SEP))}
+    _remember(fresh)
+    return [fresh.get(t, t) if t else "" for t in out]
@@ -1,8 +1,16 @@
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.core.db import create_db_and_tables
+from app.core.startup import start_warmup, state
+from app.modules.monitor.archive import start_archive_loop
+from app.modules.vector.retention import start_gc_loop
 from app.modules.kb.router import router as kb_router
 from app.modules.leads.router import router as leads_router
 from app.modules.monitor.router import router as monitor_router
@@ -24,7 +32,9 @@ app.add_middleware(
 
 @app.on_event("startup")
 def _on_startup() -> None:
-    create_db_and_tables()
+    start_warmup()
+    start_gc_loop()
+    start_archive_loop()
 
 
 @app.get("/healthz")
@@ -32,6 +42,12 @@ def healthz():
     return {"ok": True}
 
 
+@app.get("/readyz")
+def readyz():
+    report = state.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=jsonable_encoder(report))
+
+
 app.include_router(kb_router, prefix="/api")
 app.include_router(vector_router, prefix="/api")
 app.include_router(reply_router, prefix="/api")
@@ -39,3 +55,4 @@ app.include_router(leads_router, prefix="/api")
 app.include_router(monitor_router, prefix="/api")
 app.include_router(xhs_router, prefix="/api")
 
+state.record("import.app", int((time.perf_counter() - _import_started) * 1000))
@@ -0,0 +1,6 @@
+MIGRATIONS = [
+    "m0001_chunk_token_count",
+    "m0002_vector_index_codec_pinned",
+    "m0003_composite_indexes",
+    "m0004_reply_event_user_id",
+]
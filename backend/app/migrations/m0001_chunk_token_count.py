@@ -0,0 +1,14 @@
+from app.core.migrate import Migrator
+
+
+def upgrade(m: Migrator) -> None:
+    from app.modules.kb.chunking import count_tokens
+
+    m.add_column("knowledgechunk", "token_count", "INTEGER NOT NULL DEFAULT 0")
+    m.backfill(
+        "knowledgechunk.token_count",
+        "knowledgechunk",
+        ["content", "token_count"],
+        lambda row: {"token_count": count_tokens(row["content"])},
+        where="token_count = 0",
+    )
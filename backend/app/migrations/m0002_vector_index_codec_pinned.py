@@ -0,0 +1,6 @@
+from app.core.migrate import Migrator
+
+
+def upgrade(m: Migrator) -> None:
+    m.add_column("vectorindex", "codec", "VARCHAR NOT NULL DEFAULT 'f32'")
+    m.add_column("vectorindex", "pinned", "BOOLEAN NOT NULL DEFAULT 0")
@@ -0,0 +1,32 @@
+from app.core.migrate import Migrator
+
+
+DROPPED = {
+    "knowledgebase": ["id", "published_version", "created_at", "updated_at"],
+    "knowledgeitem": ["id", "kb_id", "key", "is_active", "created_at", "updated_at"],
+    "knowledgeitemrevision": ["id", "item_id", "revision", "status", "published_version", "created_at"],
+    "knowledgechunk": ["id", "revision_id", "chunk_index", "created_at"],
+    "replyevent": ["id", "kb_id", "kb_version", "comment_id", "note_id", "intent", "lead_score", "lead_level", "latency_ms", "llm_used"],
+    "vectorindex": ["id", "kb_id", "kb_version", "provider", "model", "created_at"],
+    "vectorrecord": ["id", "kb_id", "kb_version", "vector_pos", "chunk_id", "revision_id", "created_at"],
+    "vectorquerylog": ["id", "kb_id", "kb_version", "provider", "model", "latency_ms"],
+}
+
+CREATED = [
+    ("ix_knowledgebase_created_at_id", "knowledgebase", ["created_at", "id"]),
+    ("ix_knowledgeitem_kb_id_updated_at", "knowledgeitem", ["kb_id", "updated_at", "id"]),
+    ("ix_knowledgeitem_kb_id_key", "knowledgeitem", ["kb_id", "key"]),
+    ("ix_knowledgeitemrevision_item_id_revision", "knowledgeitemrevision", ["item_id", "revision"]),
+    ("ix_knowledgechunk_revision_id_chunk_index", "knowledgechunk", ["revision_id", "chunk_index"]),
+    ("ix_replyevent_note_id_lead_score_created_at", "replyevent", ["note_id", "lead_score", "created_at"]),
+    ("ix_vectorindex_kb_id_kb_version_created_at", "vectorindex", ["kb_id", "kb_version", "created_at"]),
+    ("ix_vectorrecord_kb_id_kb_version_vector_pos", "vectorrecord", ["kb_id", "kb_version", "vector_pos"]),
+]
+
+
+def upgrade(m: Migrator) -> None:
+    for name, table, columns in CREATED:
+        m.create_index(name, table, columns)
+    for table, columns in DROPPED.items():
+        for column in columns:
+            m.drop_index(f"ix_{table}_{column}")
@@ -0,0 +1,12 @@
+from app.core.migrate import Migrator
+
+
+def upgrade(m: Migrator) -> None:
+    from app.modules.monitor.archive import _archive_engine, list_partitions, partition_path
+
+    m.add_column("replyevent", "user_id", "VARCHAR NOT NULL DEFAULT ''")
+    m.create_index("ix_replyevent_user_id_created_at", "replyevent", ["user_id", "created_at"])
+    for month in list_partitions("replyevent"):
+        cold = Migrator(_archive_engine(partition_path("replyevent", month)))
+        cold.add_column("replyevent", "user_id", "VARCHAR NOT NULL DEFAULT ''")
+        cold.create_index("ix_replyevent_user_id_created_at", "replyevent", ["user_id", "created_at"])
@@ -1,13 +1,20 @@
 from app.modules.kb.models import KnowledgeBase, KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
-from app.modules.monitor.models import ReplyEvent
+from app.modules.monitor.models import LeadProfile, LeadProfileNote, ReplyEvent
+from app.modules.reply.models import ReplyRefinement
 from app.modules.vector.models import VectorIndex, VectorQueryLog, VectorRecord
+from app.modules.xhs.models import CommentIntent, NoteIntentStats
 
 __all__ = [
+    "CommentIntent",
     "KnowledgeBase",
     "KnowledgeChunk",
     "KnowledgeItem",
     "KnowledgeItemRevision",
+    "LeadProfile",
+    "LeadProfileNote",
+    "NoteIntentStats",
     "ReplyEvent",
+    "ReplyRefinement",
     "VectorIndex",
     "VectorRecord",
     "VectorQueryLog",
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlmodel import Session, col, func, select
+
+from app.core.config import settings
+from app.modules.kb.chunking import Chunk, ChunkConfig, chunk_text, default_chunk_config
+from app.modules.kb.models import KnowledgeBase, KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
+
+
+FORMATS = ("jsonl", "csv")
+_MAX_ERRORS = 1000
+
+
+@dataclass
+class ImportRow:
+    line: int
+    key: str
+    title: str
+    tags: str
+    content: str
+    source: str
+    is_active: Optional[bool]
+
+
+@dataclass
+class RowError:
+    line: int
+    key: str
+    error: str
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    chunks: int = 0
+    elapsed_s: float = 0.0
+    rows_per_s: float = 0.0
+    published_version: Optional[int] = None
+    index_id: Optional[UUID] = None
+    prembedded_chunks: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+    def fail(self, line: int, key: str, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < _MAX_ERRORS:
+            self.errors.append(RowError(line=line, key=key, error=error))
+
+
+def _parse_bool(v: Any) -> Optional[bool]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, bool):
+        return v
+    s = str(v).strip().lower()
+    if s in ("1", "true", "yes", "y", "是"):
+        return True
+    if s in ("0", "false", "no", "n", "否"):
+        return False
+    raise ValueError("invalid_is_active")
+
+
+def _to_row(line: int, raw: Dict[str, Any]) -> ImportRow:
+    key = str(raw.get("key") or "").strip()
+    title = str(raw.get("title") or "").strip()
+    content = str(raw.get("content") or "").strip()
+    if not key:
+        raise ValueError("missing_key")
+    if not title:
+        raise ValueError("missing_title")
+    if not content:
+        raise ValueError("missing_content")
+    tags = raw.get("tags") or ""
+    if isinstance(tags, list):
+        tags = ",".join(str(t) for t in tags)
+    return ImportRow(
+        line=line,
+        key=key,
+        title=title,
+        tags=str(tags),
+        content=content,
+        source=str(raw.get("source") or ""),
+        is_active=_parse_bool(raw.get("is_active")),
+    )
+
+
+def iter_records(stream: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    if fmt not in FORMATS:
+        raise ValueError("invalid_import_format")
+    if fmt == "csv":
+        for line, rec in enumerate(csv.DictReader(stream), start=2):
+            yield line, rec
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except json.JSONDecodeError:
+            yield line, None
+
+
+def decode_payload(data: bytes, fmt: str) -> Iterator[Tuple[int, Any]]:
+    text = data.decode("utf-8-sig")
+    return iter_records(io.StringIO(text, newline=""), fmt)
+
+
+def _chunk_batch(contents: List[str], config: ChunkConfig) -> List[List[Chunk]]:
+    return [chunk_text(c, config) for c in contents]
+
+
+def _parse_batch(records: List[Tuple[int, Any]], seen: set, report: ImportReport) -> List[ImportRow]:
+    rows: List[ImportRow] = []
+    for line, raw in records:
+        report.rows += 1
+        if not isinstance(raw, dict):
+            report.fail(line, "", "invalid_record")
+            continue
+        try:
+            row = _to_row(line, raw)
+        except ValueError as e:
+            report.fail(line, str(raw.get("key") or ""), str(e))
+            continue
+        if row.key in seen:
+            report.fail(line, row.key, "duplicate_key")
+            continue
+        seen.add(row.key)
+        rows.append(row)
+    return rows
+
+
+def _current_revisions(session: Session, items: List[KnowledgeItem]) -> Dict[UUID, KnowledgeItemRevision]:
+    rev_ids = [it.current_revision_id for it in items if it.current_revision_id]
+    if not rev_ids:
+        return {}
+    return {r.id: r for r in session.exec(select(KnowledgeItemRevision).where(col(KnowledgeItemRevision.id).in_(rev_ids))).all()}
+
+
+def _last_revision_numbers(session: Session, item_ids: List[UUID]) -> Dict[UUID, int]:
+    if not item_ids:
+        return {}
+    rows = session.exec(
+        select(KnowledgeItemRevision.item_id, func.max(KnowledgeItemRevision.revision))
+        .where(col(KnowledgeItemRevision.item_id).in_(item_ids))
+        .group_by(KnowledgeItemRevision.item_id)
+    ).all()
+    return {item_id: int(n or 0) for item_id, n in rows}
+
+
+def _stage_rows(session: Session, kb_id: UUID, rows: List[ImportRow], chunks: List[List[Chunk]]) -> Tuple[List[KnowledgeChunk], Dict[str, int]]:
+    now = datetime.utcnow()
+    existing = {
+        it.key: it
+        for it in session.exec(
+            select(KnowledgeItem).where((KnowledgeItem.kb_id == kb_id) & (col(KnowledgeItem.key).in_([r.key for r in rows])))
+        ).all()
+    }
+    current = _current_revisions(session, list(existing.values()))
+    last_rev = _last_revision_numbers(session, [it.id for it in existing.values()])
+    staged: List[KnowledgeChunk] = []
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    for row, row_chunks in zip(rows, chunks):
+        item = existing.get(row.key)
+        rev_content = current[item.current_revision_id].content if item and item.current_revision_id in current else None
+        if item is None:
+            item = KnowledgeItem(kb_id=kb_id, key=row.key, title=row.title, tags=row.tags, is_active=row.is_active is not False)
+            counts["created"] += 1
+        elif rev_content == row.content and (item.title, item.tags) == (row.title, row.tags) and row.is_active in (None, item.is_active):
+            counts["unchanged"] += 1
+            continue
+        else:
+            item.title, item.tags = row.title, row.tags
+            if row.is_active is not None:
+                item.is_active = row.is_active
+            counts["updated"] += 1
+        item.updated_at = now
+        if rev_content != row.content:
+            rev = KnowledgeItemRevision(
+                item_id=item.id, revision=last_rev.get(item.id, 0) + 1, content=row.content, source=row.source, status="published"
+            )
+            item.current_revision_id = rev.id
+            session.add(rev)
+            for i, ch in enumerate(row_chunks):
+                staged.append(KnowledgeChunk(revision_id=rev.id, chunk_index=i, content=ch.text, token_count=ch.token_count))
+        session.add(item)
+    session.add_all(staged)
+    session.flush()
+    return staged, counts
+
+
+def _count(report: ImportReport, staged: List[KnowledgeChunk], counts: Dict[str, int]) -> None:
+    report.created += counts["created"]
+    report.updated += counts["updated"]
+    report.unchanged += counts["unchanged"]
+    report.chunks += len(staged)
+
+
+def _write_batch(session: Session, kb_id: UUID, rows: List[ImportRow], chunks: List[List[Chunk]], report: ImportReport) -> List[KnowledgeChunk]:
+    try:
+        staged, counts = _stage_rows(session, kb_id, rows, chunks)
+        session.commit()
+        _count(report, staged, counts)
+        return staged
+    except Exception:
+        session.rollback()
+    staged_all: List[KnowledgeChunk] = []
+    for row, row_chunks in zip(rows, chunks):
+        try:
+            staged, counts = _stage_rows(session, kb_id, [row], [row_chunks])
+            session.commit()
+            _count(report, staged, counts)
+            staged_all.extend(staged)
+        except Exception as e:
+            session.rollback()
+            report.fail(row.line, row.key, type(e).__name__)
+    return staged_all
+
+
+def _batched(records: Iterable[Tuple[int, Any]], size: int) -> Iterator[List[Tuple[int, Any]]]:
+    batch: List[Tuple[int, Any]] = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_import(
+    session: Session,
+    kb_id: UUID,
+    records: Iterable[Tuple[int, Any]],
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    publish: bool = False,
+    reindex: bool = False,
+) -> ImportReport:
+    if not session.get(KnowledgeBase, kb_id):
+        raise ValueError("kb_not_found")
+    started = time.time()
+    report = ImportReport()
+    size = max(1, batch_size or settings.kb_import_batch_size)
+    n_workers = settings.kb_import_workers if workers is None else workers
+    config = default_chunk_config()
+    chunk_pool: Executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else ThreadPoolExecutor(max_workers=1)
+    embed_pool = ThreadPoolExecutor(max_workers=1) if reindex else None
+    embed_futures: List[Tuple[List[UUID], Future]] = []
+    seen: set = set()
+
+    def _submit(batch: List[Tuple[int, Any]]) -> Tuple[List[ImportRow], Future]:
+        rows = _parse_batch(batch, seen, report)
+        return rows, chunk_pool.submit(_chunk_batch, [r.content for r in rows], config)
+
+    try:
+        pending: Optional[Tuple[List[ImportRow], Future]] = None
+        for batch in _batched(records, size):
+            nxt = _submit(batch)
+            if pending is not None:
+                _flush(session, kb_id, pending, report, embed_pool, embed_futures)
+            pending = nxt
+        if pending is not None:
+            _flush(session, kb_id, pending, report, embed_pool, embed_futures)
+    finally:
+        chunk_pool.shutdown(wait=True)
+    if report.updated:
+        from app.modules.vector.manifest import bump_filter_generation
+
+        bump_filter_generation(kb_id)
+
+    if publish or reindex:
+        from app.modules.kb.service import publish_kb
+
+        report.published_version = publish_kb(session, kb_id)
+    if reindex:
+        from app.modules.vector.service import reindex_kb
+
+        precomputed: Dict[UUID, Any] = {}
+        for ids, fut in embed_futures:
+            precomputed.update(zip(ids, fut.result()))
+        embed_pool.shutdown(wait=True)
+        idx = reindex_kb(session, kb_id=kb_id, kb_version=report.published_version, precomputed=precomputed, reuse_previous=True)
+        report.index_id = idx.id
+        report.prembedded_chunks = len(precomputed)
+    report.elapsed_s = round(time.time() - started, 3)
+    report.rows_per_s = round(report.rows / report.elapsed_s, 1) if report.elapsed_s > 0 else float(report.rows)
+    return report
+
+
+def _flush(session, kb_id, pending, report, embed_pool, embed_futures) -> None:
+    rows, fut = pending
+    if not rows:
+        return
+    staged = _write_batch(session, kb_id, rows, fut.result(), report)
+    if embed_pool is not None and staged:
+        from app.modules.vector.embedding import get_embedding_client
+
+        embedder = get_embedding_client()
+        embed_futures.append(([c.id for c in staged], embed_pool.submit(embedder.embed, [c.content for c in staged])))
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="批量导入知识条目（JSONL/CSV，按 key upsert）")
+    p.add_argument("path")
+    p.add_argument("--kb", default=settings.default_kb_slug, help="知识库 slug")
+    p.add_argument("--format", default="", choices=["", *FORMATS], help="默认按扩展名判断")
+    p.add_argument("--batch-size", type=int, default=settings.kb_import_batch_size)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="分块进程数，1 表示单进程")
+    p.add_argument("--publish", action="store_true")
+    p.add_argument("--reindex", action="store_true", help="导入时并行向量化，结束后发布并建索引")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    from dataclasses import asdict
+
+    from app.core.db import create_db_and_tables, session_scope
+    from app.modules.kb.service import get_kb_by_slug
+
+    args = _parse_args(argv)
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    create_db_and_tables()
+    with session_scope() as session, open(args.path, "r", encoding="utf-8-sig", newline="") as f:
+        kb = get_kb_by_slug(session, args.kb)
+        if not kb:
+            raise SystemExit("kb_not_found")
+        report = bulk_import(
+            session,
+            kb.id,
+            iter_records(f, fmt),
+            batch_size=args.batch_size,
+            workers=args.workers,
+            publish=args.publish,
+            reindex=args.reindex,
+        )
+    print(json.dumps(asdict(report), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
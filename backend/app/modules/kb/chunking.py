@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+from app.core.config import settings
+
+
+_PARA_SPLIT_RE = re.compile(r"\n{2,}")
+_SENTENCE_RE = re.compile(r"[^。！？!?；;…\n]*(?:[。！？!?；;…]+[”’」』）)]*|\n|$)")
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]|[A-Za-z0-9_]+|[^\sA-Za-z0-9_\u3400-\u4dbf\u4e00-\u9fff]")
+
+
+@dataclass(frozen=True)
+class ChunkConfig:
+    target_tokens: int = 200
+    max_tokens: int = 320
+    overlap_tokens: int = 40
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    token_count: int
+
+
+def default_chunk_config() -> ChunkConfig:
+    return ChunkConfig(
+        target_tokens=settings.chunk_target_tokens,
+        max_tokens=max(settings.chunk_max_tokens, settings.chunk_target_tokens),
+        overlap_tokens=min(settings.chunk_overlap_tokens, settings.chunk_target_tokens // 2),
+    )
+
+
+def count_tokens(text: str) -> int:
+    total = 0
+    for tok in _TOKEN_RE.findall(text or ""):
+        total += -(-len(tok) // 4) if tok[0].isascii() and tok[0].isalnum() else 1
+    return total
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.findall(paragraph) if s.strip()]
+
+
+def _hard_split(sentence: str, max_tokens: int) -> List[str]:
+    pieces: List[str] = []
+    buf = ""
+    for tok in _TOKEN_RE.findall(sentence):
+        candidate = buf + (" " if buf and tok[0].isascii() and buf[-1].isascii() and buf[-1].isalnum() else "") + tok
+        if buf and count_tokens(candidate) > max_tokens:
+            pieces.append(buf)
+            buf = tok
+        else:
+            buf = candidate
+    if buf:
+        pieces.append(buf)
+    return pieces
+
+
+def _join(parts: List[str]) -> str:
+    out = ""
+    for p in parts:
+        if out and out[-1].isascii() and out[-1].isalnum() and p[0].isascii() and p[0].isalnum():
+            out += " "
+        out += p
+    return out
+
+
+def chunk_text(content: str, config: ChunkConfig | None = None) -> List[Chunk]:
+    cfg = config or default_chunk_config()
+    units: List[tuple[str, int, bool]] = []
+    for para in _PARA_SPLIT_RE.split((content or "").strip()):
+        sentences = split_sentences(para)
+        for i, sent in enumerate(sentences):
+            n = count_tokens(sent)
+            pieces = [sent] if n <= cfg.max_tokens else _hard_split(sent, cfg.max_tokens)
+            for j, piece in enumerate(pieces):
+                last = i == len(sentences) - 1 and j == len(pieces) - 1
+                units.append((piece, n if len(pieces) == 1 else count_tokens(piece), last))
+
+    chunks: List[Chunk] = []
+    window: List[tuple[str, int]] = []
+    window_tokens = 0
+    carried = 0
+
+    def flush() -> None:
+        nonlocal window, window_tokens, carried
+        if len(window) > carried:
+            text = _join([t for t, _ in window])
+            chunks.append(Chunk(text=text, token_count=count_tokens(text)))
+        keep: List[tuple[str, int]] = []
+        kept = 0
+        for t, n in reversed(window):
+            if kept + n > cfg.overlap_tokens:
+                break
+            keep.insert(0, (t, n))
+            kept += n
+        window, window_tokens, carried = keep, kept, len(keep)
+
+    for text, n, ends_paragraph in units:
+        if window_tokens + n > cfg.max_tokens or (window_tokens >= cfg.target_tokens and len(window) > carried):
+            flush()
+            while window and window_tokens + n > cfg.max_tokens:
+                window_tokens -= window.pop(0)[1]
+                carried = max(0, carried - 1)
+        window.append((text, n))
+        window_tokens += n
+        if ends_paragraph and window_tokens >= cfg.target_tokens // 2:
+            flush()
+    flush()
+    return chunks
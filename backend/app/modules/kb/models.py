@@ -4,46 +4,59 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class KnowledgeBase(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
+    __table_args__ = (Index("ix_knowledgebase_created_at_id", "created_at", "id"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
     slug: str = Field(index=True, unique=True)
     name: str
     description: str = ""
-    published_version: int = Field(default=0, index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    published_version: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class KnowledgeItem(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    kb_id: UUID = Field(foreign_key="knowledgebase.id", index=True)
-    key: str = Field(index=True)
+    __table_args__ = (
+        Index("ix_knowledgeitem_kb_id_updated_at", "kb_id", "updated_at", "id"),
+        Index("ix_knowledgeitem_kb_id_key", "kb_id", "key"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kb_id: UUID = Field(foreign_key="knowledgebase.id")
+    key: str
     title: str
     tags: str = ""
-    is_active: bool = Field(default=True, index=True)
+    is_active: bool = True
     current_revision_id: Optional[UUID] = Field(default=None, index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class KnowledgeItemRevision(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    item_id: UUID = Field(foreign_key="knowledgeitem.id", index=True)
-    revision: int = Field(index=True)
+    __table_args__ = (Index("ix_knowledgeitemrevision_item_id_revision", "item_id", "revision"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    item_id: UUID = Field(foreign_key="knowledgeitem.id")
+    revision: int
     content: str
     source: str = ""
-    status: str = Field(default="draft", index=True)
-    published_version: Optional[int] = Field(default=None, index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    status: str = "draft"
+    published_version: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class KnowledgeChunk(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    revision_id: UUID = Field(foreign_key="knowledgeitemrevision.id", index=True)
-    chunk_index: int = Field(index=True)
+    __table_args__ = (Index("ix_knowledgechunk_revision_id_chunk_index", "revision_id", "chunk_index"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    revision_id: UUID = Field(foreign_key="knowledgeitemrevision.id")
+    chunk_index: int
     content: str
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    token_count: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
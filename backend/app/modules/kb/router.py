@@ -1,30 +1,45 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request
 from sqlmodel import Session
-from typing import List, Optional
+from typing import Optional
 
 from app.core.db import get_session
-from app.modules.kb import service
+from app.core.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from app.modules.kb import bulk, service
 from app.modules.kb.schemas import (
     KnowledgeBaseCreate,
+    KnowledgeBasePage,
+    ImportItemsResponse,
     KnowledgeBaseRead,
     KnowledgeItemCreate,
+    KnowledgeItemPage,
     KnowledgeItemRead,
     KnowledgeItemUpdate,
     KnowledgeRevisionCreate,
+    KnowledgeRevisionPage,
     KnowledgeRevisionRead,
     PublishKnowledgeBaseResponse,
+    RechunkKnowledgeBaseResponse,
 )
 
 
 router = APIRouter(tags=["kb"])
 
 
-@router.get("/kbs", response_model=List[KnowledgeBaseRead])
-def list_kbs(session: Session = Depends(get_session)):
-    service.ensure_default_kb(session)
-    return service.list_kbs(session)
+@router.get("/kbs", response_model=KnowledgeBasePage)
+def list_kbs(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    try:
+        items, next_cursor = service.list_kbs(session, limit=limit, cursor=cursor)
+    except ValueError as e:
+        if str(e) == "invalid_cursor":
+            raise HTTPException(status_code=400, detail="invalid_cursor")
+        raise
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("/kbs", response_model=KnowledgeBaseRead)
@@ -38,21 +53,44 @@ def create_kb(payload: KnowledgeBaseCreate, session: Session = Depends(get_sessi
 
 
 @router.post("/kbs/{kb_id}/publish", response_model=PublishKnowledgeBaseResponse)
-def publish_kb(kb_id: UUID, session: Session = Depends(get_session)):
+def publish_kb(kb_id: UUID, background_tasks: BackgroundTasks, reindex: bool = False, session: Session = Depends(get_session)):
     try:
         v = service.publish_kb(session, kb_id)
-        return PublishKnowledgeBaseResponse(kb_id=kb_id, published_version=v)
+        if reindex:
+            from app.modules.vector.service import reindex_published
+
+            background_tasks.add_task(reindex_published, kb_id, v)
+        return PublishKnowledgeBaseResponse(kb_id=kb_id, published_version=v, reindex_scheduled=reindex)
     except ValueError as e:
         if str(e) == "kb_not_found":
             raise HTTPException(status_code=404, detail="kb_not_found")
         raise
 
 
-@router.get("/kbs/{kb_id}/items", response_model=List[KnowledgeItemRead])
-def list_items(kb_id: UUID, is_active: Optional[bool] = None, session: Session = Depends(get_session)):
+@router.post("/kbs/{kb_id}/rechunk", response_model=RechunkKnowledgeBaseResponse)
+def rechunk_kb(kb_id: UUID, session: Session = Depends(get_session)):
+    if not service.get_kb(session, kb_id):
+        raise HTTPException(status_code=404, detail="kb_not_found")
+    return RechunkKnowledgeBaseResponse(kb_id=kb_id, chunks=service.rechunk_kb(session, kb_id))
+
+
+@router.get("/kbs/{kb_id}/items", response_model=KnowledgeItemPage)
+def list_items(
+    kb_id: UUID,
+    is_active: Optional[bool] = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
     if not service.get_kb(session, kb_id):
         raise HTTPException(status_code=404, detail="kb_not_found")
-    return service.list_items(session, kb_id=kb_id, is_active=is_active)
+    try:
+        items, next_cursor = service.list_items(session, kb_id=kb_id, is_active=is_active, limit=limit, cursor=cursor)
+    except ValueError as e:
+        if str(e) == "invalid_cursor":
+            raise HTTPException(status_code=400, detail="invalid_cursor")
+        raise
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("/kbs/{kb_id}/items", response_model=KnowledgeItemRead)
@@ -75,6 +113,38 @@ def create_item(kb_id: UUID, payload: KnowledgeItemCreate, session: Session = De
         raise
 
 
+@router.post("/kbs/{kb_id}/items/import", response_model=ImportItemsResponse)
+def import_items(
+    kb_id: UUID,
+    request: Request,
+    payload: bytes = Body(..., media_type="application/x-ndjson"),
+    format: str = "",
+    publish: bool = False,
+    reindex: bool = False,
+    batch_size: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    try:
+        report = bulk.bulk_import(
+            session,
+            kb_id,
+            bulk.decode_payload(payload, fmt),
+            batch_size=batch_size,
+            publish=publish,
+            reindex=reindex,
+        )
+    except ValueError as e:
+        if str(e) == "kb_not_found":
+            raise HTTPException(status_code=404, detail="kb_not_found")
+        if str(e) in ("invalid_import_format", "invalid_vector_codec"):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="invalid_encoding")
+    return ImportItemsResponse(kb_id=kb_id, **{k: v for k, v in vars(report).items() if k != "errors"}, errors=[vars(e) for e in report.errors])
+
+
 @router.get("/items/{item_id}", response_model=KnowledgeItemRead)
 def get_item(item_id: UUID, session: Session = Depends(get_session)):
     item = service.get_item(session, item_id)
@@ -93,12 +163,24 @@ def update_item(item_id: UUID, payload: KnowledgeItemUpdate, session: Session =
         raise
 
 
-@router.get("/items/{item_id}/revisions", response_model=List[KnowledgeRevisionRead])
-def list_revisions(item_id: UUID, session: Session = Depends(get_session)):
+@router.get("/items/{item_id}/revisions", response_model=KnowledgeRevisionPage)
+def list_revisions(
+    item_id: UUID,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    include_content: bool = False,
+    session: Session = Depends(get_session),
+):
     item = service.get_item(session, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="item_not_found")
-    return service.list_revisions(session, item_id)
+    try:
+        items, next_cursor = service.list_revisions(session, item_id, limit=limit, cursor=cursor, include_content=include_content)
+    except ValueError as e:
+        if str(e) == "invalid_cursor":
+            raise HTTPException(status_code=400, detail="invalid_cursor")
+        raise
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("/items/{item_id}/revisions", response_model=KnowledgeRevisionRead)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -58,14 +58,57 @@ class KnowledgeRevisionRead(BaseModel):
     id: UUID
     item_id: UUID
     revision: int
-    content: str
+    content: Optional[str] = None
     source: str
     status: str
     published_version: Optional[int]
     created_at: datetime
 
 
+class KnowledgeBasePage(BaseModel):
+    items: List[KnowledgeBaseRead]
+    next_cursor: Optional[str] = None
+
+
+class KnowledgeItemPage(BaseModel):
+    items: List[KnowledgeItemRead]
+    next_cursor: Optional[str] = None
+
+
+class KnowledgeRevisionPage(BaseModel):
+    items: List[KnowledgeRevisionRead]
+    next_cursor: Optional[str] = None
+
+
 class PublishKnowledgeBaseResponse(BaseModel):
     kb_id: UUID
     published_version: int
+    reindex_scheduled: bool = False
+
+
 
+class RechunkKnowledgeBaseResponse(BaseModel):
+    kb_id: UUID
+    chunks: int
+
+
+class ImportRowError(BaseModel):
+    line: int
+    key: str
+    error: str
+
+
+class ImportItemsResponse(BaseModel):
+    kb_id: UUID
+    rows: int
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    chunks: int
+    elapsed_s: float
+    rows_per_s: float
+    published_version: Optional[int]
+    index_id: Optional[UUID]
+    prembedded_chunks: int
+    errors: List[ImportRowError]
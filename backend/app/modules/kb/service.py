@@ -1,27 +1,17 @@
 from __future__ import annotations
 
-import re
 from datetime import datetime
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 
-from sqlmodel import Session, col, select
+from sqlmodel import Session, col, delete, select, update
 
 from app.core.config import settings
+from app.core.pagination import clamp_limit, decode_cursor, encode_cursor, parse_datetime, split_page
+from app.modules.kb.chunking import ChunkConfig, chunk_text
 from app.modules.kb.models import KnowledgeBase, KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
 
 
-_PARA_SPLIT_RE = re.compile(r"\n{2,}")
-
-
-def _chunk_text(content: str) -> List[str]:
-    parts = [p.strip() for p in _PARA_SPLIT_RE.split(content.strip())]
-    parts = [p for p in parts if p]
-    if not parts:
-        return []
-    return parts
-
-
 def ensure_default_kb(session: Session) -> KnowledgeBase:
     kb = session.exec(select(KnowledgeBase).where(KnowledgeBase.slug == settings.default_kb_slug)).first()
     if kb:
@@ -33,8 +23,25 @@ def ensure_default_kb(session: Session) -> KnowledgeBase:
     return kb
 
 
-def list_kbs(session: Session) -> List[KnowledgeBase]:
-    return list(session.exec(select(KnowledgeBase).order_by(KnowledgeBase.created_at.desc())))
+def list_kbs(session: Session, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[KnowledgeBase], Optional[str]]:
+    n = clamp_limit(limit)
+    stmt = select(KnowledgeBase)
+    if cursor:
+        created_at, kb_id = decode_cursor(cursor, 2)
+        created_at = parse_datetime(created_at)
+        stmt = stmt.where(
+            (KnowledgeBase.created_at < created_at) | ((KnowledgeBase.created_at == created_at) & (col(KnowledgeBase.id) < _uuid(kb_id)))
+        )
+    rows = session.exec(stmt.order_by(col(KnowledgeBase.created_at).desc(), col(KnowledgeBase.id).desc()).limit(n + 1)).all()
+    page, more = split_page(rows, n)
+    return page, encode_cursor(page[-1].created_at, page[-1].id) if more else None
+
+
+def _uuid(value: Any) -> UUID:
+    try:
+        return UUID(str(value))
+    except ValueError:
+        raise ValueError("invalid_cursor")
 
 
 def create_kb(session: Session, slug: str, name: str, description: str) -> KnowledgeBase:
@@ -56,11 +63,22 @@ def get_kb_by_slug(session: Session, slug: str) -> Optional[KnowledgeBase]:
     return session.exec(select(KnowledgeBase).where(KnowledgeBase.slug == slug)).first()
 
 
-def list_items(session: Session, kb_id: UUID, is_active: Optional[bool]) -> List[KnowledgeItem]:
+def list_items(
+    session: Session, kb_id: UUID, is_active: Optional[bool], limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List[KnowledgeItem], Optional[str]]:
+    n = clamp_limit(limit)
     stmt = select(KnowledgeItem).where(KnowledgeItem.kb_id == kb_id)
     if is_active is not None:
         stmt = stmt.where(KnowledgeItem.is_active == is_active)
-    return list(session.exec(stmt.order_by(KnowledgeItem.updated_at.desc())))
+    if cursor:
+        updated_at, item_id = decode_cursor(cursor, 2)
+        updated_at = parse_datetime(updated_at)
+        stmt = stmt.where(
+            (KnowledgeItem.updated_at < updated_at) | ((KnowledgeItem.updated_at == updated_at) & (col(KnowledgeItem.id) < _uuid(item_id)))
+        )
+    rows = session.exec(stmt.order_by(col(KnowledgeItem.updated_at).desc(), col(KnowledgeItem.id).desc()).limit(n + 1)).all()
+    page, more = split_page(rows, n)
+    return page, encode_cursor(page[-1].updated_at, page[-1].id) if more else None
 
 
 def create_item(
@@ -104,12 +122,17 @@ def update_item(session: Session, item_id: UUID, title: Optional[str], tags: Opt
         item.title = title
     if tags is not None:
         item.tags = tags
+    toggled = is_active is not None and is_active != item.is_active
     if is_active is not None:
         item.is_active = is_active
     item.updated_at = datetime.utcnow()
     session.add(item)
     session.commit()
     session.refresh(item)
+    if toggled:
+        from app.modules.vector.manifest import bump_filter_generation
+
+        bump_filter_generation(item.kb_id)
     return item
 
 
@@ -117,14 +140,23 @@ def get_item(session: Session, item_id: UUID) -> Optional[KnowledgeItem]:
     return session.get(KnowledgeItem, item_id)
 
 
-def list_revisions(session: Session, item_id: UUID) -> List[KnowledgeItemRevision]:
-    return list(
-        session.exec(
-            select(KnowledgeItemRevision)
-            .where(KnowledgeItemRevision.item_id == item_id)
-            .order_by(KnowledgeItemRevision.revision.desc())
-        )
-    )
+_REVISION_SUMMARY_COLUMNS = [c for c in KnowledgeItemRevision.__table__.columns if c.name != "content"]
+
+
+def list_revisions(
+    session: Session, item_id: UUID, limit: Optional[int] = None, cursor: Optional[str] = None, include_content: bool = False
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    n = clamp_limit(limit)
+    columns = list(KnowledgeItemRevision.__table__.columns) if include_content else _REVISION_SUMMARY_COLUMNS
+    stmt = select(*columns).where(KnowledgeItemRevision.item_id == item_id)
+    if cursor:
+        (before,) = decode_cursor(cursor, 1)
+        if not isinstance(before, int):
+            raise ValueError("invalid_cursor")
+        stmt = stmt.where(KnowledgeItemRevision.revision < before)
+    rows = session.exec(stmt.order_by(col(KnowledgeItemRevision.revision).desc()).limit(n + 1)).all()
+    page, more = split_page([dict(r._mapping) for r in rows], n)
+    return page, encode_cursor(page[-1]["revision"]) if more else None
 
 
 def create_revision(session: Session, item_id: UUID, content: str, source: str) -> KnowledgeItemRevision:
@@ -155,6 +187,8 @@ def publish_revision(session: Session, item_id: UUID, revision_id: UUID) -> Know
     rev.status = "published"
     session.add(rev)
     session.commit()
+    if session.exec(select(KnowledgeChunk.id).where(KnowledgeChunk.revision_id == rev.id).limit(1)).first() is None:
+        _rebuild_chunks_for_revision(session, rev)
 
     item.current_revision_id = rev.id
     item.updated_at = datetime.utcnow()
@@ -172,16 +206,11 @@ def publish_kb(session: Session, kb_id: UUID) -> int:
     kb.published_version = next_version
     kb.updated_at = datetime.utcnow()
     session.add(kb)
+    current = select(KnowledgeItem.current_revision_id).where(KnowledgeItem.kb_id == kb_id)
+    session.exec(
+        update(KnowledgeItemRevision).where(col(KnowledgeItemRevision.id).in_(current)).values(published_version=next_version)
+    )
     session.commit()
-
-    items = session.exec(select(KnowledgeItem).where(KnowledgeItem.kb_id == kb_id)).all()
-    current_rev_ids = [it.current_revision_id for it in items if it.current_revision_id]
-    if current_rev_ids:
-        revs = session.exec(select(KnowledgeItemRevision).where(col(KnowledgeItemRevision.id).in_(current_rev_ids))).all()
-        for r in revs:
-            r.published_version = next_version
-            session.add(r)
-        session.commit()
     return next_version
 
 
@@ -194,13 +223,66 @@ def iter_current_chunks(session: Session, kb_id: UUID) -> Iterable[KnowledgeChun
     return session.exec(stmt)
 
 
-def _rebuild_chunks_for_revision(session: Session, revision: KnowledgeItemRevision) -> None:
-    existing = session.exec(select(KnowledgeChunk).where(KnowledgeChunk.revision_id == revision.id)).all()
-    for ch in existing:
-        session.delete(ch)
+def items_by_revision(session: Session, revision_ids: List[UUID]) -> Dict[UUID, KnowledgeItem]:
+    if not revision_ids:
+        return {}
+    rows = session.exec(
+        select(KnowledgeItemRevision.id, KnowledgeItem)
+        .join(KnowledgeItem, KnowledgeItem.id == KnowledgeItemRevision.item_id)
+        .where(col(KnowledgeItemRevision.id).in_(revision_ids))
+    ).all()
+    return {rev_id: item for rev_id, item in rows}
+
+
+def inactive_item_ids(session: Session, kb_id: UUID) -> Set[UUID]:
+    stmt = select(KnowledgeItem.id).where((KnowledgeItem.kb_id == kb_id) & (KnowledgeItem.is_active == False))  # noqa: E712
+    return set(session.exec(stmt).all())
+
+
+def rechunk_kb(session: Session, kb_id: UUID, config: Optional[ChunkConfig] = None, reindex: bool = True) -> int:
+    from app.modules.vector.models import VectorIndex
+
+    rev_ids = session.exec(
+        select(KnowledgeItem.current_revision_id).where(
+            (KnowledgeItem.kb_id == kb_id) & (col(KnowledgeItem.current_revision_id).is_not(None))
+        )
+    ).all()
+    total = 0
+    stale: Set[UUID] = set()
+    for rev in session.exec(select(KnowledgeItemRevision).where(col(KnowledgeItemRevision.id).in_(rev_ids))).all():
+        stale.update(session.exec(select(KnowledgeChunk.id).where(KnowledgeChunk.revision_id == rev.id)).all())
+        total += _add_chunks(session, rev, config)
+        session.commit()
+
+    if reindex:
+        from app.modules.vector.service import get_latest_index, reindex_kb
+
+        kb = session.get(KnowledgeBase, kb_id)
+        versions = {idx.kb_version for idx in [get_latest_index(session, kb_id, None)] if idx is not None}
+        if kb and session.exec(select(VectorIndex.id).where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version == kb.published_version))).first():
+            versions.add(kb.published_version)
+        fresh = [ch for ch in iter_current_chunks(session, kb_id) if ch.id not in stale]
+        for version in sorted(versions, reverse=True):
+            reindex_kb(session, kb_id=kb_id, kb_version=version, chunks=fresh)
+
+    stale_ids = list(stale)
+    for start in range(0, len(stale_ids), 500):
+        session.exec(delete(KnowledgeChunk).where(col(KnowledgeChunk.id).in_(stale_ids[start : start + 500])))
     session.commit()
-    chunks = _chunk_text(revision.content)
-    for idx, text in enumerate(chunks):
-        session.add(KnowledgeChunk(revision_id=revision.id, chunk_index=idx, content=text))
+    return total
+
+
+def _add_chunks(session: Session, revision: KnowledgeItemRevision, config: Optional[ChunkConfig] = None) -> int:
+    chunks = chunk_text(revision.content, config)
+    session.add_all(
+        KnowledgeChunk(revision_id=revision.id, chunk_index=idx, content=ch.text, token_count=ch.token_count) for idx, ch in enumerate(chunks)
+    )
+    return len(chunks)
+
+
+def _rebuild_chunks_for_revision(session: Session, revision: KnowledgeItemRevision, config: Optional[ChunkConfig] = None) -> int:
+    session.exec(delete(KnowledgeChunk).where(KnowledgeChunk.revision_id == revision.id))
+    count = _add_chunks(session, revision, config)
     session.commit()
+    return count
 
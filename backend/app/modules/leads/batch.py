@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.textnorm import normalize_batch
+from app.modules.leads.service import score_normalized
+
+
+Entry = Tuple[int, Optional[Dict[str, Any]], str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if settings.lead_batch_workers <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.lead_batch_workers)
+        return _pool
+
+
+def parse_line(line_no: int, raw: Any) -> Optional[Entry]:
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", errors="replace")
+    if not raw.strip():
+        return None
+    try:
+        rec = json.loads(raw)
+    except json.JSONDecodeError:
+        return line_no, None, "invalid_json"
+    if not isinstance(rec, dict) or not isinstance(rec.get("text"), str) or not rec["text"].strip():
+        return line_no, None, "missing_text"
+    return line_no, rec, ""
+
+
+def score_texts(texts: List[str]) -> List[Tuple[int, str, List[str], List[str]]]:
+    return [(r.score, r.level, r.signals, r.next_actions) for r in map(score_normalized, normalize_batch(texts))]
+
+
+@dataclass
+class LeadAggregate:
+    count: int = 0
+    score_sum: int = 0
+    max_score: int = 0
+    levels: Dict[str, int] = field(default_factory=dict)
+    signals: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, score: int, level: str, signals: List[str]) -> None:
+        self.count += 1
+        self.score_sum += score
+        self.max_score = max(self.max_score, score)
+        self.levels[level] = self.levels.get(level, 0) + 1
+        for s in signals:
+            self.signals[s] = self.signals.get(s, 0) + 1
+
+    def to_dict(self, kind: str, key: str) -> Dict[str, Any]:
+        return {
+            "type": kind,
+            f"{kind}_id": key,
+            "count": self.count,
+            "avg_score": round(self.score_sum / self.count, 2) if self.count else 0.0,
+            "max_score": self.max_score,
+            "levels": self.levels,
+            "signals": self.signals,
+        }
+
+
+class BatchRun:
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.rows = 0
+        self.scored = 0
+        self.errors = 0
+        self.notes: Dict[str, LeadAggregate] = {}
+        self.users: Dict[str, LeadAggregate] = {}
+
+    def feed(self, entries: List[Entry], scored: List[Tuple[int, str, List[str], List[str]]]) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        results = iter(scored)
+        for line, rec, error in entries:
+            self.rows += 1
+            if rec is None:
+                self.errors += 1
+                out.append({"type": "error", "line": line, "error": error})
+                continue
+            score, level, signals, next_actions = next(results)
+            self.scored += 1
+            row = {"type": "lead", "line": line, "score": score, "level": level, "signals": signals, "next_actions": next_actions}
+            for key in ("id", "note_id", "user_id"):
+                if rec.get(key) is not None:
+                    row[key] = rec[key]
+            for key, groups in (("note_id", self.notes), ("user_id", self.users)):
+                if rec.get(key):
+                    groups.setdefault(str(rec[key]), LeadAggregate()).add(score, level, signals)
+            out.append(row)
+        return out
+
+    def finish(self) -> List[Dict[str, Any]]:
+        elapsed = time.time() - self.started
+        out = [agg.to_dict("note", key) for key, agg in self.notes.items()]
+        out.extend(agg.to_dict("user", key) for key, agg in self.users.items())
+        out.append(
+            {
+                "type": "summary",
+                "rows": self.rows,
+                "scored": self.scored,
+                "errors": self.errors,
+                "elapsed_s": round(elapsed, 3),
+                "rows_per_s": round(self.rows / elapsed, 1) if elapsed > 0 else float(self.rows),
+            }
+        )
+        return out
+
+
+def texts_of(entries: List[Entry]) -> List[str]:
+    return [rec["text"] for _, rec, _ in entries if rec is not None]
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line
+    if buf:
+        yield buf
+
+
+async def _aiter(lines: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(lines, "__aiter__"):
+        async for line in lines:
+            yield line
+    else:
+        for line in lines:
+            yield line
+
+
+async def score_stream(lines: Union[Iterable[Any], AsyncIterable[Any]], chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    run = BatchRun()
+    pool = get_pool()
+    size = max(1, chunk_size or settings.lead_batch_chunk_size)
+    inflight = max(1, settings.lead_batch_workers)
+    pending: Deque[Tuple[List[Entry], asyncio.Future]] = deque()
+
+    def _encode(rows: List[Dict[str, Any]]) -> bytes:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+    def _submit(entries: List[Entry]) -> None:
+        pending.append((entries, loop.run_in_executor(pool, score_texts, texts_of(entries))))
+
+    chunk: List[Entry] = []
+    line_no = 0
+    async for raw in _aiter(lines):
+        line_no += 1
+        entry = parse_line(line_no, raw)
+        if entry is None:
+            continue
+        chunk.append(entry)
+        if len(chunk) >= size:
+            _submit(chunk)
+            chunk = []
+            while len(pending) > inflight:
+                entries, fut = pending.popleft()
+                yield _encode(run.feed(entries, await fut))
+    if chunk:
+        _submit(chunk)
+    while pending:
+        entries, fut = pending.popleft()
+        yield _encode(run.feed(entries, await fut))
+    yield _encode(run.finish())
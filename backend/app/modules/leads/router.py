@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.modules.leads.schemas import LeadScoreRequest, LeadScoreResponse
 from app.modules.leads.service import score_lead
@@ -7,8 +10,22 @@ from app.modules.leads.service import score_lead
 router = APIRouter(tags=["leads"])
 
 
+class _DuplexStreamingResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
 @router.post("/leads/score", response_model=LeadScoreResponse)
 def lead_score(payload: LeadScoreRequest):
     r = score_lead(payload.text)
     return LeadScoreResponse(score=r.score, level=r.level, signals=r.signals, next_actions=r.next_actions, features=r.features)
 
+
+@router.post("/leads/score/batch")
+async def lead_score_batch(request: Request, chunk_size: Optional[int] = Query(default=None, ge=1, le=100000)):
+    from app.modules.leads.batch import aiter_lines, score_stream
+
+    return _DuplexStreamingResponse(score_stream(aiter_lines(request.stream()), chunk_size=chunk_size), media_type="application/x-ndjson")
+
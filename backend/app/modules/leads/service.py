@@ -4,6 +4,8 @@ import re
 from dataclasses import dataclass
 from typing import Dict, List
 
+from app.core.textnorm import normalize_text
+
 
 @dataclass(frozen=True)
 class LeadResult:
@@ -25,7 +27,10 @@ _PURCHASED = re.compile(r"(已买|已经买|买了|刚买|已入手|已入|已
 
 
 def score_lead(text: str) -> LeadResult:
-    t = (text or "").strip()
+    return score_normalized(normalize_text(text))
+
+
+def score_normalized(t: str) -> LeadResult:
     features = {
         "buy_strong": 1 if _BUY_STRONG.search(t) else 0,
         "buy_weak": 1 if _BUY_WEAK.search(t) else 0,
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.modules.monitor.models import ReplyEvent
+from app.modules.vector.models import VectorQueryLog
+
+
+ARCHIVED: Dict[str, Type[SQLModel]] = {"replyevent": ReplyEvent, "vectorquerylog": VectorQueryLog}
+
+_engines: Dict[str, object] = {}
+_engines_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchiveReport:
+    cutoff: datetime
+    moved: Dict[str, int] = field(default_factory=dict)
+    partitions: Dict[str, List[str]] = field(default_factory=dict)
+    dropped: List[str] = field(default_factory=list)
+    duration_ms: int = 0
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _month_bounds(month: str) -> tuple[datetime, datetime]:
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def partition_path(table: str, month: str) -> str:
+    return os.path.join(settings.event_archive_dir, table, f"{month}.db")
+
+
+def list_partitions(table: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+    since, until = naive_utc(since), naive_utc(until)
+    months = []
+    for path in glob.glob(os.path.join(settings.event_archive_dir, table, "*.db")):
+        month = os.path.basename(path)[:-3]
+        try:
+            start, end = _month_bounds(month)
+        except ValueError:
+            continue
+        if (since is None or end > since) and (until is None or start <= until):
+            months.append(month)
+    return sorted(months)
+
+
+def _archive_engine(path: str):
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            engine = create_engine(f"sqlite:///{path}", poolclass=NullPool)
+            _engines[path] = engine
+        return engine
+
+
+def partition_session(table: str, month: str) -> Session:
+    return Session(_archive_engine(partition_path(table, month)))
+
+
+def _ensure_partition(table: str, month: str):
+    path = partition_path(table, month)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    engine = _archive_engine(path)
+    model = ARCHIVED[table]
+    dialect = sqlite.dialect()
+    with engine.begin() as conn:
+        conn.execute(text(str(CreateTable(model.__table__, if_not_exists=True).compile(dialect=dialect))))
+        for index in model.__table__.indexes:
+            conn.execute(text(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))))
+    return engine
+
+
+def _move_batch(session: Session, table: str, cutoff: datetime, batch_size: int, report: ArchiveReport) -> int:
+    columns = [c.name for c in ARCHIVED[table].__table__.columns]
+    col_sql = ", ".join(f'"{c}"' for c in columns)
+    rows = session.execute(
+        text(f"SELECT {col_sql} FROM {table} WHERE created_at < :cutoff ORDER BY created_at LIMIT :n"),
+        {"cutoff": _ts(cutoff), "n": batch_size},
+    ).mappings().all()
+    if not rows:
+        return 0
+    by_month: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_month.setdefault(str(row["created_at"])[:7], []).append(dict(row))
+    insert_sql = f"INSERT OR IGNORE INTO {table} ({col_sql}) VALUES ({', '.join(':' + c for c in columns)})"
+    for month, month_rows in by_month.items():
+        with _ensure_partition(table, month).begin() as conn:
+            conn.execute(text(insert_sql), month_rows)
+        months = report.partitions.setdefault(table, [])
+        if month not in months:
+            months.append(month)
+    ids = [r["id"] for r in rows]
+    session.execute(text(f"DELETE FROM {table} WHERE id IN ({', '.join(':id%d' % i for i in range(len(ids)))})"), {f"id{i}": v for i, v in enumerate(ids)})
+    session.commit()
+    return len(rows)
+
+
+def drop_expired_partitions(keep_months: int, now: Optional[datetime] = None) -> List[str]:
+    if keep_months <= 0:
+        return []
+    now = now or datetime.utcnow()
+    oldest = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(keep_months):
+        oldest = (oldest - timedelta(days=1)).replace(day=1)
+    dropped = []
+    for table in ARCHIVED:
+        for month in list_partitions(table, until=oldest - timedelta(microseconds=1)):
+            path = partition_path(table, month)
+            with _engines_lock:
+                engine = _engines.pop(path, None)
+            if engine is not None:
+                engine.dispose()
+            os.remove(path)
+            dropped.append(f"{table}/{month}")
+    return dropped
+
+
+def archive_events(
+    session: Session,
+    hot_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> ArchiveReport:
+    started = time.time()
+    now = now or datetime.utcnow()
+    days = settings.event_hot_days if hot_days is None else hot_days
+    report = ArchiveReport(cutoff=now - timedelta(days=max(0, days)))
+    size = max(1, batch_size or settings.event_archive_batch_size)
+    for table in ARCHIVED:
+        moved = 0
+        while True:
+            n = _move_batch(session, table, report.cutoff, size, report)
+            moved += n
+            if n < size:
+                break
+        report.moved[table] = moved
+    report.dropped = drop_expired_partitions(settings.event_archive_keep_months, now=now)
+    report.duration_ms = int((time.time() - started) * 1000)
+    return report
+
+
+_archive_thread: Optional[threading.Thread] = None
+_last_report: Optional[ArchiveReport] = None
+
+
+def last_report() -> Optional[ArchiveReport]:
+    return _last_report
+
+
+def _archive_loop(interval_s: float) -> None:
+    global _last_report
+    from app.core.db import session_scope
+
+    while True:
+        time.sleep(interval_s)
+        try:
+            with session_scope() as session:
+                _last_report = archive_events(session)
+        except Exception:
+            logger.exception("event archive failed")
+
+
+def start_archive_loop() -> Optional[threading.Thread]:
+    global _archive_thread
+    if settings.event_archive_interval_s <= 0 or _archive_thread is not None:
+        return None
+    _archive_thread = threading.Thread(target=_archive_loop, args=(settings.event_archive_interval_s,), name="event-archive", daemon=True)
+    _archive_thread.start()
+    return _archive_thread
@@ -3,20 +3,51 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class ReplyEvent(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    kb_id: UUID = Field(index=True)
-    kb_version: int = Field(index=True)
-    comment_id: str = Field(index=True)
-    note_id: str = Field(index=True)
-    intent: str = Field(index=True)
-    lead_score: int = Field(default=0, index=True)
-    lead_level: str = Field(default="low", index=True)
-    latency_ms: int = Field(default=0, index=True)
-    llm_used: bool = Field(default=False, index=True)
+    __table_args__ = (
+        Index("ix_replyevent_note_id_lead_score_created_at", "note_id", "lead_score", "created_at"),
+        Index("ix_replyevent_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kb_id: UUID
+    kb_version: int
+    comment_id: str
+    note_id: str
+    user_id: str = ""
+    intent: str
+    lead_score: int = 0
+    lead_level: str = "low"
+    latency_ms: int = 0
+    llm_used: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     meta_json: str = ""
 
+
+
+class LeadProfile(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_leadprofile_max_score_last_seen_at", "max_score", "last_seen_at"),
+        Index("ix_leadprofile_decay_rank", "decay_rank"),
+    )
+
+    user_id: str = Field(primary_key=True)
+    max_score: int = 0
+    decay_rank: float = 0.0
+    event_count: int = 0
+    note_count: int = 0
+    last_note_id: str = ""
+    last_level: str = "low"
+    first_seen_at: datetime = Field(default_factory=datetime.utcnow)
+    last_seen_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LeadProfileNote(SQLModel, table=True):
+    user_id: str = Field(primary_key=True)
+    note_id: str = Field(primary_key=True)
+    max_score: int = 0
+    last_seen_at: datetime = Field(default_factory=datetime.utcnow)
@@ -2,13 +2,18 @@ from fastapi import APIRouter, Depends
 from sqlmodel import Session
 
 from app.core.db import get_session
+from app.modules.monitor.archive import archive_events
 from app.modules.monitor.schemas import (
+    ArchiveEventsRequest,
+    ArchiveEventsResponse,
     MonitorNoteTopLeadsRequest,
     MonitorNoteTopLeadsResponse,
     MonitorOverviewRequest,
     MonitorOverviewResponse,
+    MonitorTopLeadUsersRequest,
+    MonitorTopLeadUsersResponse,
 )
-from app.modules.monitor.service import note_top_leads, overview
+from app.modules.monitor.service import note_top_leads, overview, top_lead_users
 
 
 router = APIRouter(tags=["monitor"])
@@ -19,6 +24,11 @@ def monitor_overview(payload: MonitorOverviewRequest, session: Session = Depends
     return overview(session, since=payload.since, until=payload.until)
 
 
+@router.post("/monitor/archive", response_model=ArchiveEventsResponse)
+def monitor_archive(payload: ArchiveEventsRequest, session: Session = Depends(get_session)):
+    return archive_events(session, hot_days=payload.hot_days)
+
+
 @router.post("/monitor/note-top-leads", response_model=MonitorNoteTopLeadsResponse)
 def monitor_note_top_leads(payload: MonitorNoteTopLeadsRequest, session: Session = Depends(get_session)):
     rows = note_top_leads(session, note_id=payload.note_id, limit=payload.limit)
@@ -27,6 +37,7 @@ def monitor_note_top_leads(payload: MonitorNoteTopLeadsRequest, session: Session
         "rows": [
             {
                 "comment_id": r.comment_id,
+                "user_id": r.user_id,
                 "intent": r.intent,
                 "lead_score": r.lead_score,
                 "lead_level": r.lead_level,
@@ -39,6 +50,12 @@ def monitor_note_top_leads(payload: MonitorNoteTopLeadsRequest, session: Session
     }
 
 
+@router.post("/monitor/top-lead-users", response_model=MonitorTopLeadUsersResponse)
+def monitor_top_lead_users(payload: MonitorTopLeadUsersRequest, session: Session = Depends(get_session)):
+    rows = top_lead_users(session, limit=payload.limit, order=payload.order, min_notes=payload.min_notes)
+    return {"order": payload.order, "rows": rows, "generated_at": __datetime_utc()}
+
+
 def __datetime_utc():
     from datetime import datetime
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -22,6 +22,18 @@ class MonitorOverviewResponse(BaseModel):
     generated_at: datetime
 
 
+class ArchiveEventsRequest(BaseModel):
+    hot_days: Optional[int] = Field(default=None, ge=0)
+
+
+class ArchiveEventsResponse(BaseModel):
+    cutoff: datetime
+    moved: Dict[str, int]
+    partitions: Dict[str, List[str]]
+    dropped: List[str]
+    duration_ms: int
+
+
 class MonitorNoteTopLeadsRequest(BaseModel):
     note_id: str = Field(min_length=1)
     limit: int = Field(default=20, ge=1, le=200)
@@ -29,6 +41,7 @@ class MonitorNoteTopLeadsRequest(BaseModel):
 
 class LeadRow(BaseModel):
     comment_id: str
+    user_id: str = ""
     intent: str
     lead_score: int
     lead_level: str
@@ -41,3 +54,27 @@ class MonitorNoteTopLeadsResponse(BaseModel):
     rows: List[LeadRow]
     generated_at: datetime
 
+
+
+class MonitorTopLeadUsersRequest(BaseModel):
+    limit: int = Field(default=20, ge=1, le=200)
+    order: Literal["max", "decayed"] = "max"
+    min_notes: int = Field(default=1, ge=1)
+
+
+class LeadUserRow(BaseModel):
+    user_id: str
+    max_score: int
+    decayed_score: float
+    event_count: int
+    note_count: int
+    last_note_id: str
+    last_level: str
+    first_seen_at: datetime
+    last_seen_at: datetime
+
+
+class MonitorTopLeadUsersResponse(BaseModel):
+    order: str
+    rows: List[LeadUserRow]
+    generated_at: datetime
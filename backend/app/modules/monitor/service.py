@@ -1,12 +1,41 @@
 from __future__ import annotations
 
 import json
+import math
+import sqlite3
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from sqlmodel import Session, func, select
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, func, select, update
 
-from app.modules.monitor.models import ReplyEvent
+from app.core.config import settings
+from app.modules.monitor.archive import list_partitions, naive_utc, partition_session
+from app.modules.monitor.models import LeadProfile, LeadProfileNote, ReplyEvent
+
+
+_DECAY_EPOCH = datetime(2020, 1, 1)
+_DECAY_FLOOR = 1e-6
+
+
+def _sql_log2(x):
+    return math.log2(x) if x is not None and x > 0 else None
+
+
+def _sql_pow(x, y):
+    try:
+        return math.pow(x, y)
+    except (OverflowError, TypeError, ValueError):
+        return None
+
+
+@event.listens_for(Engine, "connect")
+def _register_math_functions(dbapi_conn, _record) -> None:
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        dbapi_conn.create_function("log2", 1, _sql_log2, deterministic=True)
+        dbapi_conn.create_function("pow", 2, _sql_pow, deterministic=True)
 
 
 def log_reply_event(
@@ -21,25 +50,108 @@ def log_reply_event(
     latency_ms: int,
     llm_used: bool,
     meta: dict,
+    user_id: str = "",
 ) -> None:
+    now = datetime.utcnow()
     ev = ReplyEvent(
         kb_id=kb_id,
         kb_version=kb_version,
         comment_id=comment_id or "",
         note_id=note_id or "",
+        user_id=user_id or "",
         intent=intent,
         lead_score=int(lead_score),
         lead_level=lead_level,
         latency_ms=int(latency_ms),
         llm_used=bool(llm_used),
-        created_at=datetime.utcnow(),
+        created_at=now,
         meta_json=json.dumps(meta or {}, ensure_ascii=False),
     )
     session.add(ev)
+    if user_id:
+        _touch_lead_profile(session, user_id, note_id or "", int(lead_score), lead_level, now)
     session.commit()
 
 
-def overview(session: Session, since: Optional[datetime], until: Optional[datetime]) -> dict:
+def _decay_units(at: datetime) -> float:
+    return (at - _DECAY_EPOCH).total_seconds() / 3600.0 / max(settings.lead_decay_half_life_h, 1e-3)
+
+
+def decayed_score(decay_rank: float, now: Optional[datetime] = None) -> float:
+    value = 2.0 ** (decay_rank - _decay_units(now or datetime.utcnow()))
+    return value if value > _DECAY_FLOOR * 2 else 0.0
+
+
+def _touch_lead_profile(session: Session, user_id: str, note_id: str, score: int, level: str, at: datetime) -> None:
+    new_note = 1 if session.execute(
+        sqlite_insert(LeadProfileNote)
+        .values(user_id=user_id, note_id=note_id, max_score=score, last_seen_at=at)
+        .on_conflict_do_nothing()
+    ).rowcount else 0
+    if not new_note:
+        session.execute(
+            update(LeadProfileNote)
+            .where((LeadProfileNote.user_id == user_id) & (LeadProfileNote.note_id == note_id))
+            .values(max_score=func.max(LeadProfileNote.max_score, score), last_seen_at=at)
+        )
+
+    units = _decay_units(at)
+    gain = max(score, 0)
+    ins = sqlite_insert(LeadProfile).values(
+        user_id=user_id,
+        max_score=score,
+        decay_rank=math.log2(max(_DECAY_FLOOR + gain, _DECAY_FLOOR)) + units,
+        event_count=1,
+        note_count=1,
+        last_note_id=note_id,
+        last_level=level,
+        first_seen_at=at,
+        last_seen_at=at,
+    )
+    session.execute(
+        ins.on_conflict_do_update(
+            index_elements=[LeadProfile.user_id],
+            set_={
+                "max_score": func.max(LeadProfile.max_score, ins.excluded.max_score),
+                "decay_rank": func.log2(func.max(func.pow(2.0, LeadProfile.decay_rank - units) + gain, _DECAY_FLOOR)) + units,
+                "event_count": LeadProfile.event_count + 1,
+                "note_count": LeadProfile.note_count + new_note,
+                "last_note_id": ins.excluded.last_note_id,
+                "last_level": ins.excluded.last_level,
+                "last_seen_at": ins.excluded.last_seen_at,
+            },
+        )
+    )
+
+
+def top_lead_users(session: Session, limit: int, order: str = "max", min_notes: int = 1) -> List[dict]:
+    if order == "decayed":
+        order_by = [LeadProfile.decay_rank.desc()]
+    elif order == "max":
+        order_by = [LeadProfile.max_score.desc(), LeadProfile.last_seen_at.desc()]
+    else:
+        raise ValueError("invalid_lead_order")
+    stmt = select(LeadProfile).order_by(*order_by).limit(limit)
+    if min_notes > 1:
+        stmt = stmt.where(LeadProfile.note_count >= min_notes)
+    now = datetime.utcnow()
+    return [
+        {
+            "user_id": p.user_id,
+            "max_score": p.max_score,
+            "decayed_score": round(decayed_score(p.decay_rank, now), 3),
+            "event_count": p.event_count,
+            "note_count": p.note_count,
+            "last_note_id": p.last_note_id,
+            "last_level": p.last_level,
+            "first_seen_at": p.first_seen_at,
+            "last_seen_at": p.last_seen_at,
+        }
+        for p in session.exec(stmt)
+    ]
+
+
+def _overview_rows(session: Session, since: Optional[datetime], until: Optional[datetime]):
     from sqlalchemy import case
 
     filters = []
@@ -47,45 +159,42 @@ def overview(session: Session, since: Optional[datetime], until: Optional[dateti
         filters.append(ReplyEvent.created_at >= since)
     if until is not None:
         filters.append(ReplyEvent.created_at <= until)
+    return session.exec(
+        select(
+            ReplyEvent.lead_level,
+            ReplyEvent.intent,
+            func.count(),
+            func.sum(ReplyEvent.latency_ms),
+            func.sum(case((ReplyEvent.llm_used == True, 1), else_=0)),  # noqa: E712
+        )
+        .where(*filters)
+        .group_by(ReplyEvent.lead_level, ReplyEvent.intent)
+    ).all()
 
-    total = int(session.exec(select(func.count()).select_from(ReplyEvent).where(*filters)).one())
-    if total == 0:
-        return {
-            "total_replies": 0,
-            "avg_latency_ms": 0,
-            "llm_rate": 0.0,
-            "lead_high": 0,
-            "lead_medium": 0,
-            "lead_low": 0,
-            "intent_counts": {},
-            "generated_at": datetime.utcnow(),
-        }
-
-    avg_latency_raw = session.exec(select(func.avg(ReplyEvent.latency_ms)).where(*filters)).one()
-    avg_latency = int(float(avg_latency_raw or 0.0))
-
-    llm_rate_raw = session.exec(
-        select(func.avg(case((ReplyEvent.llm_used == True, 1), else_=0))).where(*filters)
-    ).one()
-    llm_rate = float(llm_rate_raw or 0.0)
 
-    lead_counts_rows = session.exec(
-        select(ReplyEvent.lead_level, func.count()).where(*filters).group_by(ReplyEvent.lead_level)
-    ).all()
-    lead_counts = {lvl: int(cnt) for (lvl, cnt) in lead_counts_rows}
-    lead_high = lead_counts.get("high", 0)
-    lead_medium = lead_counts.get("medium", 0)
-    lead_low = lead_counts.get("low", 0) + sum(v for k, v in lead_counts.items() if k not in {"high", "medium", "low"})
+def overview(session: Session, since: Optional[datetime], until: Optional[datetime]) -> dict:
+    since, until = naive_utc(since), naive_utc(until)
+    rows = list(_overview_rows(session, since, until))
+    for month in list_partitions("replyevent", since, until):
+        with partition_session("replyevent", month) as cold:
+            rows.extend(_overview_rows(cold, since, until))
 
-    intent_counts_rows = session.exec(select(ReplyEvent.intent, func.count()).where(*filters).group_by(ReplyEvent.intent)).all()
-    intent_counts = {it: int(cnt) for (it, cnt) in intent_counts_rows}
+    total = latency = llm = 0
+    lead_counts: Dict[str, int] = {}
+    intent_counts: Dict[str, int] = {}
+    for lead_level, intent, cnt, latency_sum, llm_sum in rows:
+        total += int(cnt)
+        latency += int(latency_sum or 0)
+        llm += int(llm_sum or 0)
+        lead_counts[lead_level] = lead_counts.get(lead_level, 0) + int(cnt)
+        intent_counts[intent] = intent_counts.get(intent, 0) + int(cnt)
     return {
         "total_replies": total,
-        "avg_latency_ms": avg_latency,
-        "llm_rate": llm_rate,
-        "lead_high": lead_high,
-        "lead_medium": lead_medium,
-        "lead_low": lead_low,
+        "avg_latency_ms": latency // total if total else 0,
+        "llm_rate": llm / total if total else 0.0,
+        "lead_high": lead_counts.get("high", 0),
+        "lead_medium": lead_counts.get("medium", 0),
+        "lead_low": lead_counts.get("low", 0) + sum(v for k, v in lead_counts.items() if k not in {"high", "medium", "low"}),
         "intent_counts": intent_counts,
         "generated_at": datetime.utcnow(),
     }
@@ -98,4 +207,9 @@ def note_top_leads(session: Session, note_id: str, limit: int) -> List[ReplyEven
         .order_by(ReplyEvent.lead_score.desc(), ReplyEvent.created_at.desc())
         .limit(limit)
     )
-    return list(session.exec(stmt))
+    rows = list(session.exec(stmt))
+    for month in list_partitions("replyevent"):
+        with partition_session("replyevent", month) as cold:
+            rows.extend(cold.exec(stmt).all())
+    rows.sort(key=lambda r: (r.lead_score, r.created_at), reverse=True)
+    return rows[:limit]
@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-
-import httpx
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.http import make_client, post_json
 
 
 @dataclass
@@ -17,21 +16,20 @@ class ChatResult:
 
 
 class GLMChatClient:
-    def __init__(self, api_key: str, base_url: str, model: str, timeout_s: float = 10.0):
+    def __init__(self, api_key: str, base_url: str, model: str, timeout_s: float = 10.0, max_retries: int = 2, max_connections: int = 20):
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self._http = make_client(timeout_s, max_connections)
 
     def chat(self, messages: List[Dict[str, Any]], temperature: float = 0.2) -> ChatResult:
         started = time.time()
         url = self.base_url + "/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         payload = {"model": self.model, "messages": messages, "temperature": temperature}
-        with httpx.Client(timeout=self.timeout_s) as client:
-            resp = client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        data = post_json(self._http, url, headers, payload, max_retries=self.max_retries)
         choices = data.get("choices") or []
         msg = (choices[0] or {}).get("message") if choices else {}
         content = (msg or {}).get("content") or ""
@@ -39,9 +37,25 @@ class GLMChatClient:
         return ChatResult(content=content, latency_ms=latency_ms, model=self.model)
 
 
+_chat_clients: Dict[Tuple[str, str, str], GLMChatClient] = {}
+
+
 def get_chat_client() -> Optional[GLMChatClient]:
     api_key = (settings.glm_api_key or "").strip()
     if not api_key:
         return None
-    return GLMChatClient(api_key=api_key, base_url=settings.glm_base_url, model=settings.glm_chat_model)
-
+    key = (api_key, settings.glm_base_url, settings.glm_chat_model)
+    client = _chat_clients.get(key)
+    if client is None:
+        client = _chat_clients.setdefault(
+            key,
+            GLMChatClient(
+                api_key=api_key,
+                base_url=settings.glm_base_url,
+                model=settings.glm_chat_model,
+                timeout_s=settings.glm_timeout_s,
+                max_retries=settings.glm_max_retries,
+                max_connections=settings.glm_max_connections,
+            ),
+        )
+    return client
@@ -3,6 +3,8 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
+from app.core.textnorm import normalize_text
+
 
 @dataclass(frozen=True)
 class IntentResult:
@@ -21,7 +23,7 @@ _QUESTION_RE = re.compile(r"(\?|？|怎么|如何|为何|为什么|能不能|可
 
 
 def detect_intent(text: str) -> IntentResult:
-    t = (text or "").strip()
+    t = normalize_text(text)
     if not t:
         return IntentResult(intent="empty", confidence=0.9, reasons=["empty_text"])
 
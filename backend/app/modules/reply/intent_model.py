@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.textnorm import normalize_batch
+from app.modules.reply.intent import IntentResult, detect_intent
+
+
+_REGEX_FALLBACK = "fallback"
+
+
+@dataclass
+class IntentModel:
+    labels: List[str]
+    centroids: np.ndarray
+    provider: str
+    model: str
+    counts: List[int]
+
+    @property
+    def dim(self) -> int:
+        return int(self.centroids.shape[1])
+
+    def predict(self, vectors: np.ndarray) -> List[Tuple[str, float, float]]:
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        sims = vectors.astype(np.float32) @ self.centroids.T
+        logits = sims / max(settings.intent_model_temperature, 1e-6)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = np.argmax(sims, axis=1)
+        rows = np.arange(sims.shape[0])
+        return [(self.labels[int(b)], float(p), float(s)) for b, p, s in zip(best, probs[rows, best], sims[rows, best])]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                labels=np.asarray(self.labels, dtype=np.str_),
+                centroids=self.centroids.astype(np.float32),
+                counts=np.asarray(self.counts, dtype=np.int64),
+                meta=np.asarray([json.dumps({"provider": self.provider, "model": self.model})], dtype=np.str_),
+            )
+
+    @staticmethod
+    def load(path: str) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"][0]))
+            return IntentModel(
+                labels=[str(x) for x in data["labels"]],
+                centroids=data["centroids"].astype(np.float32),
+                provider=meta["provider"],
+                model=meta["model"],
+                counts=[int(x) for x in data["counts"]],
+            )
+
+
+def train_intent_model(texts: Sequence[str], labels: Sequence[str], embedder=None, min_examples: int = 3) -> IntentModel:
+    from app.modules.vector.context import embed_comments
+    from app.modules.vector.embedding import _l2_normalize, get_embedding_client
+
+    if len(texts) != len(labels):
+        raise ValueError("invalid_training_data")
+    embedder = embedder or get_embedding_client()
+    counts = Counter(labels)
+    keep = sorted(lbl for lbl, n in counts.items() if n >= min_examples and lbl != "empty")
+    if len(keep) < 2:
+        raise ValueError("not_enough_labels")
+    label_idx = {lbl: i for i, lbl in enumerate(keep)}
+    rows = [i for i, lbl in enumerate(labels) if lbl in label_idx]
+    vectors = embed_comments([texts[i] for i in rows], embedder)
+    centroids = np.zeros((len(keep), vectors.shape[1]), dtype=np.float32)
+    np.add.at(centroids, np.asarray([label_idx[labels[i]] for i in rows]), vectors)
+    return IntentModel(
+        labels=keep,
+        centroids=_l2_normalize(centroids).astype(np.float32),
+        provider=embedder.provider,
+        model=embedder.model,
+        counts=[counts[lbl] for lbl in keep],
+    )
+
+
+_loaded: Dict[str, Tuple[int, IntentModel]] = {}
+_load_lock = threading.Lock()
+
+
+def get_intent_model() -> Optional[IntentModel]:
+    path = settings.intent_model_path
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _load_lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, IntentModel.load(path))
+            _loaded[path] = cached
+    model = cached[1]
+    from app.modules.vector.embedding import get_embedding_client
+
+    embedder = get_embedding_client()
+    if (model.provider, model.model) != (embedder.provider, embedder.model):
+        return None
+    return model
+
+
+def classify_intents(texts: Sequence[str], vectors: Optional[np.ndarray] = None) -> List[IntentResult]:
+    normalize_batch(list(texts))
+    results = [detect_intent(t) for t in texts]
+    model = get_intent_model()
+    if model is None:
+        return results
+    pending = [i for i, r in enumerate(results) if r.reasons == [_REGEX_FALLBACK]]
+    if not pending:
+        return results
+    if vectors is None:
+        from app.modules.vector.context import embed_comments
+
+        sub = embed_comments([texts[i] for i in pending])
+    else:
+        sub = vectors[pending]
+    if sub.shape[1] != model.dim:
+        return results
+    for i, (label, prob, sim) in zip(pending, model.predict(sub)):
+        if prob >= settings.intent_model_min_confidence and sim >= settings.intent_model_min_similarity:
+            results[i] = IntentResult(intent=label, confidence=round(prob, 3), reasons=["centroid", f"sim={sim:.2f}"])
+    return results
+
+
+def intent_classifier_version() -> str:
+    model = get_intent_model()
+    if model is None:
+        return "regex"
+    mtime = _loaded[settings.intent_model_path][0]
+    return (
+        f"centroid:{model.provider}/{model.model}:{mtime}:"
+        f"{settings.intent_model_temperature}:{settings.intent_model_min_confidence}:{settings.intent_model_min_similarity}"
+    )
+
+
+def _crawl_examples(limit: int) -> Tuple[List[str], List[str], Dict[str, str]]:
+    from app.modules.xhs.service import _detect_latest_files, _load_json
+
+    try:
+        _, comments_path = _detect_latest_files()
+    except FileNotFoundError:
+        return [], [], {}
+    rows = _load_json(comments_path)[:limit]
+    contents = [str(c.get("content") or "") for c in rows]
+    by_id = {str(c.get("comment_id") or ""): t for c, t in zip(rows, contents)}
+    texts: List[str] = []
+    labels: List[str] = []
+    normalize_batch(contents)
+    for t in contents:
+        r = detect_intent(t)
+        if t and r.reasons != [_REGEX_FALLBACK] and r.intent != "empty":
+            texts.append(t)
+            labels.append(r.intent)
+    return texts, labels, by_id
+
+
+def _event_examples(by_id: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    from sqlmodel import select
+
+    from app.core.db import session_scope
+    from app.modules.monitor.models import ReplyEvent
+
+    texts: List[str] = []
+    labels: List[str] = []
+    with session_scope() as session:
+        for comment_id, intent in session.exec(select(ReplyEvent.comment_id, ReplyEvent.intent)):
+            text = by_id.get(comment_id)
+            if text:
+                texts.append(text)
+                labels.append(intent)
+    return texts, labels
+
+
+def _file_examples(path: str) -> Tuple[List[str], List[str]]:
+    texts: List[str] = []
+    labels: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                texts.append(str(row["text"]))
+                labels.append(str(row["intent"]))
+    return texts, labels
+
+
+def _extend(dst: Tuple[List[str], List[str]], src: Iterable[Tuple[List[str], List[str]]]) -> None:
+    for texts, labels in src:
+        dst[0].extend(texts)
+        dst[1].extend(labels)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="离线训练意图质心分类器")
+    p.add_argument("--out", default=settings.intent_model_path or "./data/intent_model.npz")
+    p.add_argument("--labels", action="append", default=[], help="JSONL：每行 {\"text\": ..., \"intent\": ...}")
+    p.add_argument("--crawl-limit", type=int, default=50000, help="参与弱标注的爬取评论上限，0 表示不用爬取数据")
+    p.add_argument("--min-examples", type=int, default=3)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    data: Tuple[List[str], List[str]] = ([], [])
+    crawl_texts, crawl_labels, by_id = _crawl_examples(args.crawl_limit) if args.crawl_limit > 0 else ([], [], {})
+    _extend(data, [(crawl_texts, crawl_labels), _event_examples(by_id)])
+    _extend(data, [_file_examples(p) for p in args.labels])
+    model = train_intent_model(data[0], data[1], min_examples=args.min_examples)
+    model.save(args.out)
+    print(json.dumps({"out": args.out, "examples": len(data[0]), "labels": dict(zip(model.labels, model.counts))}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
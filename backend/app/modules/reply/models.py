@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ReplyRefinement(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    status: str = "pending"
+    reply: str = ""
+    meta_json: str = "{}"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
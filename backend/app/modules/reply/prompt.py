@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.modules.kb.chunking import count_tokens
+
+
+INTENT_KNOWLEDGE_BUDGETS = {
+    "praise": 120,
+    "empty": 0,
+    "chat": 200,
+    "complaint": 400,
+    "buy_intent": 500,
+    "question": 600,
+    "after_sales": 600,
+}
+
+_SYSTEM_PROMPT = (
+    "你是评论区的客服兼销售助理，语气自然礼貌，回复短而明确。"
+    "不要编造事实；如果知识不足，就先澄清问题。"
+    "不要输出任何手机号/微信号/外链。"
+)
+
+
+@dataclass
+class BuiltPrompt:
+    messages: List[Dict[str, Any]]
+    prompt_tokens: int
+    knowledge_tokens: int
+    used_hits: List[dict] = field(default_factory=list)
+    deduped: int = 0
+    trimmed: int = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "knowledge_tokens": self.knowledge_tokens,
+            "knowledge_used": len(self.used_hits),
+            "knowledge_deduped": self.deduped,
+            "knowledge_trimmed": self.trimmed,
+        }
+
+
+def _shingles(text: str, n: int = 3) -> set[str]:
+    t = "".join((text or "").split())
+    if len(t) <= n:
+        return {t} if t else set()
+    return {t[i : i + n] for i in range(len(t) - n + 1)}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _hit_tokens(hit: dict) -> int:
+    return int(hit.get("token_count") or 0) or count_tokens(hit.get("content") or "")
+
+
+def dedupe_hits(hits: List[dict], threshold: float) -> tuple[List[dict], int]:
+    kept: List[dict] = []
+    kept_shingles: List[set[str]] = []
+    dropped = 0
+    for h in sorted(hits, key=lambda x: x.get("score", 0.0), reverse=True):
+        sh = _shingles(h.get("content") or "")
+        if any(_jaccard(sh, other) >= threshold for other in kept_shingles):
+            dropped += 1
+            continue
+        kept.append(h)
+        kept_shingles.append(sh)
+    return kept, dropped
+
+
+def pack_hits(hits: List[dict], budget_tokens: int) -> tuple[List[dict], int]:
+    packed: List[dict] = []
+    used = 0
+    for h in hits:
+        n = _hit_tokens(h)
+        if used + n > budget_tokens:
+            continue
+        packed.append(h)
+        used += n
+    return packed, used
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    t = (text or "").strip()
+    if count_tokens(t) <= max_tokens:
+        return t
+    lo, hi = 0, len(t)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(t[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return t[:lo].rstrip() + "…"
+
+
+def knowledge_budget(intent: str) -> int:
+    return min(INTENT_KNOWLEDGE_BUDGETS.get(intent, settings.reply_knowledge_budget_tokens), settings.reply_knowledge_budget_tokens)
+
+
+def build_reply_prompt(
+    comment_text: str,
+    note_title: str,
+    note_desc: str,
+    intent: str,
+    knowledge_hits: List[dict],
+    inject_sales: bool,
+) -> BuiltPrompt:
+    unique, deduped = dedupe_hits(knowledge_hits, settings.reply_dedupe_threshold)
+    packed, knowledge_tokens = pack_hits(unique, knowledge_budget(intent))
+    knowledge_block = "\n\n".join([f"- {h['content']}" for h in packed])
+    sales_hint = ""
+    if inject_sales and intent in {"buy_intent", "question"}:
+        sales_hint = "如果对方表现出购买/咨询意向，用不冒犯的方式引导私信或继续提问，避免硬广。"
+
+    user = (
+        f"帖子标题：{_truncate_tokens(note_title, 60)}\n"
+        f"帖子内容：{_truncate_tokens(note_desc, settings.reply_note_desc_tokens)}\n"
+        f"评论：{comment_text}\n\n"
+        f"可用知识（可能为空）：\n{knowledge_block}\n\n"
+        f"意图：{intent}\n"
+        f"额外要求：{sales_hint}\n"
+        "请输出一条最合适的中文回复。"
+    )
+    return BuiltPrompt(
+        messages=[{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": user}],
+        prompt_tokens=count_tokens(_SYSTEM_PROMPT) + count_tokens(user),
+        knowledge_tokens=knowledge_tokens,
+        used_hits=packed,
+        deduped=deduped,
+        trimmed=len(unique) - len(packed),
+    )
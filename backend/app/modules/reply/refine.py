@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.modules.reply.models import ReplyRefinement
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Refinement:
+    id: str
+    status: str = "pending"
+    reply: str = ""
+    meta: Dict[str, int] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+_refinements: "OrderedDict[str, Refinement]" = OrderedDict()
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, settings.reply_refine_workers), thread_name_prefix="reply-refine")
+        return _executor
+
+
+def _persist(engine: Any, ref: Refinement) -> None:
+    with Session(engine) as session:
+        row = session.get(ReplyRefinement, ref.id) or ReplyRefinement(id=ref.id, created_at=ref.created_at)
+        row.status = ref.status
+        row.reply = ref.reply
+        row.meta_json = json.dumps(ref.meta, ensure_ascii=False)
+        row.finished_at = ref.finished_at
+        session.add(row)
+        session.commit()
+
+
+def _run(ref: Refinement, fn: Callable[[], Tuple[str, Dict[str, int]]], engine: Any) -> None:
+    result = Refinement(id=ref.id, created_at=ref.created_at)
+    try:
+        result.reply, result.meta = fn()
+        result.status = "done"
+    except Exception:
+        logger.exception("reply refinement %s failed", ref.id)
+        result.status = "failed"
+    result.finished_at = datetime.utcnow()
+    if engine is not None:
+        try:
+            _persist(engine, result)
+        except Exception:
+            logger.exception("persisting reply refinement %s failed", ref.id)
+    ref.reply, ref.meta, ref.finished_at, ref.status = result.reply, result.meta, result.finished_at, result.status
+
+
+def submit_refinement(fn: Callable[[], Tuple[str, Dict[str, int]]], engine: Any = None) -> str:
+    ref = Refinement(id=uuid4().hex)
+    if engine is not None:
+        _persist(engine, ref)
+    with _lock:
+        _refinements[ref.id] = ref
+        while len(_refinements) > max(1, settings.reply_refine_max_entries):
+            _refinements.popitem(last=False)
+    _pool().submit(_run, ref, fn, engine)
+    return ref.id
+
+
+def get_refinement(refinement_id: str, session: Optional[Session] = None) -> Optional[Refinement]:
+    with _lock:
+        ref = _refinements.get(refinement_id)
+    if ref is not None or session is None:
+        return ref
+    row = session.get(ReplyRefinement, refinement_id)
+    if row is None:
+        return None
+    return Refinement(
+        id=row.id,
+        status=row.status,
+        reply=row.reply,
+        meta=json.loads(row.meta_json or "{}"),
+        created_at=row.created_at,
+        finished_at=row.finished_at,
+    )
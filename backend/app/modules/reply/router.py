@@ -5,8 +5,8 @@ from sqlmodel import Session
 
 from app.core.db import get_session
 from app.modules.kb.service import get_kb
-from app.modules.reply.schemas import ReplyRequest, ReplyResponse
-from app.modules.reply.service import suggest_reply
+from app.modules.reply.refine import get_refinement
+from app.modules.reply.schemas import RefinementRead, ReplyRequest, ReplyResponse
 
 
 router = APIRouter(tags=["reply"])
@@ -14,19 +14,45 @@ router = APIRouter(tags=["reply"])
 
 @router.post("/reply/suggest", response_model=ReplyResponse)
 def reply_suggest(payload: ReplyRequest, session: Session = Depends(get_session)):
+    from app.modules.reply.service import suggest_reply
+    from app.modules.vector.filters import SearchFilter
+    from app.modules.vector.service import KbTarget
+
     kb = get_kb(session, payload.kb_id)
     if not kb:
         raise HTTPException(status_code=404, detail="kb_not_found")
+    for extra in payload.kbs:
+        if not get_kb(session, extra.kb_id):
+            raise HTTPException(status_code=404, detail="kb_not_found")
     result = suggest_reply(
         session=session,
         kb_id=payload.kb_id,
         comment_id=payload.comment.comment_id,
         note_id=payload.comment.note_id,
+        user_id=payload.comment.user_id,
         comment_text=payload.comment.content,
         note_title=payload.comment.note_title,
         note_desc=payload.comment.note_desc,
         top_k=payload.top_k,
         kb_version=payload.kb_version,
         inject_sales=payload.inject_sales,
+        extra_kbs=[KbTarget(kb_id=k.kb_id, weight=k.weight, kb_version=k.kb_version) for k in payload.kbs],
+        filters=SearchFilter(tags=tuple(payload.tags), item_ids=tuple(payload.item_ids)),
+        refine_async=payload.refine_async,
     )
     return result
+
+
+@router.get("/reply/refinements/{refinement_id}", response_model=RefinementRead)
+def reply_refinement(refinement_id: str, session: Session = Depends(get_session)):
+    ref = get_refinement(refinement_id, session)
+    if not ref:
+        raise HTTPException(status_code=404, detail="refinement_not_found")
+    return RefinementRead(
+        id=ref.id,
+        status=ref.status,
+        reply=ref.reply,
+        meta=ref.meta,
+        created_at=ref.created_at,
+        finished_at=ref.finished_at,
+    )
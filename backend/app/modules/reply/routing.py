@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+from app.modules.reply.intent import IntentResult
+
+
+ROUTE_TEMPLATE = "template"
+ROUTE_KNOWLEDGE = "knowledge"
+ROUTE_LLM = "llm"
+
+_KNOWLEDGE_FIRST_INTENTS = {"question", "buy_intent"}
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    route: str
+    reason: str
+
+
+def _template_intents() -> set[str]:
+    return {p.strip() for p in settings.reply_template_intents.split(",") if p.strip()}
+
+
+def needs_retrieval(intent: IntentResult) -> bool:
+    return intent.intent not in _template_intents()
+
+
+def decide_route(intent: IntentResult, hits: Optional[List[dict]], llm_available: bool) -> RouteDecision:
+    if intent.intent in _template_intents():
+        return RouteDecision(ROUTE_TEMPLATE, "template_intent")
+
+    top_score = float(hits[0].get("raw_score", hits[0]["score"])) if hits else 0.0
+    if intent.intent in _KNOWLEDGE_FIRST_INTENTS and top_score >= settings.reply_knowledge_direct_score:
+        return RouteDecision(ROUTE_KNOWLEDGE, "strong_knowledge_hit")
+    if llm_available and intent.confidence >= settings.reply_llm_min_confidence:
+        return RouteDecision(ROUTE_LLM, "llm_intent")
+    if intent.intent in _KNOWLEDGE_FIRST_INTENTS and top_score >= settings.reply_knowledge_min_score:
+        return RouteDecision(ROUTE_KNOWLEDGE, "knowledge_hit")
+    if llm_available:
+        return RouteDecision(ROUTE_TEMPLATE, "low_confidence")
+    return RouteDecision(ROUTE_TEMPLATE, "no_llm")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -17,12 +17,22 @@ class CommentInput(BaseModel):
     content: str = Field(default="", description="评论内容")
 
 
+class ReplyKb(BaseModel):
+    kb_id: UUID
+    weight: float = Field(default=1.0, gt=0, le=10)
+    kb_version: Optional[int] = None
+
+
 class ReplyRequest(BaseModel):
     kb_id: UUID
     comment: CommentInput
     top_k: int = Field(default=5, ge=1, le=20)
     kb_version: Optional[int] = None
     inject_sales: bool = True
+    kbs: List[ReplyKb] = Field(default_factory=list, max_length=16, description="额外参与联合检索的知识库及权重")
+    tags: List[str] = Field(default_factory=list, description="只用带任一标签的知识，如 物流")
+    item_ids: List[UUID] = Field(default_factory=list)
+    refine_async: bool = Field(default=False, description="先返回模板回复，LLM 回复通过 refinement_id 异步获取")
 
 
 class UsedKnowledge(BaseModel):
@@ -30,6 +40,8 @@ class UsedKnowledge(BaseModel):
     revision_id: UUID
     score: float
     content: str
+    token_count: int = 0
+    kb_id: Optional[UUID] = None
 
 
 class ReplyResponse(BaseModel):
@@ -46,3 +58,14 @@ class ReplyResponse(BaseModel):
     latency_ms: int
     created_at: datetime
     meta_json: str = ""
+    route: str = ""
+    refinement_id: Optional[str] = None
+
+
+class RefinementRead(BaseModel):
+    id: str
+    status: str
+    reply: str
+    meta: Dict[str, int]
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -3,18 +3,39 @@ from __future__ import annotations
 import json
 import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
+import httpx
 from sqlmodel import Session
 
+from app.core.textnorm import normalize_text
+from app.modules.kb.chunking import split_sentences
 from app.modules.reply.glm_chat import get_chat_client
-from app.modules.reply.intent import detect_intent
+from app.modules.reply.intent_model import classify_intents, get_intent_model
 from app.modules.reply.policy import enforce_style, redact_sensitive
+from app.modules.reply.prompt import build_reply_prompt
+from app.modules.reply.refine import submit_refinement
+from app.modules.reply.routing import ROUTE_KNOWLEDGE, ROUTE_LLM, ROUTE_TEMPLATE, RouteDecision, decide_route, needs_retrieval
 from app.modules.reply.templates import FALLBACK_TEMPLATES
 from app.modules.leads.service import score_lead
 from app.modules.monitor.service import log_reply_event
-from app.modules.vector.service import get_latest_index, search as vector_search
+from app.modules.vector.context import comment_query_vectors, embed_comments
+from app.modules.vector.filters import SearchFilter
+from app.modules.vector.service import KbTarget, federated_search, get_latest_index, search as vector_search
+
+
+_REPLY_MAX_LEN = 160
+
+
+def _knowledge_reply(content: str, max_len: int = _REPLY_MAX_LEN) -> Optional[str]:
+    out = ""
+    for sent in split_sentences(content or ""):
+        sep = " " if out and out[-1].isascii() and sent[0].isascii() else ""
+        if len(out) + len(sep) + len(sent) > max_len:
+            break
+        out += sep + sent
+    return out or None
 
 
 def suggest_reply(
@@ -28,37 +49,74 @@ def suggest_reply(
     top_k: int,
     kb_version: Optional[int],
     inject_sales: bool,
+    extra_kbs: Optional[List[KbTarget]] = None,
+    filters: Optional[SearchFilter] = None,
+    refine_async: bool = False,
+    user_id: str = "",
 ) -> dict:
     started = time.time()
-    intent = detect_intent(comment_text)
+    comment_vectors = embed_comments([comment_text]) if get_intent_model() is not None else None
+    intent = classify_intents([comment_text], comment_vectors)[0]
     lead = score_lead(comment_text)
 
-    latency_retrieval, hits = vector_search(
-        session,
-        kb_id=kb_id,
-        query=_build_query(note_title, note_desc, comment_text, intent.intent),
-        top_k=top_k,
-        kb_version=kb_version,
-    )
+    llm_available = get_chat_client() is not None
+    latency_retrieval, hits = 0, []
+    if needs_retrieval(intent):
+        query = normalize_text(comment_text)
+        query_vector = comment_query_vectors(note_id, note_title, note_desc, [comment_text], comment_vectors)[0]
+        if extra_kbs:
+            targets = list(extra_kbs)
+            if all(t.kb_id != kb_id for t in targets):
+                targets.insert(0, KbTarget(kb_id=kb_id, kb_version=kb_version))
+            latency_retrieval, hits = federated_search(
+                session, targets=targets, query=query, top_k=top_k, filters=filters, query_vector=query_vector
+            )
+        else:
+            latency_retrieval, hits = vector_search(
+                session, kb_id=kb_id, query=query, top_k=top_k, kb_version=kb_version, filters=filters, query_vector=query_vector
+            )
     idx = get_latest_index(session, kb_id, kb_version)
     used_version = kb_version if kb_version is not None else (idx.kb_version if idx else 0)
 
-    reply_text = _generate_reply(
-        comment_text=comment_text,
-        note_title=note_title,
-        note_desc=note_desc,
-        intent=intent.intent,
-        knowledge_hits=hits,
-        inject_sales=inject_sales,
-    )
-    reply_text = enforce_style(redact_sensitive(reply_text))
+    decision = decide_route(intent, hits, llm_available)
+    prompt_stats: Dict[str, int] = {}
+    refinement_id: Optional[str] = None
+    knowledge_text = _knowledge_reply(hits[0]["content"]) if decision.route == ROUTE_KNOWLEDGE else None
+    if decision.route == ROUTE_KNOWLEDGE and knowledge_text is None:
+        decision = RouteDecision(ROUTE_TEMPLATE, "knowledge_too_long")
+    if knowledge_text is not None:
+        reply_text = knowledge_text
+    elif decision.route == ROUTE_LLM and refine_async:
+        reply_text = FALLBACK_TEMPLATES.get(intent.intent, FALLBACK_TEMPLATES["chat"])
+        refinement_id = submit_refinement(
+            lambda: _refine_reply(comment_text, note_title, note_desc, intent.intent, list(hits), inject_sales),
+            engine=session.get_bind(),
+        )
+    elif decision.route == ROUTE_LLM:
+        reply_text, prompt_stats = _generate_reply(
+            comment_text=comment_text,
+            note_title=note_title,
+            note_desc=note_desc,
+            intent=intent.intent,
+            knowledge_hits=hits,
+            inject_sales=inject_sales,
+        )
+    else:
+        reply_text = FALLBACK_TEMPLATES.get(intent.intent, FALLBACK_TEMPLATES["chat"])
+    reply_text = enforce_style(redact_sensitive(reply_text), max_len=_REPLY_MAX_LEN)
 
     latency_ms = int((time.time() - started) * 1000)
     meta_json = json.dumps(
-        {"retrieval_ms": latency_retrieval, "intent_reasons": intent.reasons},
+        {
+            "retrieval_ms": latency_retrieval,
+            "intent_reasons": intent.reasons,
+            "route": decision.route,
+            "route_reason": decision.reason,
+            **prompt_stats,
+        },
         ensure_ascii=False,
     )
-    llm_used = bool(get_chat_client())
+    llm_used = decision.route == ROUTE_LLM and refinement_id is None
     log_reply_event(
         session=session,
         kb_id=kb_id,
@@ -70,7 +128,14 @@ def suggest_reply(
         lead_level=lead.level,
         latency_ms=latency_ms,
         llm_used=llm_used,
-        meta={"retrieval_ms": latency_retrieval},
+        user_id=user_id,
+        meta={
+            "retrieval_ms": latency_retrieval,
+            "route": decision.route,
+            "refine_async": refinement_id is not None,
+            "refinement_id": refinement_id,
+            **prompt_stats,
+        },
     )
     return {
         "kb_id": kb_id,
@@ -86,13 +151,21 @@ def suggest_reply(
         "latency_ms": latency_ms,
         "created_at": datetime.utcnow(),
         "meta_json": meta_json,
+        "route": decision.route,
+        "refinement_id": refinement_id,
     }
 
 
-def _build_query(note_title: str, note_desc: str, comment_text: str, intent: str) -> str:
-    parts = [p.strip() for p in [note_title, note_desc, comment_text] if (p or "").strip()]
-    base = "\n".join(parts[:3])
-    return f"[意图]{intent}\n{base}"
+def _refine_reply(
+    comment_text: str,
+    note_title: str,
+    note_desc: str,
+    intent: str,
+    knowledge_hits: List[dict],
+    inject_sales: bool,
+) -> tuple[str, Dict[str, int]]:
+    reply_text, stats = _generate_reply(comment_text, note_title, note_desc, intent, knowledge_hits, inject_sales)
+    return enforce_style(redact_sensitive(reply_text)), stats
 
 
 def _generate_reply(
@@ -102,29 +175,21 @@ def _generate_reply(
     intent: str,
     knowledge_hits: List[dict],
     inject_sales: bool,
-) -> str:
+) -> tuple[str, Dict[str, int]]:
     client = get_chat_client()
     if not client:
-        return FALLBACK_TEMPLATES.get(intent, FALLBACK_TEMPLATES["chat"])
+        return FALLBACK_TEMPLATES.get(intent, FALLBACK_TEMPLATES["chat"]), {}
 
-    knowledge_block = "\n\n".join([f"- {h['content']}" for h in knowledge_hits[:5]])
-    sales_hint = ""
-    if inject_sales and intent in {"buy_intent", "question"}:
-        sales_hint = "如果对方表现出购买/咨询意向，用不冒犯的方式引导私信或继续提问，避免硬广。"
-
-    system = (
-        "你是评论区的客服兼销售助理，语气自然礼貌，回复短而明确。"
-        "不要编造事实；如果知识不足，就先澄清问题。"
-        "不要输出任何手机号/微信号/外链。"
-    )
-    user = (
-        f"帖子标题：{note_title}\n"
-        f"帖子内容：{note_desc}\n"
-        f"评论：{comment_text}\n\n"
-        f"可用知识（可能为空）：\n{knowledge_block}\n\n"
-        f"意图：{intent}\n"
-        f"额外要求：{sales_hint}\n"
-        "请输出一条最合适的中文回复。"
+    prompt = build_reply_prompt(
+        comment_text=comment_text,
+        note_title=note_title,
+        note_desc=note_desc,
+        intent=intent,
+        knowledge_hits=knowledge_hits,
+        inject_sales=inject_sales,
     )
-    result = client.chat(messages=[{"role": "system", "content": system}, {"role": "user", "content": user}], temperature=0.3)
-    return result.content.strip() or FALLBACK_TEMPLATES.get(intent, FALLBACK_TEMPLATES["chat"])
+    try:
+        result = client.chat(messages=prompt.messages, temperature=0.3)
+    except httpx.HTTPError:
+        return FALLBACK_TEMPLATES.get(intent, FALLBACK_TEMPLATES["chat"]), prompt.stats()
+    return result.content.strip() or FALLBACK_TEMPLATES.get(intent, FALLBACK_TEMPLATES["chat"]), prompt.stats()
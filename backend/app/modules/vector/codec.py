@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+CODEC_F32 = "f32"
+CODEC_F16 = "f16"
+CODEC_INT8 = "int8"
+CODECS = (CODEC_F32, CODEC_F16, CODEC_INT8)
+_DTYPES = {CODEC_F32: np.float32, CODEC_F16: np.float16, CODEC_INT8: np.int8}
+
+
+def check_codec(codec: str) -> str:
+    c = (codec or CODEC_F32).strip().lower()
+    if c not in CODECS:
+        raise ValueError("invalid_vector_codec")
+    return c
+
+
+def codec_of_dtype(dtype: np.dtype) -> str:
+    for codec, dt in _DTYPES.items():
+        if np.dtype(dt) == np.dtype(dtype):
+            return codec
+    raise ValueError("invalid_vector_codec")
+
+
+def bytes_per_vector(dim: int, codec: str) -> int:
+    return int(dim) * np.dtype(_DTYPES[check_codec(codec)]).itemsize
+
+
+@dataclass
+class Codes:
+    codec: str
+    data: np.ndarray
+    scale: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        return int(self.data.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.data.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes) + (int(self.scale.nbytes) if self.scale is not None else 0)
+
+
+def int8_scale(vectors: np.ndarray) -> np.ndarray:
+    peak = np.abs(vectors).max(axis=0) if vectors.size else np.ones(vectors.shape[1], dtype=np.float32)
+    return np.clip(peak / 127.0, 1e-12, None).astype(np.float32)
+
+
+def encode(vectors: np.ndarray, codec: str, scale: Optional[np.ndarray] = None) -> Codes:
+    codec = check_codec(codec)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if codec == CODEC_INT8:
+        scale = int8_scale(vectors) if scale is None else scale
+        data = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        return Codes(codec=codec, data=data, scale=scale)
+    return Codes(codec=codec, data=vectors.astype(_DTYPES[codec], copy=False))
+
+
+def decode(codes: Codes) -> np.ndarray:
+    out = np.asarray(codes.data, dtype=np.float32)
+    if codes.scale is not None:
+        out = out * codes.scale
+    return out
+
+
+def scores(codes: Codes, query: np.ndarray, block_rows: int = 2048) -> np.ndarray:
+    q = np.asarray(query, dtype=np.float32).reshape(-1)
+    if codes.scale is not None:
+        q = q * codes.scale
+    if codes.codec == CODEC_F32:
+        return np.asarray(codes.data @ q, dtype=np.float32)
+    out = np.empty(codes.size, dtype=np.float32)
+    for start in range(0, codes.size, block_rows):
+        block = codes.data[start : start + block_rows]
+        np.matmul(block.astype(np.float32), q, out=out[start : start + block.shape[0]])
+    return out
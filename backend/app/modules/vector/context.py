@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.textnorm import normalize_batch
+from app.modules.vector.embedding import EmbeddingClient, _l2_normalize, get_embedding_client
+
+
+_note_cache: "OrderedDict[Tuple[str, str, str, str], np.ndarray]" = OrderedDict()
+_note_lock = threading.Lock()
+
+
+def note_context_text(note_title: str, note_desc: str) -> str:
+    return "\n".join(p for p in normalize_batch([note_title, note_desc]) if p)
+
+
+def _note_key(embedder: EmbeddingClient, note_id: str, context: str) -> Tuple[str, str, str, str]:
+    digest = hashlib.blake2b(context.encode("utf-8"), digest_size=8).hexdigest()
+    return (embedder.provider, embedder.model, note_id or digest, digest)
+
+
+def note_vector(note_id: str, note_title: str, note_desc: str, embedder: Optional[EmbeddingClient] = None) -> Optional[np.ndarray]:
+    context = note_context_text(note_title, note_desc)
+    if not context:
+        return None
+    embedder = embedder or get_embedding_client()
+    key = _note_key(embedder, note_id, context)
+    with _note_lock:
+        vec = _note_cache.get(key)
+        if vec is not None:
+            _note_cache.move_to_end(key)
+            return vec
+    vec = embedder.embed([context])[0]
+    with _note_lock:
+        _note_cache[key] = vec
+        while len(_note_cache) > max(1, settings.note_context_cache_size):
+            _note_cache.popitem(last=False)
+    return vec
+
+
+def combine_query_vectors(comment_vectors: np.ndarray, note_vec: Optional[np.ndarray], note_weight: Optional[float] = None) -> np.ndarray:
+    if note_vec is None:
+        return comment_vectors
+    w = settings.reply_note_context_weight if note_weight is None else note_weight
+    w = min(max(float(w), 0.0), 1.0)
+    mixed = (1.0 - w) * comment_vectors.astype(np.float32) + w * note_vec.astype(np.float32).reshape(1, -1)
+    return _l2_normalize(mixed).astype(np.float32)
+
+
+def embed_comments(comments: Sequence[str], embedder: Optional[EmbeddingClient] = None) -> np.ndarray:
+    embedder = embedder or get_embedding_client()
+    return embedder.embed([t or " " for t in normalize_batch(list(comments))])
+
+
+def comment_query_vectors(
+    note_id: str,
+    note_title: str,
+    note_desc: str,
+    comments: Sequence[str],
+    comment_vectors: Optional[np.ndarray] = None,
+) -> List[np.ndarray]:
+    if not comments:
+        return []
+    embedder = get_embedding_client()
+    vectors = comment_vectors if comment_vectors is not None else embed_comments(comments, embedder)
+    return list(combine_query_vectors(vectors, note_vector(note_id, note_title, note_desc, embedder)))
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import hashlib
 import os
-import time
-from dataclasses import dataclass
-from typing import List
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 import numpy as np
 
 from app.core.config import settings
+from app.core.http import make_client, post_json
 
 
 class EmbeddingClient:
@@ -26,20 +30,124 @@ def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
     return vectors / norms
 
 
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+|[\u4e00-\u9fff]")
+
+
+def _text_seed(text: str) -> int:
+    h = hashlib.blake2b(text.encode("utf-8", errors="ignore"), digest_size=8).digest()
+    return int.from_bytes(h, "big", signed=False)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def _seeded_vectors(seeds: np.ndarray, dim: int, block_rows: int = 8192) -> np.ndarray:
+    words = -(-dim // 4)
+    counters = (np.arange(1, words + 1, dtype=np.uint64) * _GOLDEN).reshape(1, -1)
+    seeds = seeds.astype(np.uint64).reshape(-1, 1)
+    out = np.empty((seeds.shape[0], dim), dtype=np.float32)
+    with np.errstate(over="ignore"):
+        for start in range(0, seeds.shape[0], block_rows):
+            bits = _splitmix64(seeds[start : start + block_rows] ^ counters)
+            halves = bits.view(np.int16)[:, :dim]
+            np.multiply(halves, np.float32(1.0 / 32768.0), out=out[start : start + block_rows])
+    return out
+
+
+def _hash_vectors(texts: List[str], dim: int) -> np.ndarray:
+    seeds = np.fromiter((_text_seed(t) for t in texts), dtype=np.uint64, count=len(texts))
+    return _seeded_vectors(seeds, dim)
+
+
+def _ngram_vectors(texts: List[str], dim: int, block_floats: int = 1 << 25) -> np.ndarray:
+    token_ids: Dict[str, int] = {}
+    lookup = token_ids.setdefault
+    cols: List[int] = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for i, t in enumerate(texts):
+        ids = [lookup("\x00" + t, len(token_ids))]
+        ids.extend([lookup(tok, len(token_ids)) for tok in _TOKEN_RE.findall(t.lower())])
+        cols.extend(ids)
+        lengths[i] = len(ids)
+    pad = len(token_ids)
+    token_vectors = np.concatenate([_hash_vectors(list(token_ids), dim), np.zeros((1, dim), dtype=np.float32)])
+    width = int(lengths.max())
+    padded = np.full((len(texts), width), pad, dtype=np.int64)
+    padded[np.arange(width).reshape(1, -1) < lengths.reshape(-1, 1)] = np.asarray(cols, dtype=np.int64)
+    block_rows = max(1, block_floats // (width * dim))
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for first in range(0, len(texts), block_rows):
+        out[first : first + block_rows] = token_vectors[padded[first : first + block_rows]].sum(axis=1)
+    return out
+
+
+def _embed_batch(texts: List[str], dim: int, mode: str) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+    if mode == "ngram":
+        return _l2_normalize(_ngram_vectors(texts, dim)).astype(np.float32)
+    return _l2_normalize(_hash_vectors(texts, dim)).astype(np.float32)
+
+
 @dataclass
 class MockHashEmbeddingClient(EmbeddingClient):
     dim: int = 384
     provider: str = "mock"
-    model: str = "hash-v1"
+    model: str = ""
+    mode: str = "hash"
+    workers: int = 0
+    parallel_min_batch: int = 20000
+    cache_size: int = 4096
+    _cache: "OrderedDict[str, np.ndarray]" = field(default_factory=OrderedDict, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.mode not in {"hash", "ngram"}:
+            raise ValueError("invalid_mock_embed_mode")
+        if not self.model:
+            self.model = "hash-v2" if self.mode == "hash" else "ngram-v1"
 
     def embed(self, texts: List[str]) -> np.ndarray:
+        if self.cache_size <= 0 or len(texts) > self.cache_size:
+            return self._embed_uncached(texts)
+
         vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
-        for i, t in enumerate(texts):
-            h = hashlib.sha256(t.encode("utf-8", errors="ignore")).digest()
-            seed = int.from_bytes(h[:8], "big", signed=False)
-            rng = np.random.default_rng(seed)
-            vectors[i] = rng.standard_normal(self.dim).astype(np.float32)
-        return _l2_normalize(vectors)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, t in enumerate(texts):
+                cached = self._cache.get(t)
+                if cached is None:
+                    missing.setdefault(t, []).append(i)
+                else:
+                    self._cache.move_to_end(t)
+                    vectors[i] = cached
+        if missing:
+            miss_texts = list(missing)
+            computed = self._embed_uncached(miss_texts)
+            with self._lock:
+                for t, vec in zip(miss_texts, computed):
+                    for i in missing[t]:
+                        vectors[i] = vec
+                    self._cache[t] = vec
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return vectors
+
+    def _embed_uncached(self, texts: List[str]) -> np.ndarray:
+        if self.workers <= 1 or len(texts) < self.parallel_min_batch:
+            return _embed_batch(texts, self.dim, self.mode)
+        step = -(-len(texts) // self.workers)
+        parts = [texts[i : i + step] for i in range(0, len(texts), step)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(_embed_batch, parts, [self.dim] * len(parts), [self.mode] * len(parts)))
+        return np.concatenate(results, axis=0)
 
 
 @dataclass
@@ -49,30 +157,57 @@ class GLMEmbeddingClient(EmbeddingClient):
     model: str
     provider: str = "glm"
     timeout_s: float = 8.0
+    max_retries: int = 2
+    max_connections: int = 20
+    dim: Optional[int] = field(default=None, init=False, compare=False)
+    _http: httpx.Client = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._http = make_client(self.timeout_s, self.max_connections)
 
     def embed(self, texts: List[str]) -> np.ndarray:
-        started = time.time()
         headers = {"Authorization": f"Bearer {self.api_key}"}
         payload = {"model": self.model, "input": texts}
         url = self.base_url.rstrip("/") + "/embeddings"
-        with httpx.Client(timeout=self.timeout_s) as client:
-            resp = client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        data = post_json(self._http, url, headers, payload, max_retries=self.max_retries)
         vectors = [row["embedding"] for row in data.get("data", [])]
         arr = np.asarray(vectors, dtype=np.float32)
         if arr.ndim != 2 or arr.shape[0] != len(texts):
             raise RuntimeError("invalid_embedding_response")
-        arr = _l2_normalize(arr)
-        _ = started
-        return arr
+        self.dim = int(arr.shape[1])
+        return _l2_normalize(arr)
+
+
+_glm_clients: Dict[Tuple[str, str, str, float], GLMEmbeddingClient] = {}
+_mock_clients: Dict[Tuple[int, str, int], MockHashEmbeddingClient] = {}
 
 
 def get_embedding_client() -> EmbeddingClient:
     api_key = (settings.glm_api_key or "").strip()
     if api_key:
-        return GLMEmbeddingClient(api_key=api_key, base_url=settings.glm_base_url, model=settings.glm_embed_model)
+        glm_key = (api_key, settings.glm_base_url, settings.glm_embed_model, settings.glm_timeout_s)
+        glm = _glm_clients.get(glm_key)
+        if glm is None:
+            glm = _glm_clients.setdefault(
+                glm_key,
+                GLMEmbeddingClient(
+                    api_key=api_key,
+                    base_url=settings.glm_base_url,
+                    model=settings.glm_embed_model,
+                    timeout_s=settings.glm_timeout_s,
+                    max_retries=settings.glm_max_retries,
+                    max_connections=settings.glm_max_connections,
+                ),
+            )
+        return glm
     dim_env = os.getenv("MOCK_EMBED_DIM", "").strip()
     dim = int(dim_env) if dim_env.isdigit() else 384
-    return MockHashEmbeddingClient(dim=dim)
+    mode = os.getenv("MOCK_EMBED_MODE", "").strip() or "hash"
+    workers_env = os.getenv("MOCK_EMBED_WORKERS", "").strip()
+    workers = int(workers_env) if workers_env.isdigit() else 0
+    key = (dim, mode, workers)
+    client = _mock_clients.get(key)
+    if client is None:
+        client = _mock_clients.setdefault(key, MockHashEmbeddingClient(dim=dim, mode=mode, workers=workers))
+    return client
 
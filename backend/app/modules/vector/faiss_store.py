@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 
+from app.modules.vector.codec import CODEC_F16, CODEC_F32, CODEC_INT8, Codes, bytes_per_vector, check_codec, codec_of_dtype, decode, encode
+from app.modules.vector.codec import scores as score_codes
+
 try:
     import faiss  # type: ignore
 
@@ -21,19 +24,102 @@ class SearchHit:
     score: float
 
 
+def _numpy_search(codes: Codes, query_vector: np.ndarray, top_k: int, allowed: Optional[np.ndarray]) -> List[SearchHit]:
+    if codes.size == 0:
+        return []
+    scores = score_codes(codes, query_vector[0])
+    candidates = int(scores.shape[0])
+    if allowed is not None:
+        mask = np.unpackbits(allowed, count=candidates, bitorder="little").astype(bool)
+        scores[~mask] = -np.inf
+        candidates = int(mask.sum())
+    k = min(int(top_k), candidates)
+    if k <= 0:
+        return []
+    idxs = np.argpartition(-scores, kth=k - 1)[:k]
+    idxs = idxs[np.argsort(-scores[idxs])]
+    return [SearchHit(pos=int(i), score=float(scores[int(i)])) for i in idxs]
+
+
+def _as_query(query_vector: np.ndarray) -> np.ndarray:
+    if query_vector.ndim == 1:
+        query_vector = query_vector.reshape(1, -1)
+    if query_vector.dtype != np.float32:
+        query_vector = query_vector.astype(np.float32)
+    return query_vector
+
+
+def _replace_atomic(path: str, write) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _save_npy(path: str, array: np.ndarray) -> None:
+    def _write(tmp: str) -> None:
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+
+    _replace_atomic(path, _write)
+
+
+def _save_codes(index_path: str, codes: Codes) -> None:
+    if codes.scale is not None:
+        _save_npy(index_path + ".scale.npy", codes.scale)
+    _save_npy(index_path + ".npy", codes.data)
+
+
+def _load_codes(index_path: str, mmap: bool = False) -> Codes:
+    npy_path = index_path + ".npy"
+    if not os.path.exists(npy_path):
+        raise FileNotFoundError("index_file_not_found")
+    data = np.load(npy_path, mmap_mode="r" if mmap else None)
+    codec = codec_of_dtype(data.dtype)
+    scale = np.load(index_path + ".scale.npy").astype(np.float32) if codec == CODEC_INT8 else None
+    return Codes(codec=codec, data=data, scale=scale)
+
+
+def _faiss_index(dim: int, codec: str):
+    if codec == CODEC_F32:
+        return faiss.IndexFlatIP(dim)  # type: ignore[attr-defined]
+    qtype = faiss.ScalarQuantizer.QT_fp16 if codec == CODEC_F16 else faiss.ScalarQuantizer.QT_8bit  # type: ignore[attr-defined]
+    return faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)  # type: ignore[attr-defined]
+
+
+def _faiss_codec(index) -> str:
+    sq = getattr(index, "sq", None)
+    if sq is None:
+        return CODEC_F32
+    if sq.qtype == faiss.ScalarQuantizer.QT_fp16:  # type: ignore[attr-defined]
+        return CODEC_F16
+    if sq.qtype == faiss.ScalarQuantizer.QT_8bit:  # type: ignore[attr-defined]
+        return CODEC_INT8
+    raise ValueError("invalid_vector_codec")
+
+
 class FaissVectorStore:
-    def __init__(self, dim: int):
+    def __init__(self, dim: int, codec: str = CODEC_F32):
         self.dim = dim
+        self.codec = check_codec(codec)
         if _HAS_FAISS:
-            self._index = faiss.IndexFlatIP(dim)  # type: ignore[attr-defined]
+            self._index = _faiss_index(dim, self.codec)
         else:
-            self._vectors = np.zeros((0, dim), dtype=np.float32)
+            self._codes = encode(np.zeros((0, dim), dtype=np.float32), self.codec)
 
     @property
     def size(self) -> int:
         if _HAS_FAISS:
             return int(self._index.ntotal)
-        return int(self._vectors.shape[0])
+        return self._codes.size
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.size * bytes_per_vector(self.dim, self.codec)
 
     def add(self, vectors: np.ndarray) -> None:
         if vectors.dtype != np.float32:
@@ -41,20 +127,25 @@ class FaissVectorStore:
         if vectors.ndim != 2 or vectors.shape[1] != self.dim:
             raise ValueError("invalid_vectors_shape")
         if _HAS_FAISS:
+            if not self._index.is_trained:
+                self._index.train(vectors)
             self._index.add(vectors)
+        elif self._codes.size == 0:
+            self._codes = encode(vectors, self.codec)
         else:
-            if self._vectors.size == 0:
-                self._vectors = vectors
-            else:
-                self._vectors = np.concatenate([self._vectors, vectors], axis=0)
+            added = encode(vectors, self.codec, scale=self._codes.scale)
+            self._codes = Codes(codec=self.codec, data=np.concatenate([self._codes.data, added.data], axis=0), scale=self._codes.scale)
 
-    def search(self, query_vector: np.ndarray, top_k: int) -> List[SearchHit]:
-        if query_vector.ndim == 1:
-            query_vector = query_vector.reshape(1, -1)
-        if query_vector.dtype != np.float32:
-            query_vector = query_vector.astype(np.float32)
+    def search(self, query_vector: np.ndarray, top_k: int, allowed: Optional[np.ndarray] = None) -> List[SearchHit]:
+        query_vector = _as_query(query_vector)
         if _HAS_FAISS:
-            scores, idxs = self._index.search(query_vector, top_k)
+            if allowed is None:
+                scores, idxs = self._index.search(query_vector, top_k)
+            else:
+                bits = np.ascontiguousarray(allowed, dtype=np.uint8)
+                sel = faiss.IDSelectorBitmap(self.size, faiss.swig_ptr(bits))  # type: ignore[attr-defined]
+                params = faiss.SearchParameters(sel=sel)  # type: ignore[attr-defined]
+                scores, idxs = self._index.search(query_vector, top_k, params=params)
             hits: List[SearchHit] = []
             for pos, score in zip(idxs[0].tolist(), scores[0].tolist()):
                 if pos < 0:
@@ -62,36 +153,59 @@ class FaissVectorStore:
                 hits.append(SearchHit(pos=int(pos), score=float(score)))
             return hits
 
-        if self._vectors.size == 0:
-            return []
-        scores = (self._vectors @ query_vector[0]).astype(np.float32)
-        k = min(int(top_k), int(scores.shape[0]))
-        if k <= 0:
-            return []
-        idxs = np.argpartition(-scores, kth=k - 1)[:k]
-        idxs = idxs[np.argsort(-scores[idxs])]
-        return [SearchHit(pos=int(i), score=float(scores[int(i)])) for i in idxs]
+        return _numpy_search(self._codes, query_vector, top_k, allowed)
+
+    def vectors(self) -> np.ndarray:
+        if _HAS_FAISS:
+            return self._index.reconstruct_n(0, self.size) if self.size else np.zeros((0, self.dim), dtype=np.float32)
+        return decode(self._codes)
 
     def save(self, index_path: str) -> None:
-        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
         if _HAS_FAISS:
-            faiss.write_index(self._index, index_path)  # type: ignore[attr-defined]
+            _replace_atomic(index_path, lambda tmp: faiss.write_index(self._index, tmp))  # type: ignore[attr-defined]
             return
-        np.save(index_path + ".npy", self._vectors)
+        _save_codes(index_path, self._codes)
+
+    def export_vectors(self, index_path: str) -> str:
+        if _HAS_FAISS:
+            _save_codes(index_path, encode(self.vectors(), self.codec))
+        else:
+            _save_codes(index_path, self._codes)
+        return index_path + ".npy"
 
     @staticmethod
     def load(index_path: str) -> "FaissVectorStore":
         if _HAS_FAISS and os.path.exists(index_path):
             index = faiss.read_index(index_path)  # type: ignore[attr-defined]
-            dim = int(index.d)
-            store = FaissVectorStore(dim=dim)
+            store = FaissVectorStore(dim=int(index.d), codec=_faiss_codec(index))
             store._index = index
             return store
 
-        npy_path = index_path + ".npy"
-        if not os.path.exists(npy_path):
-            raise FileNotFoundError("index_file_not_found")
-        vectors = np.load(npy_path).astype(np.float32)
-        store = FaissVectorStore(dim=int(vectors.shape[1]))
-        store._vectors = vectors
+        codes = _load_codes(index_path)
+        store = FaissVectorStore(dim=codes.dim, codec=codes.codec)
+        store._codes = codes
         return store
+
+
+class MmapVectorStore:
+    def __init__(self, codes: Codes):
+        self._codes = codes
+        self.dim = codes.dim
+        self.codec = codes.codec
+
+    @property
+    def size(self) -> int:
+        return self._codes.size
+
+    def search(self, query_vector: np.ndarray, top_k: int, allowed: Optional[np.ndarray] = None) -> List[SearchHit]:
+        return _numpy_search(self._codes, _as_query(query_vector), top_k, allowed)
+
+    @staticmethod
+    def load(index_path: str) -> "MmapVectorStore":
+        npy_path = index_path + ".npy"
+        stale = os.path.exists(index_path) and (
+            not os.path.exists(npy_path) or os.stat(npy_path).st_mtime_ns < os.stat(index_path).st_mtime_ns
+        )
+        if stale or not os.path.exists(npy_path):
+            FaissVectorStore.load(index_path).export_vectors(index_path)
+        return MmapVectorStore(_load_codes(index_path, mmap=True))
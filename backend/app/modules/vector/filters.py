@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+
+_TAG_SPLIT_RE = re.compile(r"[,，;；、\s]+")
+
+
+def split_tags(tags: str) -> List[str]:
+    return [t for t in (p.strip() for p in _TAG_SPLIT_RE.split(tags or "")) if t]
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    tags: Tuple[str, ...] = ()
+    item_ids: Tuple[UUID, ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.tags and not self.item_ids
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder="little")
+
+
+@dataclass
+class FilterIndex:
+    size: int
+    tag_bits: Dict[str, np.ndarray] = field(default_factory=dict)
+    item_ids: List[str] = field(default_factory=list)
+    pos_item: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    item_ord: Dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.item_ord = {iid: o for o, iid in enumerate(self.item_ids)}
+
+    @staticmethod
+    def build(positions: Sequence[Tuple[UUID, str]]) -> "FilterIndex":
+        n = len(positions)
+        item_ord: Dict[str, int] = {}
+        pos_item = np.empty(n, dtype=np.int32)
+        tag_positions: Dict[str, List[int]] = {}
+        for pos, (item_id, tags) in enumerate(positions):
+            pos_item[pos] = item_ord.setdefault(str(item_id), len(item_ord))
+            for tag in set(split_tags(tags)):
+                tag_positions.setdefault(tag, []).append(pos)
+        tag_bits: Dict[str, np.ndarray] = {}
+        for tag, plist in tag_positions.items():
+            mask = np.zeros(n, dtype=bool)
+            mask[plist] = True
+            tag_bits[tag] = _pack(mask)
+        return FilterIndex(size=n, tag_bits=tag_bits, item_ids=list(item_ord), pos_item=pos_item)
+
+    def _item_mask(self, item_ids: Iterable[UUID]) -> np.ndarray:
+        hit = np.zeros(len(self.item_ids), dtype=bool)
+        hit[[o for o in (self.item_ord.get(str(i)) for i in item_ids) if o is not None]] = True
+        return hit[self.pos_item]
+
+    def active_bits(self, inactive_item_ids: Set[UUID]) -> Optional[np.ndarray]:
+        if not inactive_item_ids:
+            return None
+        inactive = self._item_mask(inactive_item_ids)
+        return _pack(~inactive) if inactive.any() else None
+
+    def allowed(self, flt: Optional[SearchFilter], active_bits: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        bits: Optional[np.ndarray] = None
+        if flt is not None and flt.tags:
+            bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for tag in flt.tags:
+                tag_bits = self.tag_bits.get(tag)
+                if tag_bits is not None:
+                    np.bitwise_or(bits, tag_bits, out=bits)
+        if flt is not None and flt.item_ids:
+            item_bits = _pack(self._item_mask(flt.item_ids))
+            bits = item_bits if bits is None else np.bitwise_and(bits, item_bits)
+        if active_bits is not None:
+            bits = active_bits if bits is None else np.bitwise_and(bits, active_bits)
+        return bits
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tags = sorted(self.tag_bits)
+        width = (self.size + 7) // 8
+        stacked = np.stack([self.tag_bits[t] for t in tags]) if tags else np.zeros((0, width), dtype=np.uint8)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                size=np.asarray([self.size], dtype=np.int64),
+                tag_names=np.asarray(tags, dtype=np.str_),
+                tag_bits=stacked,
+                item_ids=np.asarray(self.item_ids, dtype=np.str_),
+                pos_item=self.pos_item,
+            )
+
+    @staticmethod
+    def load(path: str) -> "FilterIndex":
+        with np.load(path, allow_pickle=False) as data:
+            tags = [str(t) for t in data["tag_names"]]
+            stacked = data["tag_bits"]
+            return FilterIndex(
+                size=int(data["size"][0]),
+                tag_bits={t: stacked[i].copy() for i, t in enumerate(tags)},
+                item_ids=[str(i) for i in data["item_ids"]],
+                pos_item=data["pos_item"].astype(np.int32),
+            )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, dict]]] = {}
+_cache_lock = threading.Lock()
+
+
+def manifest_path() -> str:
+    return os.path.join(settings.vector_dir, "manifest.json")
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("indexes") or {}
+    except FileNotFoundError:
+        return {}
+
+
+def _write(path: str, indexes: Dict[str, dict]) -> None:
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": datetime.utcnow().isoformat(), "indexes": indexes}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def read_manifest() -> Dict[str, dict]:
+    path = manifest_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_ino, st.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    indexes = _read(path)
+    with _cache_lock:
+        _cache[path] = (stamp, indexes)
+    return indexes
+
+
+def index_generation(index_path: str) -> int:
+    entry = read_manifest().get(index_path)
+    return int(entry["generation"]) if entry else 0
+
+
+def filter_generation(index_path: str) -> int:
+    entry = read_manifest().get(index_path)
+    return int(entry.get("filter_generation", 0)) if entry else 0
+
+
+def bump_filter_generation(kb_id: UUID) -> None:
+    path = manifest_path()
+    with _locked(path):
+        indexes = _read(path)
+        entries = [e for e in indexes.values() if e.get("kb_id") == str(kb_id)]
+        for entry in entries:
+            entry["filter_generation"] = int(entry.get("filter_generation", 0)) + 1
+        if entries:
+            _write(path, indexes)
+
+
+def publish_index(index_path: str, kb_id: UUID, kb_version: int, index_id: UUID, dim: int, size: int, codec: str = "f32") -> int:
+    path = manifest_path()
+    with _locked(path):
+        indexes = _read(path)
+        generation = max(time.time_ns(), int((indexes.get(index_path) or {}).get("generation", 0)) + 1)
+        indexes[index_path] = {
+            "kb_id": str(kb_id),
+            "kb_version": kb_version,
+            "index_id": str(index_id),
+            "dim": dim,
+            "codec": codec,
+            "size": size,
+            "generation": generation,
+        }
+        _write(path, indexes)
+    return generation
+
+
+def remove_index(index_path: str) -> Optional[dict]:
+    path = manifest_path()
+    with _locked(path):
+        indexes = _read(path)
+        entry = indexes.pop(index_path, None)
+        if entry is not None:
+            _write(path, indexes)
+    return entry
@@ -4,39 +4,46 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class VectorIndex(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    kb_id: UUID = Field(index=True)
-    kb_version: int = Field(index=True)
-    provider: str = Field(index=True)
-    model: str = Field(index=True)
+    __table_args__ = (Index("ix_vectorindex_kb_id_kb_version_created_at", "kb_id", "kb_version", "created_at"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kb_id: UUID
+    kb_version: int
+    provider: str
+    model: str
     dim: int
+    codec: str = "f32"
+    pinned: bool = False
     index_path: str
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class VectorRecord(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    kb_id: UUID = Field(index=True)
-    kb_version: int = Field(index=True)
-    vector_pos: int = Field(index=True)
-    chunk_id: UUID = Field(index=True)
-    revision_id: UUID = Field(index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    __table_args__ = (Index("ix_vectorrecord_kb_id_kb_version_vector_pos", "kb_id", "kb_version", "vector_pos"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kb_id: UUID
+    kb_version: int
+    vector_pos: int
+    chunk_id: UUID
+    revision_id: UUID
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class VectorQueryLog(SQLModel, table=True):
-    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    kb_id: UUID = Field(index=True)
-    kb_version: int = Field(index=True)
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    kb_id: UUID
+    kb_version: int
     query: str
     top_k: int
-    provider: str = Field(index=True)
-    model: str = Field(index=True)
-    latency_ms: int = Field(default=0, index=True)
+    provider: str
+    model: str
+    latency_ms: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     meta_json: str = ""
 
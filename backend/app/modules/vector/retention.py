@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlmodel import Session, col, delete, func, select
+
+from app.core.config import settings
+from app.modules.kb.models import KnowledgeBase, KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
+from app.modules.vector.manifest import remove_index
+from app.modules.vector.models import VectorIndex, VectorRecord
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GcReport:
+    dry_run: bool
+    kbs: int = 0
+    versions_deleted: int = 0
+    vector_indexes_deleted: int = 0
+    vector_records_deleted: int = 0
+    chunks_deleted: int = 0
+    dirs_deleted: int = 0
+    bytes_reclaimed: int = 0
+    db_bytes_reclaimed: int = 0
+    duration_ms: int = 0
+    kept: Dict[str, List[int]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _version_dirs(kb_dir: str) -> Dict[int, str]:
+    if not os.path.isdir(kb_dir):
+        return {}
+    return {int(name): os.path.join(kb_dir, name) for name in os.listdir(kb_dir) if name.isdigit()}
+
+
+def set_version_pinned(session: Session, kb_id: UUID, kb_version: int, pinned: bool) -> int:
+    rows = session.exec(select(VectorIndex).where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version == kb_version))).all()
+    if not rows:
+        raise ValueError("index_not_found")
+    for idx in rows:
+        idx.pinned = pinned
+        session.add(idx)
+    session.commit()
+    return len(rows)
+
+
+def kept_versions(session: Session, kb: KnowledgeBase, keep_latest: int) -> Set[int]:
+    rows = session.exec(select(VectorIndex.kb_version, VectorIndex.pinned).where(VectorIndex.kb_id == kb.id)).all()
+    indexed = sorted({v for v, _ in rows}, reverse=True)
+    keep = set(indexed[: max(1, keep_latest)])
+    keep.update(v for v, pinned in rows if pinned)
+    keep.add(kb.published_version)
+    return keep
+
+
+def _delete_in_batches(session: Session, model, where, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        ids = session.exec(select(model.id).where(where).limit(batch_size)).all()
+        if not ids:
+            return deleted
+        session.exec(delete(model).where(col(model.id).in_(ids)))
+        session.commit()
+        deleted += len(ids)
+
+
+def _count(session: Session, model, where) -> int:
+    return int(session.exec(select(func.count()).select_from(model).where(where)).one())
+
+
+def _superseded_revision_ids(session: Session, kb_id: UUID, referenced: Set[UUID]) -> List[UUID]:
+    rows = session.exec(
+        select(KnowledgeItemRevision.id, KnowledgeItemRevision.item_id, KnowledgeItemRevision.revision)
+        .join(KnowledgeItem, KnowledgeItem.id == KnowledgeItemRevision.item_id)
+        .where(KnowledgeItem.kb_id == kb_id)
+    ).all()
+    current = {
+        item_id: rev
+        for item_id, rev in session.exec(
+            select(KnowledgeItem.id, KnowledgeItemRevision.revision)
+            .join(KnowledgeItemRevision, KnowledgeItemRevision.id == KnowledgeItem.current_revision_id)
+            .where(KnowledgeItem.kb_id == kb_id)
+        ).all()
+    }
+    return [rid for rid, item_id, rev in rows if item_id in current and rev < current[item_id] and rid not in referenced]
+
+
+def _evict(index_path: str) -> None:
+    from app.modules.vector.service import _evict_stores
+
+    remove_index(index_path)
+    _evict_stores(index_path)
+
+
+def collect_kb(session: Session, kb: KnowledgeBase, keep_latest: int, dry_run: bool, report: GcReport) -> None:
+    batch = max(1, settings.gc_batch_size)
+    keep = kept_versions(session, kb, keep_latest)
+    report.kept[str(kb.id)] = sorted(keep)
+    stale_indexes = session.exec(select(VectorIndex).where((VectorIndex.kb_id == kb.id) & (col(VectorIndex.kb_version).not_in(keep)))).all()
+    stale_versions = {idx.kb_version for idx in stale_indexes}
+    dirs = _version_dirs(os.path.join(settings.vector_dir, str(kb.id)))
+    stale_versions.update(v for v in dirs if v not in keep)
+    report.versions_deleted += len(stale_versions)
+
+    for v in sorted(stale_versions):
+        records = (VectorRecord.kb_id == kb.id) & (VectorRecord.kb_version == v)
+        indexes = (VectorIndex.kb_id == kb.id) & (VectorIndex.kb_version == v)
+        if dry_run:
+            report.vector_records_deleted += _count(session, VectorRecord, records)
+            report.vector_indexes_deleted += _count(session, VectorIndex, indexes)
+        else:
+            report.vector_records_deleted += _delete_in_batches(session, VectorRecord, records, batch)
+            report.vector_indexes_deleted += _delete_in_batches(session, VectorIndex, indexes, batch)
+        path = dirs.get(v)
+        if path:
+            report.bytes_reclaimed += _dir_size(path)
+            report.dirs_deleted += 1
+            if not dry_run:
+                _evict(os.path.join(path, "index.faiss"))
+                shutil.rmtree(path, ignore_errors=True)
+
+    referenced = set(
+        session.exec(
+            select(VectorRecord.revision_id).where((VectorRecord.kb_id == kb.id) & (col(VectorRecord.kb_version).in_(keep))).distinct()
+        ).all()
+    )
+    superseded = _superseded_revision_ids(session, kb.id, referenced)
+    for start in range(0, len(superseded), batch):
+        where = col(KnowledgeChunk.revision_id).in_(superseded[start : start + batch])
+        report.chunks_deleted += _count(session, KnowledgeChunk, where) if dry_run else _delete_in_batches(session, KnowledgeChunk, where, batch)
+
+
+def _orphan_kb_dirs(known: Set[str]) -> Iterable[str]:
+    if not os.path.isdir(settings.vector_dir):
+        return []
+    return [
+        os.path.join(settings.vector_dir, name)
+        for name in os.listdir(settings.vector_dir)
+        if os.path.isdir(os.path.join(settings.vector_dir, name)) and name not in known
+    ]
+
+
+def _vacuum(session: Session) -> int:
+    bind = session.get_bind()
+    db_path = bind.url.database if bind.dialect.name == "sqlite" else None
+    if not db_path or not os.path.exists(db_path):
+        return 0
+    before = os.path.getsize(db_path)
+    session.commit()
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+    return max(0, before - os.path.getsize(db_path))
+
+
+def collect_garbage(session: Session, keep_latest: Optional[int] = None, dry_run: bool = False, vacuum: bool = False) -> GcReport:
+    started = time.time()
+    keep_latest = settings.gc_keep_versions if keep_latest is None else keep_latest
+    if keep_latest < 1:
+        raise ValueError("invalid_keep_latest")
+    report = GcReport(dry_run=dry_run)
+    kbs = session.exec(select(KnowledgeBase)).all()
+    report.kbs = len(kbs)
+    for kb in kbs:
+        collect_kb(session, kb, keep_latest, dry_run, report)
+
+    known = {str(kb.id) for kb in kbs}
+    for path in _orphan_kb_dirs(known):
+        report.bytes_reclaimed += _dir_size(path)
+        report.dirs_deleted += 1
+        if not dry_run:
+            for vdir in _version_dirs(path).values():
+                _evict(os.path.join(vdir, "index.faiss"))
+            shutil.rmtree(path, ignore_errors=True)
+    orphan_records = col(VectorRecord.kb_id).not_in([kb.id for kb in kbs])
+    if dry_run:
+        report.vector_records_deleted += _count(session, VectorRecord, orphan_records)
+    else:
+        report.vector_records_deleted += _delete_in_batches(session, VectorRecord, orphan_records, max(1, settings.gc_batch_size))
+        report.vector_indexes_deleted += _delete_in_batches(
+            session, VectorIndex, col(VectorIndex.kb_id).not_in([kb.id for kb in kbs]), max(1, settings.gc_batch_size)
+        )
+
+    if vacuum and not dry_run:
+        report.db_bytes_reclaimed = _vacuum(session)
+    report.duration_ms = int((time.time() - started) * 1000)
+    return report
+
+
+_gc_thread: Optional[threading.Thread] = None
+_last_report: Optional[GcReport] = None
+
+
+def last_report() -> Optional[GcReport]:
+    return _last_report
+
+
+def _gc_loop(interval_s: float) -> None:
+    global _last_report
+    from app.core.db import session_scope
+
+    while True:
+        time.sleep(interval_s)
+        try:
+            with session_scope() as session:
+                _last_report = collect_garbage(session)
+        except Exception as exc:
+            logger.exception("vector gc failed")
+            _last_report = GcReport(dry_run=False, error=repr(exc))
+
+
+def start_gc_loop() -> Optional[threading.Thread]:
+    global _gc_thread
+    if settings.gc_interval_s <= 0 or _gc_thread is not None:
+        return None
+    _gc_thread = threading.Thread(target=_gc_loop, args=(settings.gc_interval_s,), name="vector-gc", daemon=True)
+    _gc_thread.start()
+    return _gc_thread
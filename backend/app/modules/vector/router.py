@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -5,19 +6,34 @@ from sqlmodel import Session
 
 from app.core.db import get_session
 from app.modules.kb.service import get_kb
-from app.modules.vector.schemas import ReindexResponse, SearchRequest, SearchResponse
-from app.modules.vector.service import get_latest_index, reindex_kb, search
+from app.modules.vector.schemas import (
+    FederatedSearchRequest,
+    FederatedSearchResponse,
+    GcRequest,
+    GcResponse,
+    PinResponse,
+    ReindexResponse,
+    SearchRequest,
+    SearchResponse,
+)
 
 
 router = APIRouter(tags=["vector"])
 
 
 @router.post("/kbs/{kb_id}/reindex", response_model=ReindexResponse)
-def reindex(kb_id: UUID, session: Session = Depends(get_session)):
+def reindex(kb_id: UUID, codec: Optional[str] = None, session: Session = Depends(get_session)):
+    from app.modules.vector.service import reindex_kb
+
     kb = get_kb(session, kb_id)
     if not kb:
         raise HTTPException(status_code=404, detail="kb_not_found")
-    idx = reindex_kb(session, kb_id=kb_id, kb_version=kb.published_version)
+    try:
+        idx = reindex_kb(session, kb_id=kb_id, kb_version=kb.published_version, codec=codec)
+    except ValueError as e:
+        if str(e) == "invalid_vector_codec":
+            raise HTTPException(status_code=400, detail="invalid_vector_codec")
+        raise
     indexed_chunks = 0
     if idx.dim != 0:
         indexed_chunks = int(session.exec(select_count_vectors(kb_id=kb_id, kb_version=kb.published_version)).one())
@@ -27,6 +43,7 @@ def reindex(kb_id: UUID, session: Session = Depends(get_session)):
         provider=idx.provider,
         model=idx.model,
         dim=idx.dim,
+        codec=idx.codec,
         indexed_chunks=indexed_chunks,
     )
 
@@ -43,10 +60,16 @@ def select_count_vectors(kb_id: UUID, kb_version: int):
 
 @router.post("/kbs/{kb_id}/search", response_model=SearchResponse)
 def search_kb(kb_id: UUID, payload: SearchRequest, session: Session = Depends(get_session)):
+    from app.modules.vector.filters import SearchFilter
+    from app.modules.vector.service import get_latest_index, search
+
     kb = get_kb(session, kb_id)
     if not kb:
         raise HTTPException(status_code=404, detail="kb_not_found")
-    latency_ms, hits = search(session, kb_id=kb_id, query=payload.query, top_k=payload.top_k, kb_version=payload.kb_version)
+    filters = SearchFilter(tags=tuple(payload.tags), item_ids=tuple(payload.item_ids))
+    latency_ms, hits = search(
+        session, kb_id=kb_id, query=payload.query, top_k=payload.top_k, kb_version=payload.kb_version, filters=filters
+    )
     idx = get_latest_index(session, kb_id, payload.kb_version)
     kb_version = payload.kb_version if payload.kb_version is not None else (idx.kb_version if idx else 0)
     return SearchResponse(
@@ -59,6 +82,52 @@ def search_kb(kb_id: UUID, payload: SearchRequest, session: Session = Depends(ge
     )
 
 
+@router.post("/search/federated", response_model=FederatedSearchResponse)
+def search_federated(payload: FederatedSearchRequest, session: Session = Depends(get_session)):
+    from app.modules.vector.filters import SearchFilter
+    from app.modules.vector.service import KbTarget, federated_search
+
+    for t in payload.kbs:
+        if not get_kb(session, t.kb_id):
+            raise HTTPException(status_code=404, detail="kb_not_found")
+    targets = [KbTarget(kb_id=t.kb_id, weight=t.weight, kb_version=t.kb_version) for t in payload.kbs]
+    filters = SearchFilter(tags=tuple(payload.tags), item_ids=tuple(payload.item_ids))
+    latency_ms, hits = federated_search(session, targets=targets, query=payload.query, top_k=payload.top_k, filters=filters)
+    return FederatedSearchResponse(query=payload.query, hits=hits, latency_ms=latency_ms, created_at=datetime_utc())
+
+
+@router.post("/vector/gc", response_model=GcResponse)
+def vector_gc(payload: GcRequest, session: Session = Depends(get_session)):
+    from dataclasses import asdict
+
+    from app.modules.vector.retention import collect_garbage
+
+    report = collect_garbage(session, keep_latest=payload.keep_latest, dry_run=payload.dry_run, vacuum=payload.vacuum)
+    return GcResponse(**asdict(report))
+
+
+@router.put("/kbs/{kb_id}/versions/{kb_version}/pin", response_model=PinResponse)
+def pin_version(kb_id: UUID, kb_version: int, session: Session = Depends(get_session)):
+    return _set_pinned(session, kb_id, kb_version, True)
+
+
+@router.delete("/kbs/{kb_id}/versions/{kb_version}/pin", response_model=PinResponse)
+def unpin_version(kb_id: UUID, kb_version: int, session: Session = Depends(get_session)):
+    return _set_pinned(session, kb_id, kb_version, False)
+
+
+def _set_pinned(session: Session, kb_id: UUID, kb_version: int, pinned: bool) -> PinResponse:
+    from app.modules.vector.retention import set_version_pinned
+
+    try:
+        set_version_pinned(session, kb_id, kb_version, pinned)
+    except ValueError as e:
+        if str(e) == "index_not_found":
+            raise HTTPException(status_code=404, detail="index_not_found")
+        raise
+    return PinResponse(kb_id=kb_id, kb_version=kb_version, pinned=pinned)
+
+
 def datetime_utc():
     from datetime import datetime
 
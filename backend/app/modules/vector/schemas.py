@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -13,13 +13,42 @@ class ReindexResponse(BaseModel):
     provider: str
     model: str
     dim: int
+    codec: str = "f32"
     indexed_chunks: int
 
 
+class GcRequest(BaseModel):
+    keep_latest: Optional[int] = Field(default=None, ge=1)
+    dry_run: bool = False
+    vacuum: bool = False
+
+
+class GcResponse(BaseModel):
+    dry_run: bool
+    kbs: int
+    versions_deleted: int
+    vector_indexes_deleted: int
+    vector_records_deleted: int
+    chunks_deleted: int
+    dirs_deleted: int
+    bytes_reclaimed: int
+    db_bytes_reclaimed: int
+    duration_ms: int
+    kept: Dict[str, List[int]]
+
+
+class PinResponse(BaseModel):
+    kb_id: UUID
+    kb_version: int
+    pinned: bool
+
+
 class SearchRequest(BaseModel):
     query: str = Field(min_length=1)
     top_k: int = Field(default=5, ge=1, le=50)
     kb_version: Optional[int] = None
+    tags: List[str] = Field(default_factory=list, description="只检索带任一标签的条目")
+    item_ids: List[UUID] = Field(default_factory=list, description="只检索指定条目")
 
 
 class SearchHitRead(BaseModel):
@@ -27,6 +56,7 @@ class SearchHitRead(BaseModel):
     revision_id: UUID
     score: float
     content: str
+    token_count: int = 0
 
 
 class SearchResponse(BaseModel):
@@ -36,3 +66,30 @@ class SearchResponse(BaseModel):
     hits: List[SearchHitRead]
     latency_ms: int
     created_at: datetime
+
+
+class FederatedKb(BaseModel):
+    kb_id: UUID
+    weight: float = Field(default=1.0, gt=0, le=10)
+    kb_version: Optional[int] = None
+
+
+class FederatedSearchRequest(BaseModel):
+    query: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=50)
+    kbs: List[FederatedKb] = Field(min_length=1, max_length=16)
+    tags: List[str] = Field(default_factory=list)
+    item_ids: List[UUID] = Field(default_factory=list)
+
+
+class FederatedHitRead(SearchHitRead):
+    kb_id: UUID
+    kb_version: int
+    raw_score: float
+
+
+class FederatedSearchResponse(BaseModel):
+    query: str
+    hits: List[FederatedHitRead]
+    latency_ms: int
+    created_at: datetime
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
 import os
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 import numpy as np
@@ -11,13 +16,31 @@ from rapidfuzz import fuzz
 from sqlmodel import Session, col, delete, select
 
 from app.core.config import settings
+from app.core.textnorm import normalize_text
 from app.modules.kb.models import KnowledgeChunk, KnowledgeItemRevision
-from app.modules.kb.service import iter_current_chunks
+from app.modules.kb.service import inactive_item_ids, items_by_revision, iter_current_chunks
+from app.modules.vector.codec import check_codec
 from app.modules.vector.embedding import get_embedding_client
-from app.modules.vector.faiss_store import FaissVectorStore
+from app.modules.vector.faiss_store import FaissVectorStore, MmapVectorStore, SearchHit
+from app.modules.vector.filters import FilterIndex, SearchFilter
+from app.modules.vector.manifest import filter_generation, index_generation, publish_index, remove_index
 from app.modules.vector.models import VectorIndex, VectorQueryLog, VectorRecord
 
 
+@dataclass(frozen=True)
+class KbTarget:
+    kb_id: UUID
+    weight: float = 1.0
+    kb_version: Optional[int] = None
+
+
+_store_cache: "OrderedDict[tuple[str, str], tuple[int, object]]" = OrderedDict()
+_filter_cache: "OrderedDict[tuple[str, str], tuple[int, FilterIndex]]" = OrderedDict()
+_active_cache: "OrderedDict[tuple[str, str], tuple[tuple[int, int], Optional[np.ndarray]]]" = OrderedDict()
+_store_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
 def _index_dir(kb_id: UUID, kb_version: int) -> str:
     return os.path.join(settings.vector_dir, str(kb_id), str(kb_version))
 
@@ -26,10 +49,14 @@ def _index_path(kb_id: UUID, kb_version: int) -> str:
     return os.path.join(_index_dir(kb_id, kb_version), "index.faiss")
 
 
+def _filters_path(index_path: str) -> str:
+    return os.path.join(os.path.dirname(index_path), "filters.npz")
+
+
 def _lexical_score(query: str, text: str) -> float:
     if not query or not text:
         return 0.0
-    return float(fuzz.partial_ratio(query, text)) / 100.0
+    return float(fuzz.partial_ratio(normalize_text(query), normalize_text(text))) / 100.0
 
 
 def _hybrid_score(vec_score: float, lex_score: float) -> float:
@@ -44,10 +71,74 @@ def get_latest_index(session: Session, kb_id: UUID, kb_version: Optional[int]) -
     return session.exec(stmt).first()
 
 
-def reindex_kb(session: Session, kb_id: UUID, kb_version: int) -> VectorIndex:
+def _embedder_dim(embedder, chunks: List[KnowledgeChunk]) -> int:
+    dim = getattr(embedder, "dim", None)
+    if dim:
+        return int(dim)
+    return int(embedder.embed([chunks[0].content]).shape[1])
+
+
+def _embed_chunks(embedder, chunks: List[KnowledgeChunk], precomputed: Dict[UUID, np.ndarray]) -> np.ndarray:
+    if precomputed:
+        dim = _embedder_dim(embedder, chunks)
+        precomputed = {cid: vec for cid, vec in precomputed.items() if np.shape(vec) == (dim,)}
+    missing = [i for i, ch in enumerate(chunks) if ch.id not in precomputed]
+    if len(missing) == len(chunks):
+        return embedder.embed([ch.content for ch in chunks])
+    fresh = embedder.embed([chunks[i].content for i in missing]) if missing else None
+    vectors = np.empty((len(chunks), dim), dtype=np.float32)
+    for i, ch in enumerate(chunks):
+        if ch.id in precomputed:
+            vectors[i] = precomputed[ch.id]
+    if missing:
+        vectors[missing] = fresh
+    return vectors
+
+
+def _previous_vectors(session: Session, kb_id: UUID, kb_version: int, embedder, codec: str, chunks: List[KnowledgeChunk]) -> Dict[UUID, np.ndarray]:
+    prev = session.exec(
+        select(VectorIndex)
+        .where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version < kb_version) & (VectorIndex.dim > 0))
+        .order_by(col(VectorIndex.kb_version).desc())
+    ).first()
+    if not prev or (prev.provider, prev.model) != (embedder.provider, embedder.model):
+        return {}
+    if not (prev.codec == "f32" or (prev.codec == codec and codec != "int8")):
+        return {}
+    if prev.dim != _embedder_dim(embedder, chunks):
+        return {}
+    wanted = {ch.id for ch in chunks}
+    records = session.exec(
+        select(VectorRecord.vector_pos, VectorRecord.chunk_id).where((VectorRecord.kb_id == kb_id) & (VectorRecord.kb_version == prev.kb_version))
+    ).all()
+    positions = [(pos, cid) for pos, cid in records if cid in wanted]
+    if not positions:
+        return {}
+    try:
+        vectors = FaissVectorStore.load(prev.index_path).vectors()
+    except (OSError, RuntimeError, ValueError):
+        return {}
+    return {cid: vectors[pos] for pos, cid in positions if pos < len(vectors)}
+
+
+def reindex_kb(
+    session: Session,
+    kb_id: UUID,
+    kb_version: int,
+    codec: Optional[str] = None,
+    precomputed: Optional[Dict[UUID, np.ndarray]] = None,
+    reuse_previous: bool = False,
+    chunks: Optional[List[KnowledgeChunk]] = None,
+) -> VectorIndex:
     embedder = get_embedding_client()
+    codec = check_codec(codec or settings.vector_codec)
+    pinned = bool(
+        session.exec(
+            select(VectorIndex.pinned).where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version == kb_version) & (VectorIndex.pinned == True))  # noqa: E712
+        ).first()
+    )
 
-    chunks = list(iter_current_chunks(session, kb_id))
+    chunks = list(chunks) if chunks is not None else list(iter_current_chunks(session, kb_id))
     texts = [ch.content for ch in chunks]
     if not texts:
         session.exec(delete(VectorIndex).where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version == kb_version)))
@@ -59,20 +150,31 @@ def reindex_kb(session: Session, kb_id: UUID, kb_version: int) -> VectorIndex:
             provider=embedder.provider,
             model=embedder.model,
             dim=0,
+            codec=codec,
+            pinned=pinned,
             index_path=_index_path(kb_id, kb_version),
         )
         session.add(empty_index)
         session.commit()
         session.refresh(empty_index)
+        remove_index(empty_index.index_path)
+        _evict_stores(empty_index.index_path)
         return empty_index
 
-    vectors = embedder.embed(texts)
+    known = _previous_vectors(session, kb_id, kb_version, embedder, codec, chunks) if reuse_previous else {}
+    known.update(precomputed or {})
+    vectors = _embed_chunks(embedder, chunks, known)
+    refs = [(ch.id, ch.revision_id) for ch in chunks]
     dim = int(vectors.shape[1])
-    store = FaissVectorStore(dim=dim)
+    store = FaissVectorStore(dim=dim, codec=codec)
     store.add(vectors)
 
     index_path = _index_path(kb_id, kb_version)
     store.save(index_path)
+    item_by_rev = items_by_revision(session, list({ch.revision_id for ch in chunks}))
+    FilterIndex.build([(item_by_rev[ch.revision_id].id, item_by_rev[ch.revision_id].tags) for ch in chunks]).save(_filters_path(index_path))
+    if settings.vector_serving_mode != "local":
+        store.export_vectors(index_path)
 
     session.exec(delete(VectorIndex).where((VectorIndex.kb_id == kb_id) & (VectorIndex.kb_version == kb_version)))
     session.exec(delete(VectorRecord).where((VectorRecord.kb_id == kb_id) & (VectorRecord.kb_version == kb_version)))
@@ -84,48 +186,135 @@ def reindex_kb(session: Session, kb_id: UUID, kb_version: int) -> VectorIndex:
         provider=embedder.provider,
         model=embedder.model,
         dim=dim,
+        codec=codec,
+        pinned=pinned,
         index_path=index_path,
     )
     session.add(idx)
     session.commit()
     session.refresh(idx)
 
-    for pos, ch in enumerate(chunks):
-        session.add(
-            VectorRecord(
-                kb_id=kb_id,
-                kb_version=kb_version,
-                vector_pos=pos,
-                chunk_id=ch.id,
-                revision_id=ch.revision_id,
-            )
-        )
+    session.add_all(
+        VectorRecord(kb_id=kb_id, kb_version=kb_version, vector_pos=pos, chunk_id=chunk_id, revision_id=revision_id)
+        for pos, (chunk_id, revision_id) in enumerate(refs)
+    )
     session.commit()
+    publish_index(index_path, kb_id=kb_id, kb_version=kb_version, index_id=idx.id, dim=dim, size=store.size, codec=codec)
+    _evict_stores(index_path)
     return idx
 
 
-def search(
-    session: Session,
-    kb_id: UUID,
-    query: str,
-    top_k: int,
-    kb_version: Optional[int],
-) -> tuple[int, List[dict]]:
-    started = time.time()
-    embedder = get_embedding_client()
+def reindex_published(kb_id: UUID, kb_version: int) -> None:
+    from app.core.db import session_scope
+
+    with session_scope() as session:
+        reindex_kb(session, kb_id=kb_id, kb_version=kb_version, reuse_previous=True)
+
+
+def _open_store(idx: VectorIndex):
+    mode = settings.vector_serving_mode
+    if mode == "local":
+        return FaissVectorStore.load(idx.index_path)
+    if mode == "mmap":
+        return MmapVectorStore.load(idx.index_path)
+    if mode == "sidecar":
+        from app.modules.vector.sidecar import SidecarVectorStore, get_sidecar_client
+
+        return SidecarVectorStore(get_sidecar_client(), idx.index_path, idx.dim)
+    raise ValueError("invalid_serving_mode")
+
+
+def _get_store(idx: VectorIndex):
+    key = (str(idx.id), idx.index_path)
+    generation = index_generation(idx.index_path)
+    with _store_lock:
+        cached = _store_cache.get(key)
+        if cached is not None and cached[0] == generation:
+            _store_cache.move_to_end(key)
+            return cached[1]
+    store = _open_store(idx)
+    with _store_lock:
+        _store_cache[key] = (generation, store)
+        while len(_store_cache) > max(1, settings.vector_store_cache_size):
+            _store_cache.popitem(last=False)
+    return store
+
+
+def _evict_stores(index_path: str) -> None:
+    with _store_lock:
+        for cache in (_store_cache, _filter_cache, _active_cache):
+            for key in [k for k in cache if k[1] == index_path]:
+                del cache[key]
+
+
+def _get_filter_index(session: Session, idx: VectorIndex) -> FilterIndex:
+    key = (str(idx.id), idx.index_path)
+    generation = index_generation(idx.index_path)
+    with _store_lock:
+        cached = _filter_cache.get(key)
+        if cached is not None and cached[0] == generation:
+            _filter_cache.move_to_end(key)
+            return cached[1]
+    path = _filters_path(idx.index_path)
+    if os.path.exists(path):
+        fi = FilterIndex.load(path)
+    else:
+        records = session.exec(
+            select(VectorRecord.revision_id)
+            .where((VectorRecord.kb_id == idx.kb_id) & (VectorRecord.kb_version == idx.kb_version))
+            .order_by(VectorRecord.vector_pos.asc())
+        ).all()
+        item_by_rev = items_by_revision(session, list(set(records)))
+        fi = FilterIndex.build([(item_by_rev[r].id, item_by_rev[r].tags) if r in item_by_rev else (r, "") for r in records])
+    with _store_lock:
+        _filter_cache[key] = (generation, fi)
+        while len(_filter_cache) > max(1, settings.vector_store_cache_size):
+            _filter_cache.popitem(last=False)
+    return fi
+
+
+def warm_index(session: Session, kb_id: UUID, kb_version: Optional[int] = None) -> Optional[VectorIndex]:
     idx = get_latest_index(session, kb_id, kb_version)
-    if not idx or idx.dim == 0:
-        latency_ms = int((time.time() - started) * 1000)
-        _log_query(session, kb_id, kb_version or 0, query, top_k, embedder, latency_ms, meta_json='{"empty":true}')
-        return latency_ms, []
+    if not idx or idx.dim == 0 or not os.path.exists(idx.index_path):
+        return None
+    _get_store(idx)
+    _get_filter_index(session, idx)
+    return idx
+
+
+def _active_bits(session: Session, idx: VectorIndex, fi: FilterIndex) -> Optional[np.ndarray]:
+    key = (str(idx.id), idx.index_path)
+    stamp = (index_generation(idx.index_path), filter_generation(idx.index_path))
+    with _store_lock:
+        cached = _active_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            _active_cache.move_to_end(key)
+            return cached[1]
+    bits = fi.active_bits(inactive_item_ids(session, idx.kb_id))
+    with _store_lock:
+        _active_cache[key] = (stamp, bits)
+        while len(_active_cache) > max(1, settings.vector_store_cache_size):
+            _active_cache.popitem(last=False)
+    return bits
+
 
-    store = FaissVectorStore.load(idx.index_path)
-    qv = embedder.embed([query])[0]
-    hits = store.search(qv, top_k=top_k * 5)
+def _allowed_bits(session: Session, idx: VectorIndex, filters: Optional[SearchFilter]):
+    fi = _get_filter_index(session, idx)
+    return fi.allowed(filters, _active_bits(session, idx, fi))
 
+
+def _search_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _store_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, settings.vector_search_workers), thread_name_prefix="vector-search")
+        return _pool
+
+
+def _score_hits(session: Session, kb_id: UUID, kb_version: int, query: str, hits: List[SearchHit]) -> List[dict]:
     records = session.exec(
         select(VectorRecord).where(
-            (VectorRecord.kb_id == kb_id) & (VectorRecord.kb_version == idx.kb_version) & col(VectorRecord.vector_pos).in_([h.pos for h in hits])
+            (VectorRecord.kb_id == kb_id) & (VectorRecord.kb_version == kb_version) & col(VectorRecord.vector_pos).in_([h.pos for h in hits])
         )
     ).all()
     record_by_pos = {r.vector_pos: r for r in records}
@@ -150,16 +339,112 @@ def search(
                 "revision_id": ch.revision_id,
                 "score": score,
                 "content": ch.content,
+                "token_count": ch.token_count,
             }
         )
+    return scored
+
+
+def search(
+    session: Session,
+    kb_id: UUID,
+    query: str,
+    top_k: int,
+    kb_version: Optional[int],
+    filters: Optional[SearchFilter] = None,
+    query_vector: Optional[np.ndarray] = None,
+) -> tuple[int, List[dict]]:
+    started = time.time()
+    embedder = get_embedding_client()
+    idx = get_latest_index(session, kb_id, kb_version)
+    if not idx or idx.dim == 0:
+        latency_ms = int((time.time() - started) * 1000)
+        _log_query(session, kb_id, kb_version or 0, query, top_k, embedder, latency_ms, meta_json='{"empty":true}')
+        return latency_ms, []
+
+    store = _get_store(idx)
+    allowed = _allowed_bits(session, idx, filters)
+    qv = query_vector if query_vector is not None else embedder.embed([query])[0]
+    hits = store.search(qv, top_k=top_k * 5, allowed=allowed)
+
+    scored = _score_hits(session, kb_id, idx.kb_version, query, hits)
     scored.sort(key=lambda x: x["score"], reverse=True)
     scored = scored[:top_k]
 
     latency_ms = int((time.time() - started) * 1000)
-    _log_query(session, kb_id, idx.kb_version, query, top_k, embedder, latency_ms, meta_json="")
+    meta_json = "" if filters is None or filters.is_empty else json.dumps({"tags": list(filters.tags), "item_ids": len(filters.item_ids)}, ensure_ascii=False)
+    _log_query(session, kb_id, idx.kb_version, query, top_k, embedder, latency_ms, meta_json=meta_json)
     return latency_ms, scored
 
 
+def _normalize_scores(values: List[float]) -> List[float]:
+    if not values:
+        return []
+    lo, hi = min(values), max(values)
+    spread = hi - lo
+    out: List[float] = []
+    for v in values:
+        rank_part = (v - lo) / spread if spread > 1e-9 else 1.0
+        out.append(0.5 * rank_part + 0.5 * max(0.0, min(1.0, v)))
+    return out
+
+
+def federated_search(
+    session: Session,
+    targets: List[KbTarget],
+    query: str,
+    top_k: int,
+    filters: Optional[SearchFilter] = None,
+    query_vector: Optional[np.ndarray] = None,
+) -> tuple[int, List[dict]]:
+    started = time.time()
+    embedder = get_embedding_client()
+    resolved: List[tuple[KbTarget, VectorIndex]] = []
+    for t in targets:
+        idx = get_latest_index(session, t.kb_id, t.kb_version)
+        if idx and idx.dim != 0:
+            resolved.append((t, idx))
+
+    merged: List[dict] = []
+    if resolved:
+        qv = query_vector if query_vector is not None else embedder.embed([query])[0]
+        pool = _search_pool()
+        allowed = [_allowed_bits(session, idx, filters) for _, idx in resolved]
+        futures = [
+            pool.submit(lambda i, bits: _get_store(i).search(qv, top_k=top_k * 5, allowed=bits), idx, bits)
+            for (_, idx), bits in zip(resolved, allowed)
+        ]
+        for (t, idx), fut in zip(resolved, futures):
+            scored = _score_hits(session, t.kb_id, idx.kb_version, query, fut.result())
+            for row, norm in zip(scored, _normalize_scores([r["score"] for r in scored])):
+                row["raw_score"] = row["score"]
+                row["score"] = float(t.weight) * norm
+                row["kb_id"] = t.kb_id
+                row["kb_version"] = idx.kb_version
+                merged.append(row)
+    merged.sort(key=lambda x: (x["score"], x["raw_score"]), reverse=True)
+    merged = merged[:top_k]
+
+    latency_ms = int((time.time() - started) * 1000)
+    version_by_kb = {t.kb_id: idx.kb_version for t, idx in resolved}
+    for t in targets:
+        session.add(
+            VectorQueryLog(
+                kb_id=t.kb_id,
+                kb_version=version_by_kb.get(t.kb_id, t.kb_version or 0),
+                query=query,
+                top_k=top_k,
+                provider=embedder.provider,
+                model=embedder.model,
+                latency_ms=latency_ms,
+                created_at=datetime.utcnow(),
+                meta_json=json.dumps({"federated": len(targets), "weight": t.weight}),
+            )
+        )
+    session.commit()
+    return latency_ms, merged
+
+
 def _log_query(session: Session, kb_id: UUID, kb_version: int, query: str, top_k: int, embedder, latency_ms: int, meta_json: str) -> None:
     ql = VectorQueryLog(
         kb_id=kb_id,
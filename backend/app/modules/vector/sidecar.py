@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.modules.vector.faiss_store import FaissVectorStore, MmapVectorStore, SearchHit
+from app.modules.vector.manifest import index_generation
+
+
+_FRAME = struct.Struct("<II")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("sidecar_connection_closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_frame(sock: socket.socket, header: dict, body: bytes = b"") -> None:
+    raw = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(raw), len(body)) + raw + body)
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[dict, bytes]:
+    header_len, body_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len).decode("utf-8"))
+    return header, _recv_exact(sock, body_len) if body_len else b""
+
+
+class _StoreCache:
+    def __init__(self, open_store: Callable[[str], object], max_entries: int):
+        self._open = open_store
+        self._max = max(1, max_entries)
+        self._stores: Dict[str, Tuple[int, object]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, index_path: str):
+        generation = index_generation(index_path)
+        with self._lock:
+            cached = self._stores.get(index_path)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+        store = self._open(index_path)
+        with self._lock:
+            self._stores.pop(index_path, None)
+            self._stores[index_path] = (generation, store)
+            while len(self._stores) > self._max:
+                self._stores.pop(next(iter(self._stores)))
+        return store
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        while True:
+            try:
+                header, body = _recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                _send_frame(self.request, *self.server.answer(header, body))  # type: ignore[attr-defined]
+            except OSError:
+                return
+
+
+class SidecarServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, use_mmap: bool = True, max_entries: int = 64):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        self.stores = _StoreCache(MmapVectorStore.load if use_mmap else FaissVectorStore.load, max_entries)
+        super().__init__(socket_path, _Handler)
+
+    def answer(self, header: dict, body: bytes) -> Tuple[dict, bytes]:
+        if header.get("op") == "ping":
+            return {"ok": True}, b""
+        try:
+            index_path = str(header["index_path"])
+            dim, top_k = int(header["dim"]), int(header["top_k"])
+            allowed_len = int(header.get("allowed_len") or 0)
+        except (KeyError, TypeError, ValueError):
+            return {"error": "invalid_request"}, b""
+        if dim <= 0 or top_k <= 0 or allowed_len < 0 or len(body) < dim * 4 + (allowed_len if header.get("filtered") else 0):
+            return {"error": "invalid_request"}, b""
+        try:
+            store = self.stores.get(index_path)
+        except FileNotFoundError:
+            return {"error": "index_file_not_found"}, b""
+        if dim != store.dim:
+            return {"error": "invalid_vectors_shape"}, b""
+        qv = np.frombuffer(body[: dim * 4], dtype=np.float32)
+        allowed = np.frombuffer(body[dim * 4 : dim * 4 + allowed_len], dtype=np.uint8) if header.get("filtered") else None
+        hits = store.search(qv, top_k=top_k, allowed=allowed)
+        pos = np.asarray([h.pos for h in hits], dtype=np.int64)
+        scores = np.asarray([h.score for h in hits], dtype=np.float32)
+        return {"n": len(hits)}, pos.tobytes() + scores.tobytes()
+
+
+class SidecarClient:
+    def __init__(self, socket_path: str, timeout_s: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_s)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def request(self, header: dict, body: bytes = b"") -> Tuple[dict, bytes]:
+        for attempt in range(2):
+            try:
+                sock = self._conn()
+                _send_frame(sock, header, body)
+                return _recv_frame(sock)
+            except (ConnectionError, OSError):
+                self._reset()
+                if attempt:
+                    raise
+        raise ConnectionError("sidecar_unreachable")
+
+    def ping(self) -> bool:
+        try:
+            return bool(self.request({"op": "ping"})[0].get("ok"))
+        except OSError:
+            return False
+
+
+class SidecarVectorStore:
+    def __init__(self, client: SidecarClient, index_path: str, dim: int):
+        self.client = client
+        self.index_path = index_path
+        self.dim = dim
+
+    def search(self, query_vector: np.ndarray, top_k: int, allowed: Optional[np.ndarray] = None) -> List[SearchHit]:
+        qv = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(-1)
+        bits = b"" if allowed is None else np.ascontiguousarray(allowed, dtype=np.uint8).tobytes()
+        header = {"op": "search", "index_path": self.index_path, "dim": int(qv.shape[0]), "top_k": int(top_k), "filtered": allowed is not None, "allowed_len": len(bits)}
+        reply, body = self.client.request(header, qv.tobytes() + bits)
+        if reply.get("error"):
+            raise RuntimeError(str(reply["error"]))
+        n = int(reply.get("n") or 0)
+        pos = np.frombuffer(body[: n * 8], dtype=np.int64)
+        scores = np.frombuffer(body[n * 8 : n * 12], dtype=np.float32)
+        return [SearchHit(pos=int(p), score=float(s)) for p, s in zip(pos.tolist(), scores.tolist())]
+
+
+_clients: Dict[str, SidecarClient] = {}
+
+
+def get_sidecar_client(socket_path: Optional[str] = None) -> SidecarClient:
+    path = socket_path or settings.vector_sidecar_socket
+    client = _clients.get(path)
+    if client is None:
+        client = _clients.setdefault(path, SidecarClient(path))
+    return client
+
+
+def start_in_thread(socket_path: str, use_mmap: bool = True) -> Tuple[SidecarServer, threading.Thread]:
+    server = SidecarServer(socket_path, use_mmap=use_mmap)
+    thread = threading.Thread(target=server.serve_forever, name="vector-sidecar", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="向量检索 sidecar（Unix socket）")
+    p.add_argument("--socket", default=settings.vector_sidecar_socket)
+    p.add_argument("--no-mmap", action="store_true", help="将索引整体读入内存而不是 mmap")
+    p.add_argument("--max-indexes", type=int, default=64)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    server = SidecarServer(args.socket, use_mmap=not args.no_mmap, max_entries=args.max_indexes)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
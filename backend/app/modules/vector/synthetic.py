@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class SyntheticCorpus:
+    texts: List[str]
+    labels: np.ndarray
+    queries: List[str]
+    query_labels: np.ndarray
+
+
+def _topic_words(n_topics: int, words_per_topic: int) -> List[List[str]]:
+    return [[f"t{t}w{w}" for w in range(words_per_topic)] for t in range(n_topics)]
+
+
+def _sample_docs(
+    rng: np.random.Generator,
+    labels: np.ndarray,
+    vocab: List[List[str]],
+    shared: List[str],
+    doc_len: int,
+    shared_ratio: float,
+) -> List[str]:
+    n = int(labels.shape[0])
+    words_per_topic = len(vocab[0])
+    topic_picks = rng.integers(0, words_per_topic, size=(n, doc_len))
+    shared_picks = rng.integers(0, len(shared), size=(n, doc_len))
+    use_shared = rng.random(size=(n, doc_len)) < shared_ratio
+    texts: List[str] = []
+    for i in range(n):
+        words = vocab[int(labels[i])]
+        row = [shared[int(s)] if u else words[int(w)] for w, s, u in zip(topic_picks[i], shared_picks[i], use_shared[i])]
+        texts.append(" ".join(row))
+    return texts
+
+
+def make_clustered_corpus(
+    n_docs: int,
+    n_topics: int = 64,
+    n_queries: int = 100,
+    words_per_topic: int = 40,
+    shared_words: int = 200,
+    doc_len: int = 12,
+    shared_ratio: float = 0.3,
+    seed: int = 0,
+) -> SyntheticCorpus:
+    if n_docs <= 0 or n_topics <= 0:
+        raise ValueError("invalid_corpus_size")
+    rng = np.random.default_rng(seed)
+    vocab = _topic_words(n_topics, words_per_topic)
+    shared = [f"s{w}" for w in range(shared_words)]
+    labels = rng.integers(0, n_topics, size=n_docs)
+    query_labels = rng.integers(0, n_topics, size=n_queries)
+    texts = _sample_docs(rng, labels, vocab, shared, doc_len, shared_ratio)
+    queries = _sample_docs(rng, query_labels, vocab, shared, max(3, doc_len // 2), shared_ratio)
+    return SyntheticCorpus(texts=texts, labels=labels, queries=queries, query_labels=query_labels)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, delete, select
+
+from app.core.config import settings
+from app.modules.xhs.models import CommentIntent, NoteIntentStats
+from app.modules.xhs.service import CommentSnapshot, load_comment_snapshot
+
+
+@dataclass
+class NoteAnalysis:
+    note_id: str
+    total_comments: int
+    intent_counts: Dict[str, int]
+    updated_at: datetime
+    cached: bool = False
+    classified: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+@dataclass
+class SnapshotAnalysisReport:
+    source: str
+    notes: int = 0
+    cached_notes: int = 0
+    comments: int = 0
+    classified: int = 0
+    removed: int = 0
+    elapsed_s: float = 0.0
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _note_comments(snapshot: CommentSnapshot, note_id: str) -> Dict[str, Tuple[str, str]]:
+    out: Dict[str, Tuple[str, str]] = {}
+    for c in snapshot.by_note.get(note_id, []):
+        text = str(c.get("content") or "")
+        h = content_hash(text)
+        out[str(c.get("comment_id") or "") or f"{note_id}:{h}"] = (text, h)
+    return out
+
+
+def _digest(comments: Dict[str, Tuple[str, str]]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for cid in sorted(comments):
+        h.update(f"{cid}\x1f{comments[cid][1]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _result(stats: NoteIntentStats, **kwargs: Any) -> NoteAnalysis:
+    return NoteAnalysis(
+        note_id=stats.note_id,
+        total_comments=stats.total_comments,
+        intent_counts=json.loads(stats.intent_counts_json),
+        updated_at=stats.updated_at,
+        **kwargs,
+    )
+
+
+def _classify(texts: List[str]) -> List[Tuple[str, float]]:
+    from app.modules.reply.intent_model import classify_intents
+
+    out: List[Tuple[str, float]] = []
+    step = max(1, settings.xhs_analyze_batch_size)
+    for i in range(0, len(texts), step):
+        out.extend((r.intent, r.confidence) for r in classify_intents(texts[i : i + step]))
+    return out
+
+
+def sync_note(
+    session: Session,
+    note_id: str,
+    snapshot: Optional[CommentSnapshot] = None,
+    classifier: Optional[str] = None,
+) -> NoteAnalysis:
+    from app.modules.reply.intent_model import intent_classifier_version
+
+    snapshot = snapshot or load_comment_snapshot()
+    classifier = classifier or intent_classifier_version()
+    stats = session.get(NoteIntentStats, note_id)
+    if stats is not None and stats.source == snapshot.key and stats.classifier == classifier:
+        return _result(stats, cached=True, reused=stats.total_comments)
+
+    comments = _note_comments(snapshot, note_id)
+    digest = _digest(comments)
+    now = datetime.utcnow()
+    if stats is not None and stats.digest == digest and stats.classifier == classifier:
+        stats.source = snapshot.key
+        session.add(stats)
+        session.commit()
+        return _result(stats, reused=stats.total_comments)
+
+    cached = {r.comment_id: r for r in session.exec(select(CommentIntent).where(CommentIntent.note_id == note_id))}
+    counts: Counter[str] = Counter(json.loads(stats.intent_counts_json)) if stats is not None else Counter()
+    stale = [
+        cid
+        for cid, (_, h) in comments.items()
+        if cid not in cached or cached[cid].content_hash != h or cached[cid].classifier != classifier
+    ]
+    removed = [cid for cid in cached if cid not in comments]
+
+    upserts: List[Dict[str, Any]] = []
+    for cid, (intent, confidence) in zip(stale, _classify([comments[cid][0] for cid in stale])):
+        old = cached.get(cid)
+        if old is not None:
+            counts[old.intent] -= 1
+        counts[intent] += 1
+        upserts.append(
+            {
+                "comment_id": cid,
+                "note_id": note_id,
+                "content_hash": comments[cid][1],
+                "classifier": classifier,
+                "intent": intent,
+                "confidence": confidence,
+                "updated_at": now,
+            }
+        )
+    for cid in removed:
+        counts[cached[cid].intent] -= 1
+
+    if upserts:
+        stmt = sqlite_insert(CommentIntent)
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["comment_id"],
+                set_={c: stmt.excluded[c] for c in ("note_id", "content_hash", "classifier", "intent", "confidence", "updated_at")},
+            ),
+            upserts,
+        )
+    if removed:
+        session.execute(delete(CommentIntent).where(CommentIntent.comment_id.in_(removed)))
+
+    if stats is None:
+        stats = NoteIntentStats(note_id=note_id, source=snapshot.key, classifier=classifier, digest=digest)
+    stats.source = snapshot.key
+    stats.classifier = classifier
+    stats.digest = digest
+    stats.total_comments = len(comments)
+    stats.intent_counts_json = json.dumps({k: v for k, v in sorted(counts.items()) if v > 0}, ensure_ascii=False)
+    stats.updated_at = now
+    session.add(stats)
+    session.commit()
+    return _result(stats, classified=len(stale), reused=len(comments) - len(stale), removed=len(removed))
+
+
+def sync_snapshot(session: Session, snapshot: Optional[CommentSnapshot] = None) -> SnapshotAnalysisReport:
+    from app.modules.reply.intent_model import intent_classifier_version
+
+    started = time.perf_counter()
+    snapshot = snapshot or load_comment_snapshot()
+    classifier = intent_classifier_version()
+    report = SnapshotAnalysisReport(source=snapshot.key)
+    for note_id in sorted(snapshot.by_note):
+        result = sync_note(session, note_id, snapshot, classifier)
+        report.notes += 1
+        report.cached_notes += 1 if result.cached else 0
+        report.comments += result.total_comments
+        report.classified += result.classified
+        report.removed += result.removed
+    report.elapsed_s = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="增量分析最新评论快照，预热各笔记的意图分布")
+    p.add_argument("--note", default=None, help="只同步该笔记")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    from app.core.db import create_db_and_tables, session_scope
+
+    args = _parse_args(argv)
+    create_db_and_tables()
+    with session_scope() as session:
+        report = sync_note(session, args.note) if args.note else sync_snapshot(session)
+    print(json.dumps(asdict(report), ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
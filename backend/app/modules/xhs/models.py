@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class CommentIntent(SQLModel, table=True):
+    __table_args__ = (Index("ix_commentintent_note_id", "note_id"),)
+
+    comment_id: str = Field(primary_key=True)
+    note_id: str
+    content_hash: str
+    classifier: str
+    intent: str
+    confidence: float = 0.0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class NoteIntentStats(SQLModel, table=True):
+    note_id: str = Field(primary_key=True)
+    source: str
+    classifier: str
+    digest: str
+    total_comments: int = 0
+    intent_counts_json: str = "{}"
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
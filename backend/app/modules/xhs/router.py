@@ -1,21 +1,31 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.core.db import get_session
 
 from app.modules.xhs import service
-from app.modules.xhs.schemas import AnalyzeNoteResponse, ListCommentsResponse, ListNotesResponse, XhsComment, XhsNote
+from app.modules.xhs.schemas import (
+    AnalyzeNoteResponse,
+    ListCommentsResponse,
+    ListNotesResponse,
+    SearchCommentsResponse,
+    XhsComment,
+    XhsNote,
+)
 
 
 router = APIRouter(tags=["xhs"])
 
 
 @router.get("/xhs/notes", response_model=ListNotesResponse)
-def list_notes(q: str = ""):
+def list_notes(q: str = "", offset: int = Query(default=0, ge=0), limit: Optional[int] = Query(default=None, ge=1, le=500)):
     try:
-        notes, source = service.list_notes(q=q)
-        return ListNotesResponse(notes=[XhsNote(**n) for n in notes], total=len(notes), source_files=source)
+        notes, total, source = service.list_notes(q=q, offset=offset, limit=limit)
+        return ListNotesResponse(notes=[XhsNote(**n) for n in notes], total=total, source_files=source)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="missing_xhs_json_files")
 
@@ -25,7 +35,7 @@ def list_comments(
     note_id: str,
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=500),
-    sort: str = Query(default="like", pattern="^(like|time)$"),
+    sort: str = Query(default="like", pattern="^(like|time|rank)$"),
     q: str = "",
 ):
     try:
@@ -43,15 +53,32 @@ def list_comments(
         raise HTTPException(status_code=404, detail="missing_xhs_json_files")
 
 
+@router.get("/xhs/comments/search", response_model=SearchCommentsResponse)
+def search_comments(
+    q: str = Query(min_length=1),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    from app.modules.xhs.search import search_comments as _search
+
+    try:
+        rows, total = _search(q, offset=offset, limit=limit)
+        return SearchCommentsResponse(q=q, total=total, offset=offset, limit=limit, comments=[XhsComment(**c) for c in rows])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="missing_xhs_json_files")
+
+
 @router.get("/xhs/notes/{note_id}/analyze", response_model=AnalyzeNoteResponse)
-def analyze_note(note_id: str, max_samples: int = Query(default=500, ge=50, le=2000)):
+def analyze_note(note_id: str, session: Session = Depends(get_session)):
     try:
-        r = service.analyze_note(note_id=note_id, max_samples=max_samples)
+        r = service.analyze_note(session, note_id=note_id)
         return AnalyzeNoteResponse(
             note_id=r["note_id"],
             total_comments=r["total_comments"],
             top_comments=[XhsComment(**c) for c in r["top_comments"]],
             intent_counts=r["intent_counts"],
+            classified=r["classified"],
+            cached=r["cached"],
             generated_at=r["generated_at"],
         )
     except FileNotFoundError:
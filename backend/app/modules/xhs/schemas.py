@@ -51,10 +51,20 @@ class ListCommentsResponse(BaseModel):
     comments: List[XhsComment]
 
 
+class SearchCommentsResponse(BaseModel):
+    q: str
+    total: int
+    offset: int
+    limit: int
+    comments: List[XhsComment]
+
+
 class AnalyzeNoteResponse(BaseModel):
     note_id: str
     total_comments: int
     top_comments: List[XhsComment]
     intent_counts: Dict[str, int]
+    classified: int = 0
+    cached: bool = False
     generated_at: datetime
 
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from sqlmodel import create_engine
+
+from app.core.config import settings
+from app.core.textnorm import normalize_batch, normalize_text
+
+
+_RUN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+|[a-z0-9_]+")
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+_SUFFIX_MAX = 16
+_FORMAT = "2"
+
+_META_DDL = "CREATE TABLE IF NOT EXISTS xhs_index_meta (name VARCHAR PRIMARY KEY, source VARCHAR NOT NULL, rows INTEGER NOT NULL, built_at DATETIME NOT NULL)"
+_FTS_DDL = {
+    "note": "CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(terms, chars, sfx, note_key, note_id UNINDEXED, doc UNINDEXED)",
+    "comment": "CREATE VIRTUAL TABLE IF NOT EXISTS comment_fts USING fts5(terms, chars, sfx, note_id UNINDEXED, likes UNINDEXED, ctime UNINDEXED, doc UNINDEXED)",
+}
+COMMENT_SORTS = {
+    "rank": "rank, rowid",
+    "like": "likes DESC, rowid",
+    "time": "ctime DESC, likes DESC, rowid",
+}
+
+_engines: Dict[str, Any] = {}
+_fresh: Dict[str, str] = {}
+_engines_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+def _terms(normalized: str) -> List[str]:
+    out: List[str] = []
+    for run in _RUN_RE.findall(normalized):
+        if _CJK_RE.match(run) and len(run) > 1:
+            out.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            out.append(run)
+    return out
+
+
+def _chars(normalized: str) -> List[str]:
+    return _CJK_RE.findall(normalized)
+
+
+def _suffixes(normalized: str) -> List[str]:
+    out: List[str] = []
+    for run in _RUN_RE.findall(normalized):
+        if not _CJK_RE.match(run):
+            out.extend(run[i:] for i in range(min(len(run), _SUFFIX_MAX)))
+    return out
+
+
+def _run_clause(run: str, first: bool, last: bool, latin: str) -> str:
+    if _CJK_RE.match(run):
+        if len(run) == 1:
+            return f'chars : "{run}"'
+        return 'terms : "' + " ".join(_terms(run)) + '"'
+    if first and last:
+        return f'{latin} : "{run}" *'
+    if first:
+        return f'sfx : "{run}"'
+    if last:
+        return f'terms : "{run}" *'
+    return f'terms : "{run}"'
+
+
+def _clause(term: str, latin: str) -> Optional[str]:
+    runs = _RUN_RE.findall(normalize_text(term))
+    clauses = [_run_clause(run, i == 0, i == len(runs) - 1, latin) for i, run in enumerate(runs)]
+    if len(clauses) > 1:
+        return "(" + " AND ".join(clauses) + ")"
+    return clauses[0] if clauses else None
+
+
+def build_match(q: str, latin: str = "sfx") -> Optional[str]:
+    clauses = [c for c in (_clause(phrase or word, latin) for phrase, word in _QUERY_RE.findall(q or "")) if c]
+    return " AND ".join(clauses) or None
+
+
+def _engine():
+    path = settings.xhs_index_path
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            engine = create_engine(f"sqlite:///{path}", poolclass=NullPool)
+            with engine.begin() as conn:
+                for ddl in (_META_DDL, *_FTS_DDL.values()):
+                    conn.execute(text(ddl))
+            _engines[path] = engine
+        return engine
+
+
+def _rebuild(name: str, source: str, rows: Iterable[Dict[str, Any]]) -> int:
+    table = f"{name}_fts"
+    rows = list(rows)
+    with _engine().begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(_FTS_DDL[name]))
+        if rows:
+            cols = list(rows[0])
+            conn.execute(text(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})"), rows)
+        conn.execute(
+            text("INSERT OR REPLACE INTO xhs_index_meta (name, source, rows, built_at) VALUES (:n, :s, :r, :t)"),
+            {"n": name, "s": source, "r": len(rows), "t": datetime.utcnow()},
+        )
+    return len(rows)
+
+
+def _note_rows(notes: List[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    from app.modules.xhs.service import _normalize_note
+
+    docs = [_normalize_note(n) for n in notes]
+    texts = normalize_batch([f"{d['title']}\n{d['desc']}\n{d['tag_list']}" for d in docs])
+    for d, t in zip(docs, texts):
+        yield {
+            "terms": " ".join(_terms(t)),
+            "chars": " ".join(_chars(t)),
+            "sfx": " ".join(_suffixes(t)),
+            "note_key": d["note_id"].lower(),
+            "note_id": d["note_id"],
+            "doc": json.dumps(d, ensure_ascii=False),
+        }
+
+
+def _comment_rows(comments: List[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    from app.modules.xhs.service import _normalize_comment, _to_int_like
+
+    docs = [_normalize_comment(c) for c in comments]
+    for d, t in zip(docs, normalize_batch([d["content"] for d in docs])):
+        yield {
+            "terms": " ".join(_terms(t)),
+            "chars": " ".join(_chars(t)),
+            "sfx": " ".join(_suffixes(t)),
+            "note_id": d["note_id"],
+            "likes": _to_int_like(d["like_count"]),
+            "ctime": d["create_time"] or 0,
+            "doc": json.dumps(d, ensure_ascii=False),
+        }
+
+
+def ensure_index(name: str) -> str:
+    from app.modules.xhs.service import _detect_latest_files, _file_key, _load_json
+
+    contents_path, comments_path = _detect_latest_files()
+    path: Path = contents_path if name == "note" else comments_path
+    source = f"v{_FORMAT}:{_file_key(path)}"
+    key = f"{settings.xhs_index_path}:{name}"
+    if _fresh.get(key) == source:
+        return source
+    with _build_lock:
+        if _fresh.get(key) != source:
+            with _engine().connect() as conn:
+                built = conn.execute(text("SELECT source FROM xhs_index_meta WHERE name = :n"), {"n": name}).scalar()
+            if built != source:
+                data = _load_json(path)
+                _rebuild(name, source, _note_rows(data) if name == "note" else _comment_rows(data))
+            _fresh[key] = source
+    return source
+
+
+def _search(name: str, match: str, where: str, params: Dict[str, Any], order_by: str, offset: int, limit: Optional[int]) -> Tuple[List[Dict[str, Any]], int]:
+    ensure_index(name)
+    table = f"{name}_fts"
+    params = {**params, "match": match, "offset": max(0, int(offset)), "limit": -1 if limit is None else int(limit)}
+    with _engine().connect() as conn:
+        total = conn.execute(text(f"SELECT count(*) FROM {table} WHERE {table} MATCH :match{where}"), params).scalar()
+        docs = conn.execute(
+            text(f"SELECT doc FROM {table} WHERE {table} MATCH :match{where} ORDER BY {order_by} LIMIT :limit OFFSET :offset"),
+            params,
+        ).scalars()
+        return [json.loads(d) for d in docs], int(total or 0)
+
+
+def search_notes(q: str, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    match = build_match(q, latin="{sfx note_key}")
+    if match is None:
+        return [], 0
+    return _search("note", match, "", {}, "rank, rowid", offset, limit)
+
+
+def search_comments(
+    q: str,
+    note_id: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    sort: str = "rank",
+) -> Tuple[List[Dict[str, Any]], int]:
+    match = build_match(q)
+    if match is None:
+        return [], 0
+    where, params = (" AND note_id = :note_id", {"note_id": note_id}) if note_id else ("", {})
+    return _search("comment", match, where, params, COMMENT_SORTS.get(sort, COMMENT_SORTS["rank"]), offset, limit)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="为最新 XHS 快照构建全文索引（SQLite FTS5，中文二元分词）")
+    p.add_argument("--query", default=None, help="构建后试查评论")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    started = time.perf_counter()
+    sources = {name: ensure_index(name) for name in ("note", "comment")}
+    out: Dict[str, Any] = {"sources": sources, "elapsed_s": round(time.perf_counter() - started, 3)}
+    if args.query:
+        rows, total = search_comments(args.query, limit=5)
+        out.update(total=total, top=[r["content"] for r in rows])
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import json
-from collections import Counter
-from datetime import datetime
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from app.modules.reply.intent import detect_intent
+from app.core.config import settings
+from app.core.textnorm import normalize_text
 
 
 def _repo_root() -> Path:
@@ -14,6 +15,8 @@ def _repo_root() -> Path:
 
 
 def _xhs_json_dir() -> Path:
+    if settings.xhs_json_dir:
+        return Path(settings.xhs_json_dir)
     return _repo_root() / "xhs" / "json"
 
 
@@ -30,6 +33,11 @@ def _load_json(path: Path) -> Any:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _file_key(path: Path) -> str:
+    st = path.stat()
+    return f"{path.name}:{st.st_mtime_ns}:{st.st_size}"
+
+
 def _to_int_like(v: Any) -> int:
     s = str(v or "").strip()
     if not s:
@@ -42,37 +50,60 @@ def _to_int_like(v: Any) -> int:
         return 0
 
 
-def list_notes(q: str = "") -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
-    contents_path, comments_path = _detect_latest_files()
-    notes = _load_json(contents_path)
-    q2 = (q or "").strip().lower()
-    if q2:
-        def hit(n: Dict[str, Any]) -> bool:
-            t = (str(n.get("title") or "") + "\n" + str(n.get("desc") or "") + "\n" + str(n.get("tag_list") or "")).lower()
-            return q2 in t or q2 in str(n.get("note_id") or "").lower()
+@dataclass
+class CommentSnapshot:
+    key: str
+    by_note: Dict[str, List[Dict[str, Any]]]
+
+
+_snapshot: Optional[CommentSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def load_comment_snapshot() -> CommentSnapshot:
+    global _snapshot
+    _, comments_path = _detect_latest_files()
+    key = _file_key(comments_path)
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.key != key:
+            by_note: Dict[str, List[Dict[str, Any]]] = {}
+            for c in _load_json(comments_path):
+                by_note.setdefault(str(c.get("note_id") or ""), []).append(c)
+            for rows in by_note.values():
+                rows.sort(key=lambda c: _to_int_like(c.get("like_count")), reverse=True)
+            _snapshot = CommentSnapshot(key=key, by_note=by_note)
+        return _snapshot
+
+
+def _normalize_note(n: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "note_id": str(n.get("note_id") or ""),
+        "type": str(n.get("type") or ""),
+        "title": str(n.get("title") or ""),
+        "desc": str(n.get("desc") or ""),
+        "tag_list": str(n.get("tag_list") or ""),
+        "nickname": str(n.get("nickname") or ""),
+        "liked_count": str(n.get("liked_count") or ""),
+        "collected_count": str(n.get("collected_count") or ""),
+        "comment_count": str(n.get("comment_count") or ""),
+        "share_count": str(n.get("share_count") or ""),
+        "time": int(n.get("time")) if n.get("time") is not None else None,
+        "note_url": str(n.get("note_url") or ""),
+        "source_keyword": str(n.get("source_keyword") or ""),
+    }
 
-        notes = [n for n in notes if hit(n)]
+
+def list_notes(q: str = "", offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, Dict[str, str]]:
+    contents_path, comments_path = _detect_latest_files()
     source = {"contents": contents_path.name, "comments": comments_path.name}
-    out: List[Dict[str, Any]] = []
-    for n in notes:
-        out.append(
-            {
-                "note_id": str(n.get("note_id") or ""),
-                "type": str(n.get("type") or ""),
-                "title": str(n.get("title") or ""),
-                "desc": str(n.get("desc") or ""),
-                "tag_list": str(n.get("tag_list") or ""),
-                "nickname": str(n.get("nickname") or ""),
-                "liked_count": str(n.get("liked_count") or ""),
-                "collected_count": str(n.get("collected_count") or ""),
-                "comment_count": str(n.get("comment_count") or ""),
-                "share_count": str(n.get("share_count") or ""),
-                "time": int(n.get("time")) if n.get("time") is not None else None,
-                "note_url": str(n.get("note_url") or ""),
-                "source_keyword": str(n.get("source_keyword") or ""),
-            }
-        )
-    return out, source
+    if normalize_text(q):
+        from app.modules.xhs.search import search_notes
+
+        rows, total = search_notes(q, offset=offset, limit=limit)
+        return rows, total, source
+    notes = _load_json(contents_path)
+    end = None if limit is None else offset + limit
+    return [_normalize_note(n) for n in notes[offset:end]], len(notes), source
 
 
 def _normalize_comment(c: Dict[str, Any]) -> Dict[str, Any]:
@@ -97,37 +128,32 @@ def list_comments(
     sort: str,
     q: str,
 ) -> Tuple[List[Dict[str, Any]], int]:
-    _, comments_path = _detect_latest_files()
-    comments = _load_json(comments_path)
-    rows = [c for c in comments if str(c.get("note_id") or "") == note_id]
-    q2 = (q or "").strip().lower()
-    if q2:
-        rows = [c for c in rows if q2 in str(c.get("content") or "").lower()]
+    offset2 = max(0, int(offset))
+    limit2 = min(max(1, int(limit)), 500)
+    if normalize_text(q):
+        from app.modules.xhs.search import search_comments
 
-    if sort == "time":
-        rows.sort(key=lambda c: int(c.get("create_time") or 0), reverse=True)
-    else:
-        rows.sort(key=lambda c: _to_int_like(c.get("like_count")), reverse=True)
+        return search_comments(q, note_id=note_id, offset=offset2, limit=limit2, sort=sort)
 
+    rows = load_comment_snapshot().by_note.get(note_id, [])
+    if sort == "time":
+        rows = sorted(rows, key=lambda c: int(c.get("create_time") or 0), reverse=True)
     total = len(rows)
-    offset2 = max(0, int(offset))
-    limit2 = min(max(1, int(limit)), 500)
     slice_rows = rows[offset2 : offset2 + limit2]
     return [_normalize_comment(c) for c in slice_rows], total
 
 
-def analyze_note(note_id: str, max_samples: int = 500) -> Dict[str, Any]:
-    rows, total = list_comments(note_id=note_id, offset=0, limit=max_samples, sort="like", q="")
-    counter: Counter[str] = Counter()
-    for c in rows:
-        r = detect_intent(str(c.get("content") or ""))
-        counter[r.intent] += 1
+def analyze_note(session, note_id: str) -> Dict[str, Any]:
+    from app.modules.xhs.analysis import sync_note
 
-    top_comments = rows[:10]
+    snapshot = load_comment_snapshot()
+    result = sync_note(session, note_id, snapshot)
     return {
         "note_id": note_id,
-        "total_comments": total,
-        "top_comments": top_comments,
-        "intent_counts": dict(counter),
-        "generated_at": datetime.utcnow(),
+        "total_comments": result.total_comments,
+        "top_comments": [_normalize_comment(c) for c in snapshot.by_note.get(note_id, [])[:10]],
+        "intent_counts": result.intent_counts,
+        "classified": result.classified,
+        "cached": result.cached,
+        "generated_at": result.updated_at,
     }
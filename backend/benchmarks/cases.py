@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from sqlmodel import Session
+
+from app.modules.reply.service import suggest_reply
+from app.modules.vector.codec import CODECS, encode
+from app.modules.vector.embedding import get_embedding_client
+from app.modules.vector.faiss_store import FaissVectorStore, MmapVectorStore
+from app.modules.vector.service import get_latest_index, reindex_kb, search
+from app.modules.xhs import service as xhs_service
+
+from benchmarks.datasets import SeededKb
+
+
+def _percentiles(samples_ms: List[float], prefix: str) -> Dict[str, float]:
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        f"{prefix}p50_ms": round(float(np.percentile(arr, 50)), 3),
+        f"{prefix}p95_ms": round(float(np.percentile(arr, 95)), 3),
+        f"{prefix}p99_ms": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+def bench_reindex(session: Session, kb: SeededKb) -> Dict[str, float]:
+    started = time.perf_counter()
+    idx = reindex_kb(session, kb_id=kb.kb_id, kb_version=kb.kb_version)
+    elapsed = time.perf_counter() - started
+    n = len(kb.corpus.texts)
+    return {"chunks": n, "dim": idx.dim, "reindex_s": round(elapsed, 3), "chunks_per_s": round(n / elapsed, 1)}
+
+
+def bench_search(session: Session, kb: SeededKb, n_queries: int, top_k: int = 5) -> Dict[str, float]:
+    queries = kb.corpus.queries[:n_queries]
+    samples: List[float] = []
+    agree = 0
+    total = 0
+    started = time.perf_counter()
+    for q, label in zip(queries, kb.corpus.query_labels):
+        t0 = time.perf_counter()
+        _, hits = search(session, kb_id=kb.kb_id, query=q, top_k=top_k, kb_version=kb.kb_version)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        for h in hits:
+            total += 1
+            agree += int(kb.label_by_text.get(h["content"]) == int(label))
+    elapsed = time.perf_counter() - started
+    out: Dict[str, float] = {"queries": len(queries), "search_qps": round(len(queries) / elapsed, 2)}
+    out.update(_percentiles(samples, ""))
+    out["topic_precision"] = round(agree / total, 4) if total else 0.0
+    return out
+
+
+def bench_codecs(session: Session, kb: SeededKb, n_queries: int, top_k: int = 10) -> Dict[str, float]:
+    idx = get_latest_index(session, kb.kb_id, kb.kb_version)
+    base = FaissVectorStore.load(idx.index_path).vectors()
+    queries = get_embedding_client().embed(kb.corpus.queries[:n_queries])
+    exact = [{h.pos for h in MmapVectorStore(encode(base, "f32")).search(q, top_k)} for q in queries]
+    out: Dict[str, float] = {"vectors": int(base.shape[0]), "dim": int(base.shape[1])}
+    for codec in CODECS:
+        stores = {"faiss": FaissVectorStore(dim=int(base.shape[1]), codec=codec), "numpy": MmapVectorStore(encode(base, codec))}
+        stores["faiss"].add(base)
+        out[f"{codec}_bytes"] = stores["numpy"]._codes.data.nbytes
+        for backend, store in stores.items():
+            samples: List[float] = []
+            found = 0
+            for q, truth in zip(queries, exact):
+                t0 = time.perf_counter()
+                hits = store.search(q, top_k)
+                samples.append((time.perf_counter() - t0) * 1000.0)
+                found += len(truth & {h.pos for h in hits})
+            out[f"{codec}_{backend}_recall"] = round(found / max(1, sum(len(t) for t in exact)), 4)
+            out.update(_percentiles(samples, f"{codec}_{backend}_"))
+    return out
+
+
+def _reply_once(session: Session, kb: SeededKb, note: Dict[str, Any], c: Dict[str, Any]) -> float:
+    t0 = time.perf_counter()
+    suggest_reply(
+        session=session,
+        kb_id=kb.kb_id,
+        comment_id=c["comment_id"],
+        note_id=c["note_id"],
+        comment_text=c["content"],
+        note_title=note["title"],
+        note_desc=note["desc"],
+        top_k=5,
+        kb_version=kb.kb_version,
+        inject_sales=True,
+    )
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def bench_suggest_reply(
+    session_factory: Callable[[], Any],
+    kb: SeededKb,
+    notes: List[Dict[str, Any]],
+    comments: List[Dict[str, Any]],
+    n_replies: int,
+    concurrency: int = 1,
+) -> Dict[str, float]:
+    note_by_id = {n["note_id"]: n for n in notes}
+    batch = comments[:n_replies]
+
+    def _task(c: Dict[str, Any]) -> float:
+        with session_factory() as session:
+            return _reply_once(session, kb, note_by_id[c["note_id"]], c)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        samples = [_task(c) for c in batch]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(_task, batch))
+    elapsed = time.perf_counter() - started
+    out: Dict[str, float] = {"replies": len(samples), "replies_per_s": round(len(samples) / elapsed, 2)}
+    out.update(_percentiles(samples, ""))
+    return out
+
+
+def bench_xhs(session, notes: List[Dict[str, Any]], comments: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    hot_note = comments[0]["note_id"] if comments else notes[0]["note_id"]
+    out: Dict[str, float] = {"notes": len(notes), "comments": len(comments)}
+    out.update(_percentiles(_timed(lambda: xhs_service.list_notes(q=""), repeat), "list_notes_"))
+    out.update(_percentiles(_timed(lambda: xhs_service.list_notes(q="测评"), repeat), "list_notes_q_"))
+    out.update(
+        _percentiles(
+            _timed(lambda: xhs_service.list_comments(note_id=hot_note, offset=0, limit=100, sort="like", q=""), repeat),
+            "list_comments_",
+        )
+    )
+    out.update(_percentiles(_timed(lambda: xhs_service.analyze_note(session, note_id=hot_note), 1), "analyze_cold_"))
+    out.update(_percentiles(_timed(lambda: xhs_service.analyze_note(session, note_id=hot_note), repeat), "analyze_"))
+    return out
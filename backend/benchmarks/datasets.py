@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.modules.kb.models import KnowledgeBase, KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
+from app.modules.vector.synthetic import SyntheticCorpus, make_clustered_corpus
+
+
+_COMMENT_FRAGMENTS = [
+    "怎么买？有优惠吗",
+    "求链接，多少钱",
+    "退货怎么处理",
+    "用了有点过敏泛红",
+    "好好看，爱了",
+    "真香，已经回购了",
+    "垃圾，别买",
+    "混油敏感能用吗，会闷痘吗",
+    "请问这个和上一代有什么区别？",
+    "第一次买，期待效果",
+    "发货要几天到",
+    "哈哈哈哈",
+    "路过",
+    "",
+]
+
+
+@dataclass
+class SeededKb:
+    kb_id: Any
+    kb_version: int
+    corpus: SyntheticCorpus
+    label_by_text: Dict[str, int]
+
+
+def seed_kb(session: Session, slug: str, n_chunks: int, n_topics: int = 64, seed: int = 0, batch_size: int = 10000) -> SeededKb:
+    corpus = make_clustered_corpus(n_docs=n_chunks, n_topics=n_topics, n_queries=1000, seed=seed)
+    kb = KnowledgeBase(slug=slug, name=slug, description="benchmark", published_version=1)
+    session.add(kb)
+    session.commit()
+    session.refresh(kb)
+
+    now = datetime.utcnow()
+    for start in range(0, n_chunks, batch_size):
+        items: List[dict] = []
+        revs: List[dict] = []
+        chunks: List[dict] = []
+        for i in range(start, min(start + batch_size, n_chunks)):
+            item_id, rev_id = uuid4(), uuid4()
+            text = corpus.texts[i]
+            topic = int(corpus.labels[i])
+            items.append(
+                {
+                    "id": item_id,
+                    "kb_id": kb.id,
+                    "key": f"doc-{i}",
+                    "title": f"topic {topic}",
+                    "tags": f"t{topic}",
+                    "is_active": True,
+                    "current_revision_id": rev_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            revs.append(
+                {
+                    "id": rev_id,
+                    "item_id": item_id,
+                    "revision": 1,
+                    "content": text,
+                    "source": "benchmark",
+                    "status": "published",
+                    "published_version": 1,
+                    "created_at": now,
+                }
+            )
+            chunks.append({"id": uuid4(), "revision_id": rev_id, "chunk_index": 0, "content": text, "created_at": now})
+        session.execute(insert(KnowledgeItem), items)
+        session.execute(insert(KnowledgeItemRevision), revs)
+        session.execute(insert(KnowledgeChunk), chunks)
+        session.commit()
+
+    label_by_text = {t: int(lbl) for t, lbl in zip(corpus.texts, corpus.labels)}
+    return SeededKb(kb_id=kb.id, kb_version=1, corpus=corpus, label_by_text=label_by_text)
+
+
+def make_comment_stream(n_comments: int, n_notes: int, seed: int = 0) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    rng = np.random.default_rng(seed)
+    notes = [
+        {
+            "note_id": f"note{n:06d}",
+            "type": "normal",
+            "title": f"测评笔记 {n}",
+            "desc": "成分、肤感与适用肤质的详细测评",
+            "tag_list": "护肤,测评",
+            "nickname": f"博主{n % 97}",
+            "liked_count": str(int(rng.integers(0, 50000))),
+            "collected_count": "0",
+            "comment_count": "0",
+            "share_count": "0",
+            "time": 1737000000000 + n,
+            "note_url": "",
+            "source_keyword": "benchmark",
+        }
+        for n in range(n_notes)
+    ]
+    note_picks = np.minimum(rng.zipf(1.3, size=n_comments) - 1, n_notes - 1)
+    frag_picks = rng.integers(0, len(_COMMENT_FRAGMENTS), size=n_comments)
+    likes = rng.integers(0, 2000, size=n_comments)
+    comments = [
+        {
+            "comment_id": f"c{i:08d}",
+            "note_id": notes[int(note_picks[i])]["note_id"],
+            "content": _COMMENT_FRAGMENTS[int(frag_picks[i])],
+            "like_count": str(int(likes[i])),
+            "create_time": 1737000000000 + i,
+            "nickname": f"用户{i % 5000}",
+            "user_id": f"u{i % 5000:05d}",
+            "ip_location": "",
+            "sub_comment_count": "0",
+            "parent_comment_id": "0",
+        }
+        for i in range(n_comments)
+    ]
+    return notes, comments
+
+
+def write_xhs_snapshot(directory: Path, notes: List[Dict[str, Any]], comments: List[Dict[str, Any]]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "search_contents_bench.json").write_text(json.dumps(notes, ensure_ascii=False), encoding="utf-8")
+    (directory / "search_comments_bench.json").write_text(json.dumps(comments, ensure_ascii=False), encoding="utf-8")
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.reply.templates import FALLBACK_TEMPLATES
+from app.modules.vector.embedding import MockHashEmbeddingClient
+
+
+def parse_latency(spec: str) -> Callable[[np.random.Generator], float]:
+    kind, _, raw = (spec or "fixed:0").partition(":")
+    args = [float(x) for x in raw.split(",") if x.strip()]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        ms = args[0] if args else 0.0
+        return lambda rng: ms
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: float(rng.uniform(args[0], args[1]))
+    if kind == "normal" and len(args) == 2:
+        return lambda rng: max(0.0, float(rng.normal(args[0], args[1])))
+    if kind == "lognormal" and len(args) == 2:
+        return lambda rng: float(args[0] * np.exp(rng.normal(0.0, args[1])))
+    if kind == "exp" and len(args) == 1:
+        return lambda rng: float(rng.exponential(args[0]))
+    raise ValueError("invalid_latency_spec")
+
+
+@dataclass
+class StubConfig:
+    chat_latency: str = "lognormal:300,0.5"
+    embed_latency: str = "lognormal:60,0.4"
+    error_rate: float = 0.0
+    burst_every_s: float = 0.0
+    burst_len_s: float = 0.0
+    retry_after_s: float = 1.0
+    stream_chunk_chars: int = 8
+    stream_chunk_delay_ms: float = 20.0
+    embed_dim: int = 1024
+    seed: int = 0
+
+
+@dataclass
+class StubStats:
+    requests: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    throttled: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="glm-stub")
+    rng = np.random.default_rng(config.seed)
+    chat_latency = parse_latency(config.chat_latency)
+    embed_latency = parse_latency(config.embed_latency)
+    embedder = MockHashEmbeddingClient(dim=config.embed_dim, mode="ngram")
+    stats = StubStats()
+    started = time.monotonic()
+    app.state.stats = stats
+
+    def _in_burst() -> bool:
+        if config.burst_every_s <= 0 or config.burst_len_s <= 0:
+            return False
+        return (time.monotonic() - started) % config.burst_every_s < config.burst_len_s
+
+    def _fault() -> Optional[JSONResponse]:
+        if _in_burst():
+            stats.throttled += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"code": "1302", "message": "rate_limited"}},
+                headers={"Retry-After": str(config.retry_after_s)},
+            )
+        if config.error_rate > 0 and float(rng.random()) < config.error_rate:
+            stats.errors += 1
+            return JSONResponse(status_code=500, content={"error": {"code": "500", "message": "stub_injected_error"}})
+        return None
+
+    async def _enter(route: str, latency: Callable[[np.random.Generator], float]) -> None:
+        stats.requests[route] = stats.requests.get(route, 0) + 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        await asyncio.sleep(latency(rng) / 1000.0)
+
+    def _reply_for(messages: List[Dict[str, Any]]) -> str:
+        prompt = str((messages[-1] or {}).get("content") or "") if messages else ""
+        for line in prompt.splitlines():
+            if line.startswith("意图："):
+                return FALLBACK_TEMPLATES.get(line[3:].strip(), FALLBACK_TEMPLATES["chat"])
+        return FALLBACK_TEMPLATES["chat"]
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await _enter("chat", chat_latency)
+        try:
+            fault = _fault()
+            if fault is not None:
+                return fault
+            content = _reply_for(body.get("messages") or [])
+            model = body.get("model") or "glm-stub"
+            if not body.get("stream"):
+                return {
+                    "id": "stub",
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(content), "total_tokens": len(content)},
+                }
+        finally:
+            stats.in_flight -= 1
+
+        async def _events():
+            step = max(1, config.stream_chunk_chars)
+            for i in range(0, len(content), step):
+                delta = {"id": "stub", "model": model, "choices": [{"index": 0, "delta": {"content": content[i : i + step]}}]}
+                yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(config.stream_chunk_delay_ms / 1000.0)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        await _enter("embeddings", embed_latency)
+        try:
+            fault = _fault()
+            if fault is not None:
+                return fault
+            texts = body.get("input") or []
+            if isinstance(texts, str):
+                texts = [texts]
+            vectors = embedder.embed([str(t) for t in texts])
+            return {
+                "model": body.get("model") or "embedding-stub",
+                "data": [{"index": i, "object": "embedding", "embedding": v.tolist()} for i, v in enumerate(vectors)],
+            }
+        finally:
+            stats.in_flight -= 1
+
+    @app.get("/stats")
+    def get_stats():
+        return {
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "throttled": stats.throttled,
+            "max_in_flight": stats.max_in_flight,
+        }
+
+    return app
+
+
+def start_in_thread(config: StubConfig, host: str = "127.0.0.1", port: int = 18765):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10.0
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("glm_stub_start_failed")
+        time.sleep(0.02)
+    return server, thread
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="本地 GLM 接口桩（/chat/completions、/embeddings）")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=18765)
+    p.add_argument("--chat-latency", default=StubConfig.chat_latency, help="fixed:ms | uniform:a,b | normal:mu,sigma | lognormal:median,sigma | exp:mean")
+    p.add_argument("--embed-latency", default=StubConfig.embed_latency)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--burst-every-s", type=float, default=0.0, help="每隔多少秒进入一次 429 窗口")
+    p.add_argument("--burst-len-s", type=float, default=0.0, help="429 窗口持续秒数")
+    p.add_argument("--retry-after-s", type=float, default=1.0)
+    p.add_argument("--embed-dim", type=int, default=1024)
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    args = _parse_args(argv)
+    config = StubConfig(
+        chat_latency=args.chat_latency,
+        embed_latency=args.embed_latency,
+        error_rate=args.error_rate,
+        burst_every_s=args.burst_every_s,
+        burst_len_s=args.burst_len_s,
+        retry_after_s=args.retry_after_s,
+        embed_dim=args.embed_dim,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def metric_direction(name: str) -> int:
+    if name.endswith("_qps") or name.endswith("_per_s") or name.endswith("_precision") or name.endswith("_recall"):
+        return 1
+    if name.endswith("_ms") or name.endswith("_s"):
+        return -1
+    return 0
+
+
+def flatten(results: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    return {f"{case}.{name}": float(v) for case, metrics in results.items() for name, v in metrics.items()}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float = 1.0) -> List[Dict[str, Any]]:
+    cur = flatten(current.get("results") or {})
+    base = flatten(baseline.get("results") or {})
+    regressions: List[Dict[str, Any]] = []
+    for key, base_v in sorted(base.items()):
+        if key not in cur:
+            continue
+        direction = metric_direction(key.rsplit(".", 1)[-1])
+        if direction == 0 or base_v <= 0:
+            continue
+        if key.endswith("_ms") and abs(cur[key] - base_v) < min_delta_ms:
+            continue
+        change = (cur[key] - base_v) / base_v
+        if -direction * change > tolerance:
+            regressions.append({"metric": key, "baseline": base_v, "current": cur[key], "change": round(change, 4)})
+    return regressions
+
+
+def write_json(path: Path, payload: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+
+
+def load_json(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CASES = ("reindex", "search", "reply", "xhs", "codecs")
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="检索与回复链路的端到端性能基准")
+    p.add_argument("--scale", default="1k", help="1k/10k/100k/1m 或具体分块数")
+    p.add_argument("--cases", default=",".join(CASES), help="逗号分隔：" + ",".join(CASES))
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--replies", type=int, default=200)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--notes", type=int, default=0, help="合成笔记数，默认 scale/50")
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--embed-mode", default="ngram", choices=["hash", "ngram"])
+    p.add_argument("--concurrency", type=int, default=1, help="suggest_reply 并发线程数")
+    p.add_argument("--llm-stub", action="store_true", help="启动本地 GLM 桩，走真实 HTTP 链路")
+    p.add_argument("--stub-port", type=int, default=18765)
+    p.add_argument("--stub-chat-latency", default="lognormal:300,0.5")
+    p.add_argument("--stub-embed-latency", default="lognormal:60,0.4")
+    p.add_argument("--stub-error-rate", type=float, default=0.0)
+    p.add_argument("--stub-burst", default="", help="429 突发窗口，格式 every_s,len_s")
+    p.add_argument("--workdir", default="", help="临时数据库与索引目录，默认自动创建")
+    p.add_argument("--out", default="", help="结果 JSON 路径，默认 benchmarks/results/<scale>.json")
+    p.add_argument("--baseline", default="", help="对比的基线 JSON")
+    p.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化比例")
+    p.add_argument("--min-delta-ms", type=float, default=1.0, help="小于该绝对差值的延迟波动不算退化")
+    p.add_argument("--save-baseline", default="", help="把本次结果另存为基线")
+    return p.parse_args(argv)
+
+
+def _configure_env(args: argparse.Namespace, workdir: Path) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{(workdir / 'bench.db').as_posix()}"
+    os.environ["VECTOR_DIR"] = str(workdir / "vectors")
+    os.environ["XHS_JSON_DIR"] = str(workdir / "xhs")
+    os.environ["GLM_API_KEY"] = ""
+    os.environ["MOCK_EMBED_DIM"] = str(args.dim)
+    os.environ["MOCK_EMBED_MODE"] = args.embed_mode
+    if args.llm_stub:
+        os.environ["GLM_API_KEY"] = "stub"
+        os.environ["GLM_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}"
+
+
+def _start_stub(args: argparse.Namespace):
+    from benchmarks.glm_stub import StubConfig, start_in_thread
+
+    every_s, _, len_s = args.stub_burst.partition(",")
+    config = StubConfig(
+        chat_latency=args.stub_chat_latency,
+        embed_latency=args.stub_embed_latency,
+        error_rate=args.stub_error_rate,
+        burst_every_s=float(every_s or 0),
+        burst_len_s=float(len_s or 0),
+        embed_dim=args.dim,
+    )
+    server, _ = start_in_thread(config, port=args.stub_port)
+    return server
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    scale = SCALES.get(args.scale.lower()) or int(args.scale)
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="reply-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    _configure_env(args, workdir)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from app.core.db import create_db_and_tables, session_scope
+
+    from benchmarks import cases as bench_cases
+    from benchmarks.datasets import make_comment_stream, seed_kb, write_xhs_snapshot
+    from benchmarks.report import compare, load_json, write_json
+
+    stub = _start_stub(args) if args.llm_stub else None
+    create_db_and_tables()
+    results = {}
+    timings = {}
+    with session_scope() as session:
+        started = time.perf_counter()
+        kb = seed_kb(session, slug=f"bench-{scale}", n_chunks=scale)
+        n_notes = args.notes or max(1, scale // 50)
+        notes, comments = make_comment_stream(n_comments=scale, n_notes=n_notes)
+        write_xhs_snapshot(workdir / "xhs", notes, comments)
+        timings["seed_s"] = round(time.perf_counter() - started, 3)
+
+        if "reindex" in cases or "search" in cases or "reply" in cases or "codecs" in cases:
+            results["reindex_kb"] = bench_cases.bench_reindex(session, kb)
+        if "search" in cases:
+            results["search"] = bench_cases.bench_search(session, kb, n_queries=args.queries)
+        if "codecs" in cases:
+            results["codecs"] = bench_cases.bench_codecs(session, kb, n_queries=args.queries)
+        if "reply" in cases:
+            results["suggest_reply"] = bench_cases.bench_suggest_reply(
+                session_scope, kb, notes, comments, n_replies=args.replies, concurrency=args.concurrency
+            )
+        if "xhs" in cases:
+            results["xhs"] = bench_cases.bench_xhs(session, notes, comments, repeat=args.repeat)
+
+    if stub is not None:
+        results["llm_stub"] = {
+            "throttled": stub.config.app.state.stats.throttled,
+            "errors": stub.config.app.state.stats.errors,
+            "max_in_flight": stub.config.app.state.stats.max_in_flight,
+        }
+        stub.should_exit = True
+
+    payload = {
+        "meta": {
+            "scale": scale,
+            "dim": args.dim,
+            "embed_mode": args.embed_mode,
+            "llm": "stub" if args.llm_stub else "template",
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.utcnow().isoformat(),
+            **timings,
+        },
+        "results": results,
+    }
+    exit_code = 0
+    if args.baseline:
+        regressions = compare(payload, load_json(Path(args.baseline)), tolerance=args.tolerance, min_delta_ms=args.min_delta_ms)
+        payload["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    out = Path(args.out) if args.out else Path(__file__).resolve().parent / "results" / f"{args.scale.lower()}.json"
+    write_json(out, payload)
+    if args.save_baseline:
+        write_json(Path(args.save_baseline), {"meta": payload["meta"], "results": results})
+
+    for case, metrics in results.items():
+        print(case, metrics)
+    for r in payload.get("regressions", []):
+        print("REGRESSION", r)
+    print("written:", out)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
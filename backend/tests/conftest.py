@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+
+    from app import models as _models
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "vector_dir", str(tmp_path / "vectors"))
+    monkeypatch.setattr(settings, "event_archive_dir", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "glm_api_key", "")
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        yield s
@@ -0,0 +1,78 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import func, select
+
+from app.modules.kb.bulk import bulk_import, decode_payload
+from app.modules.kb.models import KnowledgeChunk, KnowledgeItem, KnowledgeItemRevision
+from app.modules.kb.service import create_kb
+from app.modules.vector import embedding
+from app.modules.vector.service import search
+
+
+def _jsonl(rows):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r, ensure_ascii=False) for r in rows).encode("utf-8")
+
+
+def get_item_by_key(session, kb_id, key):
+    return session.exec(select(KnowledgeItem).where((KnowledgeItem.kb_id == kb_id) & (KnowledgeItem.key == key))).one()
+
+
+def _count(session, model):
+    return session.exec(select(func.count()).select_from(model)).one()
+
+
+def test_import_upserts_by_key_and_reports_row_errors(session):
+    kb = create_kb(session, slug="bulk", name="bulk", description="")
+    rows = [{"key": f"k{i}", "title": f"条目 {i}", "tags": ["发货"], "content": f"第 {i} 条内容。拍下后48小时内发货。"} for i in range(7)]
+    rows.insert(3, "{not json")
+    rows.append({"key": "k1", "title": "dup", "content": "重复"})
+    rows.append({"key": "", "title": "x", "content": "y"})
+    report = bulk_import(session, kb.id, decode_payload(_jsonl(rows), "jsonl"), batch_size=3)
+    assert (report.rows, report.created, report.failed) == (10, 7, 3)
+    assert [(e.line, e.error) for e in report.errors] == [(4, "invalid_record"), (9, "duplicate_key"), (10, "missing_key")]
+    assert report.rows_per_s > 0 and report.chunks == _count(session, KnowledgeChunk)
+    assert get_item_by_key(session, kb.id, "k0").tags == "发货"
+
+    again = [dict(rows[0]), dict(rows[1], content="改过的内容。"), dict(rows[2], title="新标题")]
+    report = bulk_import(session, kb.id, decode_payload(_jsonl(again), "jsonl"))
+    assert (report.created, report.updated, report.unchanged) == (0, 2, 1)
+    assert _count(session, KnowledgeItem) == 7 and _count(session, KnowledgeItemRevision) == 8
+    item = get_item_by_key(session, kb.id, "k1")
+    rev = session.get(KnowledgeItemRevision, item.current_revision_id)
+    assert (rev.revision, rev.content) == (2, "改过的内容。")
+    assert get_item_by_key(session, kb.id, "k2").title == "新标题"
+
+
+def test_csv_import_with_process_pool_and_streamed_index(session, monkeypatch):
+    kb = create_kb(session, slug="bulk-csv", name="bulk", description="")
+    calls = []
+    embed = embedding.MockHashEmbeddingClient.embed
+    monkeypatch.setattr(embedding.MockHashEmbeddingClient, "embed", lambda self, texts: calls.append(len(texts)) or embed(self, texts))
+    data = "key,title,tags,content,is_active\nship,发货,物流,拍下后48小时内发货。,1\nrefund,退款,售后,七天无理由退货。,yes\noff,下架,,旧活动,false\n"
+    report = bulk_import(session, kb.id, decode_payload(data.encode("utf-8"), "csv"), batch_size=2, workers=2, reindex=True)
+    assert (report.created, report.failed, report.published_version) == (3, 0, 1)
+    assert report.prembedded_chunks == report.chunks == 3 and calls == [2, 1]
+    assert get_item_by_key(session, kb.id, "off").is_active is False
+    _, hits = search(session, kb_id=kb.id, kb_version=1, query="拍下后多久发货", top_k=1)
+    assert hits and hits[0]["content"].startswith("拍下后48小时内发货")
+
+
+def test_failed_batch_commit_does_not_double_count(session, monkeypatch):
+    kb = create_kb(session, slug="retry", name="retry", description="")
+    rows = [{"key": f"k{i}", "title": f"条目 {i}", "content": f"第 {i} 条内容。"} for i in range(4)]
+    commit, calls = session.commit, []
+
+    def flaky_commit():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        commit()
+
+    monkeypatch.setattr(session, "commit", flaky_commit)
+    report = bulk_import(session, kb.id, decode_payload(_jsonl(rows), "jsonl"), batch_size=10)
+    assert (report.created, report.updated, report.failed) == (4, 0, 0)
+    assert report.chunks == _count(session, KnowledgeChunk) == 4
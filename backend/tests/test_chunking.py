@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.kb.chunking import ChunkConfig, chunk_text, count_tokens, split_sentences
+
+
+def test_split_sentences_keeps_chinese_punctuation():
+    assert split_sentences("一般48小时内发货。偏远地区会延长！需要加急吗？好的") == [
+        "一般48小时内发货。",
+        "偏远地区会延长！",
+        "需要加急吗？",
+        "好的",
+    ]
+
+
+def test_count_tokens_mixes_cjk_and_words():
+    assert count_tokens("发货") == 2
+    assert count_tokens("hello") == 2
+    assert count_tokens("") == 0
+
+
+def test_long_paragraph_respects_max_tokens():
+    cfg = ChunkConfig(target_tokens=50, max_tokens=80, overlap_tokens=10)
+    text = "。".join(f"第{i}句说明产品的使用方法和注意事项" for i in range(40)) + "。"
+    chunks = chunk_text(text, cfg)
+    assert len(chunks) > 1
+    assert all(c.token_count <= cfg.max_tokens for c in chunks)
+    assert all(c.token_count == count_tokens(c.text) for c in chunks)
+    assert chunks[0].text[-8:] in chunks[1].text
+
+
+def test_one_line_facts_are_merged():
+    cfg = ChunkConfig(target_tokens=60, max_tokens=100, overlap_tokens=0)
+    text = "\n\n".join(f"事实{i}：全国包邮。" for i in range(12))
+    chunks = chunk_text(text, cfg)
+    assert len(chunks) < 12
+    assert "".join(c.text for c in chunks).count("包邮") == 12
+
+
+def test_oversized_sentence_is_hard_split():
+    cfg = ChunkConfig(target_tokens=20, max_tokens=30, overlap_tokens=0)
+    chunks = chunk_text("很" * 100, cfg)
+    assert [c.token_count for c in chunks] == [30, 30, 30, 10]
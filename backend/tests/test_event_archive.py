@@ -0,0 +1,69 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import func, select
+
+from app.core.config import settings
+from app.modules.monitor.archive import archive_events, list_partitions, partition_path
+from app.modules.monitor.models import ReplyEvent
+from app.modules.monitor.service import note_top_leads, overview
+from app.modules.vector.models import VectorQueryLog
+
+
+NOW = datetime(2024, 6, 15, 12, 0, 0)
+
+
+def _seed(session):
+    kb_id = uuid4()
+    for i, days_ago in enumerate([1, 2, 40, 45, 70, 100]):
+        session.add(
+            ReplyEvent(
+                kb_id=kb_id,
+                kb_version=1,
+                comment_id=f"c{i}",
+                note_id="n1",
+                intent="question" if i % 2 else "buy_intent",
+                lead_score=10 * i,
+                lead_level="high" if i >= 4 else "low",
+                latency_ms=100 + i,
+                llm_used=i % 3 == 0,
+                created_at=NOW - timedelta(days=days_ago),
+            )
+        )
+        session.add(VectorQueryLog(kb_id=kb_id, kb_version=1, query="q", top_k=3, provider="p", model="m", created_at=NOW - timedelta(days=days_ago)))
+    session.commit()
+
+
+def test_archive_moves_old_rows_to_monthly_partitions(session):
+    _seed(session)
+    before = overview(session, since=None, until=None)
+
+    report = archive_events(session, hot_days=30, batch_size=3, now=NOW)
+    assert report.moved == {"replyevent": 4, "vectorquerylog": 4}
+    assert list_partitions("replyevent") == ["2024-03", "2024-04", "2024-05"]
+    assert session.exec(select(func.count()).select_from(ReplyEvent)).one() == 2
+
+    after = overview(session, since=None, until=None)
+    assert {k: v for k, v in after.items() if k != "generated_at"} == {k: v for k, v in before.items() if k != "generated_at"}
+    assert list_partitions("replyevent", since=NOW - timedelta(days=10)) == []
+    assert overview(session, since=NOW - timedelta(days=50), until=None)["total_replies"] == 4
+    aware = (NOW - timedelta(days=50)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=8)))
+    assert list_partitions("replyevent", since=aware, until=aware) == ["2024-04"]
+    assert overview(session, since=aware, until=None)["total_replies"] == 4
+    assert [r.comment_id for r in note_top_leads(session, "n1", 3)] == ["c5", "c4", "c3"]
+
+    assert archive_events(session, hot_days=30, now=NOW).moved == {"replyevent": 0, "vectorquerylog": 0}
+
+
+def test_archive_drops_partitions_past_retention(session, monkeypatch):
+    _seed(session)
+    monkeypatch.setattr(settings, "event_archive_keep_months", 2)
+    report = archive_events(session, hot_days=30, now=NOW)
+    assert sorted(report.dropped) == ["replyevent/2024-03", "vectorquerylog/2024-03"]
+    assert not os.path.exists(partition_path("replyevent", "2024-03"))
+    assert list_partitions("vectorquerylog") == ["2024-04", "2024-05"]
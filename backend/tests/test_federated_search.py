@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.kb.service import create_item, create_kb, publish_kb
+from app.modules.vector.service import KbTarget, federated_search, reindex_kb
+
+
+def _seed(session, slug, rows):
+    kb = create_kb(session, slug=slug, name=slug, description="")
+    for key, content in rows:
+        create_item(session, kb_id=kb.id, key=key, title=key, tags="", content=content, source="test")
+    version = publish_kb(session, kb.id)
+    reindex_kb(session, kb_id=kb.id, kb_version=version)
+    return kb
+
+
+def test_federated_search_merges_with_provenance(session):
+    brand = _seed(session, "brand", [("cream", "面霜 质地 滋润"), ("serum", "精华 吸收 快")])
+    shipping = _seed(session, "shipping", [("ship", "发货 物流 48 小时"), ("refund", "退货 退款 流程")])
+
+    _, hits = federated_search(
+        session,
+        targets=[KbTarget(kb_id=brand.id), KbTarget(kb_id=shipping.id, weight=2.0)],
+        query="发货 物流",
+        top_k=3,
+    )
+    assert len(hits) == 3
+    assert hits[0]["kb_id"] == shipping.id
+    assert hits[0]["content"] == "发货 物流 48 小时"
+    assert {h["kb_id"] for h in hits} == {brand.id, shipping.id}
+    assert all(h["kb_version"] == 1 for h in hits)
+    assert hits == sorted(hits, key=lambda h: h["score"], reverse=True)
+
+
+def test_federated_search_skips_unindexed_kb(session):
+    brand = _seed(session, "brand", [("cream", "面霜 质地 滋润")])
+    empty = create_kb(session, slug="empty", name="empty", description="")
+    _, hits = federated_search(session, targets=[KbTarget(kb_id=brand.id), KbTarget(kb_id=empty.id)], query="面霜", top_k=5)
+    assert [h["kb_id"] for h in hits] == [brand.id]
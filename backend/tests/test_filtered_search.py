@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.kb.service import create_item, create_kb, publish_kb, update_item
+from app.modules.vector import faiss_store
+from app.modules.vector import service as vector_service
+from app.modules.vector.filters import FilterIndex, SearchFilter
+from app.modules.vector.service import reindex_kb, search
+
+
+def _seed(session):
+    kb = create_kb(session, slug="brand", name="brand", description="")
+    items = {}
+    for key, tags, content in [
+        ("ship", "物流,发货", "一般 48 小时内发货"),
+        ("remote", "物流", "偏远地区 物流 时效延长"),
+        ("refund", "售后", "支持 七天 无理由 退货"),
+        ("promo", "优惠，活动", "大促 领券 满减"),
+    ]:
+        items[key] = create_item(session, kb_id=kb.id, key=key, title=key, tags=tags, content=content, source="test")
+    version = publish_kb(session, kb.id)
+    reindex_kb(session, kb_id=kb.id, kb_version=version)
+    return kb, items
+
+
+def test_tag_filter_restricts_hits(session):
+    kb, _ = _seed(session)
+    _, hits = search(session, kb_id=kb.id, query="退货", top_k=5, kb_version=None, filters=SearchFilter(tags=("物流",)))
+    assert {h["content"] for h in hits} == {"一般 48 小时内发货", "偏远地区 物流 时效延长"}
+
+    _, hits = search(session, kb_id=kb.id, query="退货", top_k=5, kb_version=None, filters=SearchFilter(tags=("不存在",)))
+    assert hits == []
+
+
+def test_item_filter_and_deactivation_apply_without_reindex(session, monkeypatch):
+    kb, items = _seed(session)
+    only = SearchFilter(item_ids=(items["refund"].id, items["promo"].id))
+    _, hits = search(session, kb_id=kb.id, query="大促", top_k=5, kb_version=None, filters=only)
+    assert {h["content"] for h in hits} == {"支持 七天 无理由 退货", "大促 领券 满减"}
+
+    update_item(session, items["promo"].id, title=None, tags=None, is_active=False)
+    _, hits = search(session, kb_id=kb.id, query="大促", top_k=5, kb_version=None, filters=only)
+    assert [h["content"] for h in hits] == ["支持 七天 无理由 退货"]
+
+    calls = []
+    inactive = vector_service.inactive_item_ids
+    monkeypatch.setattr(vector_service, "inactive_item_ids", lambda *a: calls.append(a) or inactive(*a))
+    search(session, kb_id=kb.id, query="大促", top_k=5, kb_version=None)
+    assert calls == []
+
+    update_item(session, items["promo"].id, title=None, tags=None, is_active=True)
+    _, hits = search(session, kb_id=kb.id, query="大促", top_k=5, kb_version=None, filters=only)
+    assert len(calls) == 1 and {h["content"] for h in hits} == {"支持 七天 无理由 退货", "大促 领券 满减"}
+
+
+def test_numpy_backend_honours_bitmap(monkeypatch):
+    monkeypatch.setattr(faiss_store, "_HAS_FAISS", False)
+    store = faiss_store.FaissVectorStore(dim=4)
+    store.add(np.eye(4, dtype=np.float32))
+    fi = FilterIndex.build([("a", "x"), ("b", "y"), ("c", "x"), ("d", "")])
+    hits = store.search(np.ones(4, dtype=np.float32), top_k=4, allowed=fi.allowed(SearchFilter(tags=("x",))))
+    assert sorted(h.pos for h in hits) == [0, 2]
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.modules.reply.intent_model import IntentModel, classify_intents, train_intent_model
+from app.modules.vector import context
+from app.modules.vector.embedding import MockHashEmbeddingClient
+
+TRAIN = [
+    ("求链接 同款", "buy_intent"),
+    ("同款哪里买", "buy_intent"),
+    ("同款多少钱", "buy_intent"),
+    ("蹲一个同款链接", "buy_intent"),
+    ("好看爱了", "praise"),
+    ("太美了 好看", "praise"),
+    ("绝了 好看到哭", "praise"),
+    ("喜欢 好看", "praise"),
+]
+
+
+def test_centroid_model_handles_paraphrase_with_regex_override(tmp_path, monkeypatch):
+    client = MockHashEmbeddingClient(dim=256, mode="ngram")
+    monkeypatch.setattr(context, "get_embedding_client", lambda: client)
+    monkeypatch.setattr("app.modules.vector.embedding.get_embedding_client", lambda: client)
+
+    model = train_intent_model([t for t, _ in TRAIN], [l for _, l in TRAIN], embedder=client)
+    assert model.labels == ["buy_intent", "praise"] and model.counts == [4, 4]
+    path = str(tmp_path / "intent.npz")
+    model.save(path)
+    assert IntentModel.load(path).labels == model.labels
+
+    texts = ["求同款", "美哭了", "退货怎么弄", "今天天气一般", ""]
+    monkeypatch.setattr(settings, "intent_model_path", "")
+    assert [r.intent for r in classify_intents(texts)] == ["chat", "chat", "after_sales", "chat", "empty"]
+
+    monkeypatch.setattr(settings, "intent_model_path", path)
+    results = classify_intents(texts)
+    assert [r.intent for r in results][:3] == ["buy_intent", "praise", "after_sales"]
+    assert results[0].reasons[0] == "centroid"
+    assert results[2].reasons == ["after_sales_keyword"]
+    assert results[3].intent == "chat" and results[4].intent == "empty"
@@ -0,0 +1,48 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.modules.kb.models import KnowledgeItem
+from app.modules.kb.service import create_item, create_kb, create_revision, list_items, list_kbs, list_revisions
+
+
+def test_item_pages_are_stable_across_equal_timestamps(session):
+    kb = create_kb(session, slug="list", name="list", description="")
+    ids = [create_item(session, kb_id=kb.id, key=f"k{i}", title="t", tags="", content="内容", source="").id for i in range(7)]
+    same = datetime(2024, 1, 1)
+    for item_id in ids[:4]:
+        row = session.get(KnowledgeItem, item_id)
+        row.updated_at = same
+        session.add(row)
+    session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_items(session, kb_id=kb.id, is_active=None, limit=3, cursor=cursor)
+        seen.extend(it.id for it in page)
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids) and len(seen) == 7
+
+    kbs, cursor = list_kbs(session, limit=1)
+    assert [k.id for k in kbs] == [kb.id] and cursor is None
+    with pytest.raises(ValueError, match="invalid_cursor"):
+        list_items(session, kb_id=kb.id, is_active=None, cursor="not-a-cursor")
+
+
+def test_revision_listing_skips_content_by_default(session):
+    kb = create_kb(session, slug="revs", name="revs", description="")
+    item = create_item(session, kb_id=kb.id, key="k", title="t", tags="", content="v1", source="")
+    for v in range(2, 6):
+        create_revision(session, item.id, content=f"v{v}", source="")
+
+    page, cursor = list_revisions(session, item.id, limit=2)
+    assert [r["revision"] for r in page] == [5, 4] and "content" not in page[0]
+    page, cursor = list_revisions(session, item.id, limit=2, cursor=cursor, include_content=True)
+    assert [(r["revision"], r["content"]) for r in page] == [(3, "v3"), (2, "v2")]
+    page, cursor = list_revisions(session, item.id, limit=2, cursor=cursor)
+    assert [r["revision"] for r in page] == [1] and cursor is None
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.modules.leads.batch import aiter_lines, score_stream
+from app.modules.leads.service import score_lead
+
+
+def _run(lines, chunk_size):
+    payload = [json.dumps(x, ensure_ascii=False) if isinstance(x, dict) else x for x in lines]
+
+    async def collect():
+        return b"".join([part async for part in score_stream(payload, chunk_size=chunk_size)])
+
+    return [json.loads(line) for line in asyncio.run(collect()).decode("utf-8").splitlines()]
+
+
+TEXTS = ["链接发我，现在买", "多少钱？包邮吗", "垃圾，别买", "好用爱了", "已经买了，回购"]
+
+
+def _records(n):
+    return [{"id": i, "text": TEXTS[i % len(TEXTS)], "note_id": f"n{i % 2}", "user_id": f"u{i % 3}"} for i in range(n)]
+
+
+def test_batch_matches_single_scoring_and_aggregates(monkeypatch):
+    monkeypatch.setattr(settings, "lead_batch_workers", 0)
+    records = _records(10)
+    out = _run(records[:4] + ["{broken", '{"text": ""}'] + records[4:], chunk_size=3)
+    leads = [r for r in out if r["type"] == "lead"]
+    assert [r["id"] for r in leads] == list(range(10))
+    for r in leads:
+        expected = score_lead(records[r["id"]]["text"])
+        assert (r["score"], r["level"], r["signals"]) == (expected.score, expected.level, expected.signals)
+    assert [(r["line"], r["error"]) for r in out if r["type"] == "error"] == [(5, "invalid_json"), (6, "missing_text")]
+
+    notes = {r["note_id"]: r for r in out if r["type"] == "note"}
+    assert notes["n0"]["count"] == 5 and notes["n0"]["max_score"] == max(r["score"] for r in leads if r["note_id"] == "n0")
+    users = {r["user_id"]: r for r in out if r["type"] == "user"}
+    assert sum(u["count"] for u in users.values()) == 10
+    summary = out[-1]
+    assert summary["type"] == "summary" and (summary["rows"], summary["scored"], summary["errors"]) == (12, 10, 2)
+
+
+def test_batch_process_pool_keeps_input_order(monkeypatch):
+    monkeypatch.setattr(settings, "lead_batch_workers", 2)
+    out = _run(_records(50), chunk_size=7)
+    assert [r["id"] for r in out if r["type"] == "lead"] == list(range(50))
+
+
+def test_stream_scores_chunks_while_input_is_still_arriving(monkeypatch):
+    monkeypatch.setattr(settings, "lead_batch_workers", 0)
+    body = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in _records(6)).encode("utf-8")
+    parts = [body[i : i + 7] for i in range(0, len(body), 7)]
+    received = []
+
+    async def upload():
+        for i, part in enumerate(parts):
+            received.append(i)
+            yield part
+            await asyncio.sleep(0)
+
+    async def first_output():
+        stream = score_stream(aiter_lines(upload()), chunk_size=1)
+        first = await stream.__anext__()
+        at_first = len(received)
+        rest = b"".join([part async for part in stream])
+        return first + rest, at_first
+
+    out, at_first = asyncio.run(first_output())
+    rows = [json.loads(line) for line in out.decode("utf-8").splitlines()]
+    assert [r["id"] for r in rows if r["type"] == "lead"] == list(range(6))
+    assert at_first < len(parts)
+
+
+def test_batch_endpoint_streams_request_body():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    body = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in _records(20)) + "{broken"
+    resp = TestClient(app).post("/api/leads/score/batch?chunk_size=4", content=body.encode("utf-8"))
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert resp.status_code == 200 and rows[-1]["rows"] == 21 and rows[-1]["errors"] == 1
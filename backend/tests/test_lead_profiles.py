@@ -0,0 +1,108 @@
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.modules.kb.service import create_kb
+from app.modules.monitor import service as monitor_service
+from app.modules.monitor.models import LeadProfile
+from app.modules.monitor.service import decayed_score, log_reply_event, top_lead_users
+
+
+def test_profiles_track_users_across_notes(session):
+    kb = create_kb(session, slug="profiles", name="profiles", description="")
+    events = [("u1", "n1", 40), ("u1", "n2", 90), ("u1", "n2", 30), ("u2", "n1", 70), ("u3", "n3", 10), ("", "n3", 99)]
+    for i, (user_id, note_id, score) in enumerate(events):
+        log_reply_event(session, kb.id, 1, f"c{i}", note_id, "chat", score, "high", 3, False, {}, user_id=user_id)
+
+    rows = top_lead_users(session, limit=10)
+    assert [r["user_id"] for r in rows] == ["u1", "u2", "u3"]
+    assert (rows[0]["max_score"], rows[0]["event_count"], rows[0]["note_count"], rows[0]["last_note_id"]) == (90, 3, 2, "n2")
+    assert abs(rows[0]["decayed_score"] - 160) < 0.5
+    assert [r["user_id"] for r in top_lead_users(session, limit=10, min_notes=2)] == ["u1"]
+
+
+def test_decayed_order_prefers_recent_activity(session, monkeypatch):
+    kb = create_kb(session, slug="decay", name="decay", description="")
+    now = datetime.utcnow()
+    clock = {"t": now - timedelta(hours=72 * 3)}
+
+    class _Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return clock["t"]
+
+    monkeypatch.setattr(monitor_service, "datetime", _Clock)
+    log_reply_event(session, kb.id, 1, "c1", "n1", "chat", 100, "high", 3, False, {}, user_id="old")
+    clock["t"] = now
+    log_reply_event(session, kb.id, 1, "c2", "n1", "chat", 20, "medium", 3, False, {}, user_id="new")
+
+    assert [r["user_id"] for r in top_lead_users(session, limit=2, order="max")] == ["old", "new"]
+    rows = top_lead_users(session, limit=2, order="decayed")
+    assert [r["user_id"] for r in rows] == ["new", "old"]
+    assert abs(rows[1]["decayed_score"] - 12.5) < 0.1
+    assert abs(decayed_score(session.get(LeadProfile, "old").decay_rank, now) - 12.5) < 0.1
+
+
+def test_top_users_read_the_sorted_index(session):
+    kb = create_kb(session, slug="plan", name="plan", description="")
+    for i in range(20):
+        log_reply_event(session, kb.id, 1, f"c{i}", f"n{i % 4}", "chat", i * 3, "low", 3, False, {}, user_id=f"u{i % 7}")
+
+    engine = session.get_bind()
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM leadprofile" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        top_lead_users(session, limit=3, order="max")
+        top_lead_users(session, limit=3, order="decayed")
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert len(captured) == 2
+    raw = engine.raw_connection()
+    try:
+        for statement, parameters in captured:
+            plan = " | ".join(row[3] for row in raw.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall())
+            assert "USING INDEX" in plan and "TEMP B-TREE" not in plan, plan
+    finally:
+        raw.close()
+
+
+def test_profile_update_is_a_single_upsert(session):
+    kb = create_kb(session, slug="upsert", name="upsert", description="")
+    log_reply_event(session, kb.id, 1, "c1", "n1", "chat", 40, "low", 3, False, {}, user_id="u1")
+
+    engine = session.get_bind()
+    captured = []
+    listener = lambda conn, cursor, statement, *rest: captured.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        log_reply_event(session, kb.id, 1, "c2", "n1", "chat", 60, "high", 3, False, {}, user_id="u1")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    profile_sql = [s for s in captured if re.search(r"\bleadprofile\b", s)]
+    assert len(profile_sql) == 1 and "ON CONFLICT" in profile_sql[0] and not profile_sql[0].lstrip().startswith("SELECT")
+    session.expire_all()
+    profile = session.get(LeadProfile, "u1")
+    assert (profile.max_score, profile.event_count, profile.note_count, profile.last_level) == (60, 2, 1, "high")
+    assert abs(decayed_score(profile.decay_rank, profile.last_seen_at) - 100) < 0.01
+
+
+def test_upsert_math_does_not_need_sqlite_math_extension(session):
+    raw = session.get_bind().raw_connection()
+    try:
+        assert raw.cursor().execute("SELECT log2(8), pow(2, 3), log2(0)").fetchone() == (3.0, 8.0, None)
+    finally:
+        raw.close()
+    assert event.contains(Engine, "connect", monitor_service._register_math_functions)
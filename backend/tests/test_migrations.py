@@ -0,0 +1,91 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+
+from app import models as _models
+from app.core.migrate import applied_migrations, run_migrations, start_backfills
+from app.modules.kb.chunking import count_tokens
+
+
+def _old_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX "ix_replyevent_note_id_lead_score_created_at"'))
+        conn.execute(text("CREATE INDEX ix_replyevent_intent ON replyevent (intent)"))
+        conn.execute(text('DROP INDEX "ix_replyevent_user_id_created_at"'))
+        conn.execute(text("ALTER TABLE replyevent DROP COLUMN user_id"))
+        conn.execute(text("ALTER TABLE knowledgechunk DROP COLUMN token_count"))
+        for i in range(5):
+            conn.execute(
+                text("INSERT INTO knowledgechunk (id, revision_id, chunk_index, content, created_at) VALUES (:id, 'r', :i, :c, '2024-01-01')"),
+                {"id": f"{i:032x}", "i": i, "c": "发货时间 " * (i + 1)},
+            )
+    return engine
+
+
+def test_backfill_runs_in_batches_and_resumes(tmp_path):
+    engine = _old_database(tmp_path)
+
+    first = run_migrations(engine, batch_size=2, max_batches=1)
+    assert first.applied == [] and first.backfills[0].rows == 2 and not first.backfills[0].done
+    assert applied_migrations(engine) == {}
+
+    second = run_migrations(engine, batch_size=2)
+    backfill = second.backfills[0]
+    assert backfill.resumed_from > 0 and backfill.rows == 5 and backfill.done
+    assert second.applied == [
+        "m0001_chunk_token_count",
+        "m0002_vector_index_codec_pinned",
+        "m0003_composite_indexes",
+        "m0004_reply_event_user_id",
+    ]
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT content, token_count FROM knowledgechunk")).all()
+    assert all(n == count_tokens(c) > 0 for c, n in rows)
+
+    names = {ix["name"] for ix in inspect(engine).get_indexes("replyevent")}
+    assert names == {"ix_replyevent_created_at", "ix_replyevent_note_id_lead_score_created_at", "ix_replyevent_user_id_created_at"}
+    assert "user_id" in {c["name"] for c in inspect(engine).get_columns("replyevent")}
+    assert run_migrations(engine).skipped == second.applied
+
+
+def test_concurrent_runs_do_not_collide(tmp_path):
+    engine = _old_database(tmp_path)
+    errors, reports = [], []
+
+    def _run():
+        try:
+            reports.append(run_migrations(create_engine(f"sqlite:///{tmp_path / 'old.db'}")))
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(reports) == 4
+    assert set(applied_migrations(engine)) == set(reports[0].applied + reports[0].skipped)
+    assert len(applied_migrations(engine)) == 4
+
+
+def test_deferred_run_applies_schema_and_leaves_backfills(tmp_path):
+    engine = _old_database(tmp_path)
+
+    report = run_migrations(engine, defer_backfills=True)
+    assert report.deferred == ["m0001_chunk_token_count"]
+    assert report.applied == ["m0002_vector_index_codec_pinned", "m0003_composite_indexes", "m0004_reply_event_user_id"]
+    assert "user_id" in {c["name"] for c in inspect(engine).get_columns("replyevent")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT max(token_count) FROM knowledgechunk")).scalar() == 0
+
+    start_backfills(engine).join(10)
+    assert set(applied_migrations(engine)) == set(report.applied + report.deferred)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT min(token_count) FROM knowledgechunk")).scalar() > 0
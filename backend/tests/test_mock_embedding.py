@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.vector.embedding import MockHashEmbeddingClient
+from app.modules.vector.synthetic import make_clustered_corpus
+
+
+def test_hash_mode_is_deterministic_and_normalized():
+    texts = ["怎么买", "退货怎么处理", "怎么买"]
+    a = MockHashEmbeddingClient(dim=64).embed(texts)
+    b = MockHashEmbeddingClient(dim=64, cache_size=0).embed(texts)
+    assert a.shape == (3, 64)
+    assert a.dtype == np.float32
+    assert np.allclose(a, b)
+    assert np.allclose(a[0], a[2])
+    assert np.allclose(np.linalg.norm(a, axis=1), 1.0, atol=1e-5)
+
+
+def test_batch_matches_single_text():
+    client = MockHashEmbeddingClient(dim=32, mode="ngram", cache_size=0)
+    batch = client.embed(["发货 时效", "售后 退换", ""])
+    assert np.allclose(batch[1], client.embed(["售后 退换"])[0])
+    assert np.allclose(batch[2], client.embed([""])[0])
+
+
+def test_ngram_mode_clusters_by_topic():
+    corpus = make_clustered_corpus(n_docs=400, n_topics=4, n_queries=20, seed=7)
+    client = MockHashEmbeddingClient(dim=128, mode="ngram")
+    docs = client.embed(corpus.texts)
+    queries = client.embed(corpus.queries)
+    top1 = np.argmax(queries @ docs.T, axis=1)
+    agree = float(np.mean(corpus.labels[top1] == corpus.query_labels))
+    assert agree >= 0.9
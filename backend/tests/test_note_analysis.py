@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.modules.reply.intent import detect_intent
+from app.modules.xhs import analysis
+from app.modules.xhs.service import analyze_note, list_comments
+
+TEXTS = ["链接在哪里买", "质量太差要退货", "好用爱了", "垃圾别买", "油皮能用吗", "今天天气不错"]
+
+
+def _write_snapshot(tmp_path, comments, bump):
+    d = tmp_path / "xhs"
+    d.mkdir(exist_ok=True)
+    (d / "search_contents_2026-01-01.json").write_text("[]", encoding="utf-8")
+    path = d / "search_comments_2026-01-01.json"
+    path.write_text(json.dumps(comments, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(bump * 10**9, bump * 10**9))
+
+
+def _expected(comments, note_id):
+    return dict(Counter(detect_intent(c["content"]).intent for c in comments if c["note_id"] == note_id))
+
+
+def test_analysis_is_cached_and_incremental(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "xhs_json_dir", str(tmp_path / "xhs"))
+    comments = [
+        {"comment_id": f"c{i}", "note_id": "n1" if i % 5 else "n2", "content": f"{TEXTS[i % len(TEXTS)]} {i}", "like_count": str(i % 97)}
+        for i in range(3000)
+    ]
+    _write_snapshot(tmp_path, comments, 1)
+
+    calls = []
+    classify = analysis._classify
+    monkeypatch.setattr(analysis, "_classify", lambda texts: calls.append(len(texts)) or classify(texts))
+
+    first = analyze_note(session, "n1")
+    assert first["total_comments"] == 2400 and first["classified"] == 2400 and not first["cached"]
+    assert first["intent_counts"] == _expected(comments, "n1")
+    assert [c["comment_id"] for c in first["top_comments"]] == [c["comment_id"] for c in list_comments("n1", 0, 10, "like", "")[0]]
+
+    second = analyze_note(session, "n1")
+    assert second["cached"] and second["intent_counts"] == first["intent_counts"] and len(calls) == 1
+
+    comments[1]["content"] = "怎么买 多少钱"
+    comments = [c for c in comments if c["comment_id"] != "c2"]
+    comments.append({"comment_id": "c-new", "note_id": "n1", "content": "过敏了要退款", "like_count": "0"})
+    _write_snapshot(tmp_path, comments, 2)
+
+    third = analyze_note(session, "n1")
+    assert third["classified"] == 2 and calls[-1] == 2
+    assert third["total_comments"] == 2400 and third["intent_counts"] == _expected(comments, "n1")
+
+    report = analysis.sync_snapshot(session)
+    assert (report.notes, report.cached_notes, report.classified) == (2, 1, 600)
+    assert analyze_note(session, "n2")["intent_counts"] == _expected(comments, "n2")
+
+
+def test_unchanged_note_skips_reclassification_on_new_snapshot(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "xhs_json_dir", str(tmp_path / "xhs"))
+    comments = [{"comment_id": f"c{i}", "note_id": f"n{i % 2}", "content": TEXTS[i % len(TEXTS)]} for i in range(20)]
+    _write_snapshot(tmp_path, comments, 1)
+    analysis.sync_snapshot(session)
+
+    comments.append({"comment_id": "c99", "note_id": "n1", "content": "求链接"})
+    _write_snapshot(tmp_path, comments, 2)
+    report = analysis.sync_snapshot(session)
+    assert (report.cached_notes, report.classified) == (0, 1)
+    assert analyze_note(session, "n0")["cached"]
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.vector import context
+from app.modules.vector.context import combine_query_vectors, comment_query_vectors, note_vector
+from app.modules.vector.embedding import MockHashEmbeddingClient
+
+
+class _CountingClient(MockHashEmbeddingClient):
+    def __post_init__(self):
+        super().__post_init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+def test_note_context_embedded_once_per_note(monkeypatch):
+    client = _CountingClient(dim=32, mode="ngram")
+    monkeypatch.setattr(context, "get_embedding_client", lambda: client)
+    context._note_cache.clear()
+
+    first = comment_query_vectors("n1", "面霜测评", "秋冬保湿", ["怎么买", "油皮能用吗"])
+    second = comment_query_vectors("n1", "面霜测评", "秋冬保湿", ["多少钱"])
+    assert client.calls == [["怎么买", "油皮能用吗"], ["面霜测评\n秋冬保湿"], ["多少钱"]]
+    assert len(first) == 2 and len(second) == 1
+    assert np.allclose([np.linalg.norm(v) for v in first + second], 1.0, atol=1e-5)
+
+    comment_query_vectors("n1", "面霜测评", "新版描述", ["多少钱"])
+    assert client.calls[-1] == ["面霜测评\n新版描述"]
+
+
+def test_combine_weights_note_context():
+    comment = np.asarray([[1.0, 0.0]], dtype=np.float32)
+    note = np.asarray([0.0, 1.0], dtype=np.float32)
+    assert np.allclose(combine_query_vectors(comment, None), comment)
+    mixed = combine_query_vectors(comment, note, note_weight=0.25)[0]
+    assert mixed[0] > mixed[1] > 0
+    assert note_vector("n2", "", "") is None
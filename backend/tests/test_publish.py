@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from sqlmodel import select
+
+from app.modules.kb.models import KnowledgeChunk, KnowledgeItemRevision
+from app.modules.kb.service import create_item, create_kb, create_revision, publish_kb, publish_revision
+from app.modules.vector import embedding
+from app.modules.vector.faiss_store import FaissVectorStore
+from app.modules.vector.models import VectorRecord
+from app.modules.vector.service import reindex_kb
+
+
+def test_publish_stamps_current_revisions_and_reindexes_only_changes(session, monkeypatch):
+    kb = create_kb(session, slug="pub", name="pub", description="")
+    items = [create_item(session, kb_id=kb.id, key=f"k{i}", title=f"t{i}", tags="", content=f"条目 {i} 的内容。", source="") for i in range(3)]
+    v1 = publish_kb(session, kb.id)
+    first = reindex_kb(session, kb_id=kb.id, kb_version=v1)
+
+    rev = create_revision(session, items[1].id, content="条目 1 改过了。", source="")
+    publish_revision(session, items[1].id, rev.id)
+    calls = []
+    embed = embedding.MockHashEmbeddingClient.embed
+    monkeypatch.setattr(embedding.MockHashEmbeddingClient, "embed", lambda self, texts: calls.append(list(texts)) or embed(self, texts))
+    v2 = publish_kb(session, kb.id)
+    second = reindex_kb(session, kb_id=kb.id, kb_version=v2, reuse_previous=True)
+    assert calls == [["条目 1 改过了。"]]
+
+    stamped = session.exec(select(KnowledgeItemRevision.published_version, KnowledgeItemRevision.content)).all()
+    assert dict((c, v) for v, c in stamped) == {"条目 0 的内容。": 2, "条目 1 的内容。": 1, "条目 1 改过了。": 2, "条目 2 的内容。": 2}
+    vectors = FaissVectorStore.load(second.index_path).vectors()
+    rows = session.exec(
+        select(VectorRecord.vector_pos, KnowledgeChunk.content)
+        .join(KnowledgeChunk, KnowledgeChunk.id == VectorRecord.chunk_id)
+        .where(VectorRecord.kb_version == v2)
+        .order_by(VectorRecord.vector_pos)
+    ).all()
+    fresh = embed(embedding.MockHashEmbeddingClient(dim=first.dim), [c for _, c in rows])
+    assert len(rows) == 3 and np.allclose(vectors, fresh, atol=1e-6)
+
+
+def test_reuse_skips_vectors_from_a_different_dimension(session, monkeypatch):
+    kb = create_kb(session, slug="dim", name="dim", description="")
+    create_item(session, kb_id=kb.id, key="k", title="t", tags="", content="维度变化的条目。", source="")
+    v1 = publish_kb(session, kb.id)
+    assert reindex_kb(session, kb_id=kb.id, kb_version=v1).dim == 384
+
+    monkeypatch.setenv("MOCK_EMBED_DIM", "64")
+    chunk_id = session.exec(select(KnowledgeChunk.id)).one()
+    v2 = publish_kb(session, kb.id)
+    second = reindex_kb(session, kb_id=kb.id, kb_version=v2, reuse_previous=True, precomputed={chunk_id: np.ones(384, dtype=np.float32)})
+    assert second.dim == 64 and FaissVectorStore.load(second.index_path).vectors().shape == (1, 64)
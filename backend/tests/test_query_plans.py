@@ -0,0 +1,47 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event
+
+from app.modules.kb.service import create_item, create_kb, list_items, list_revisions, publish_kb
+from app.modules.monitor.service import log_reply_event, note_top_leads, overview
+from app.modules.vector.service import reindex_kb, search
+
+
+def test_hot_queries_use_indexes(session):
+    kb = create_kb(session, slug="plans", name="plans", description="")
+    items = [create_item(session, kb_id=kb.id, key=f"k{i}", title="t", tags="x", content=f"内容 {i}", source="") for i in range(5)]
+    for i in range(5):
+        log_reply_event(session, kb.id, 1, f"c{i}", "n1", "chat", i, "low", 3, False, {})
+
+    engine = session.get_bind()
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        version = publish_kb(session, kb.id)
+        reindex_kb(session, kb_id=kb.id, kb_version=version)
+        search(session, kb_id=kb.id, query="内容", top_k=3, kb_version=None)
+        list_items(session, kb_id=kb.id, is_active=None)
+        list_revisions(session, items[0].id)
+        overview(session, since=datetime.utcnow() - timedelta(days=1), until=None)
+        note_top_leads(session, "n1", 5)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert len(captured) > 10
+    raw = engine.raw_connection()
+    try:
+        for statement, parameters in captured:
+            plan = [row[3] for row in raw.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()]
+            scans = [p for p in plan if p.startswith("SCAN ") and "CONSTANT ROW" not in p]
+            assert not scans, (" ".join(statement.split())[:200], plan)
+    finally:
+        raw.close()
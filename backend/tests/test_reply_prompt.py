@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.reply.prompt import build_reply_prompt, dedupe_hits, pack_hits
+
+
+def _hit(content, score, tokens=0):
+    return {"content": content, "score": score, "token_count": tokens}
+
+
+def test_near_duplicate_hits_are_dropped_keeping_best_score():
+    hits = [
+        _hit("一般 48 小时内发货，偏远地区时效可能延长。", 0.5),
+        _hit("一般48小时内发货，偏远地区时效可能延长！", 0.9),
+        _hit("支持按平台规则处理退换。", 0.7),
+    ]
+    kept, dropped = dedupe_hits(hits, threshold=0.8)
+    assert dropped == 1
+    assert [h["score"] for h in kept] == [0.9, 0.7]
+
+
+def test_pack_hits_stays_within_budget():
+    hits = [_hit("a", 0.9, 300), _hit("b", 0.8, 400), _hit("c", 0.7, 200)]
+    packed, used = pack_hits(hits, budget_tokens=550)
+    assert [h["content"] for h in packed] == ["a", "c"]
+    assert used == 500
+
+
+def test_prompt_records_token_stats_and_uses_intent_budget():
+    hits = [_hit("发货" * 200, 0.9), _hit("包邮。", 0.8)]
+    prompt = build_reply_prompt("好看", "标题", "内容" * 500, "praise", hits, inject_sales=True)
+    stats = prompt.stats()
+    assert [h["content"] for h in prompt.used_hits] == ["包邮。"]
+    assert stats["knowledge_trimmed"] == 1
+    assert stats["knowledge_tokens"] == 3
+    assert stats["prompt_tokens"] < 400
+    assert "意图：praise" in prompt.messages[-1]["content"]
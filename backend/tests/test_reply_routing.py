@@ -0,0 +1,108 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+from sqlmodel import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.kb.service import create_kb
+from app.modules.reply import service as reply_service
+from app.modules.reply.glm_chat import ChatResult
+from app.modules.reply.intent import IntentResult
+from app.modules.monitor.models import ReplyEvent
+from app.modules.reply import refine
+from app.modules.reply.refine import get_refinement
+from app.modules.reply.routing import decide_route
+from app.modules.reply.templates import FALLBACK_TEMPLATES
+
+
+class _FakeChat:
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def chat(self, messages, temperature=0.2):
+        self.gate.wait(5)
+        self.calls += 1
+        return ChatResult(content="LLM 回复", latency_ms=1, model="fake")
+
+
+def _suggest(session, kb_id, text, **kwargs):
+    return reply_service.suggest_reply(
+        session=session,
+        kb_id=kb_id,
+        comment_id="c1",
+        note_id="n1",
+        comment_text=text,
+        note_title="",
+        note_desc="",
+        top_k=3,
+        kb_version=None,
+        inject_sales=True,
+        **kwargs,
+    )
+
+
+def test_decide_route_rules():
+    praise = IntentResult(intent="praise", confidence=0.75, reasons=[])
+    question = IntentResult(intent="question", confidence=0.7, reasons=[])
+    chat = IntentResult(intent="chat", confidence=0.55, reasons=[])
+    strong = [{"score": 0.95, "content": "一般 48 小时内发货"}]
+    assert decide_route(praise, None, llm_available=True).route == "template"
+    assert decide_route(question, strong, llm_available=True).route == "knowledge"
+    assert decide_route(question, [], llm_available=True).route == "llm"
+    assert decide_route(chat, [], llm_available=True).route == "template"
+    assert decide_route(question, [], llm_available=False).route == "template"
+    federated = [{"score": 0.9, "raw_score": -0.023, "content": "无关内容"}]
+    assert decide_route(question, federated, llm_available=False).route == "template"
+    fair = [{"score": 0.7, "content": "一般 48 小时内发货"}]
+    assert decide_route(question, fair, llm_available=False).route == "knowledge"
+    for name in ("complaint", "chat", "after_sales"):
+        assert decide_route(IntentResult(intent=name, confidence=0.3, reasons=[]), fair, llm_available=False).route == "template"
+
+
+def test_knowledge_reply_uses_whole_leading_sentences():
+    chunk = "下单后一般 48 小时内发货。" * 3 + "偏远地区" + "物流" * 80 + "。"
+    reply = reply_service._knowledge_reply(chunk)
+    assert reply == "下单后一般 48 小时内发货。" * 3
+    assert reply_service._knowledge_reply("很长" * 100 + "。") is None
+
+
+def test_praise_skips_llm_and_retrieval(session, monkeypatch):
+    fake = _FakeChat()
+    monkeypatch.setattr(reply_service, "get_chat_client", lambda: fake)
+    kb = create_kb(session, slug="k", name="k", description="")
+    result = _suggest(session, kb.id, "好好看，爱了")
+    assert result["route"] == "template"
+    assert result["reply"] == FALLBACK_TEMPLATES["praise"]
+    assert result["used_knowledge"] == []
+    assert fake.calls == 0
+
+
+def test_async_refinement_returns_template_then_llm_answer(session, monkeypatch):
+    fake = _FakeChat()
+    monkeypatch.setattr(reply_service, "get_chat_client", lambda: fake)
+    kb = create_kb(session, slug="k", name="k", description="")
+    fake.gate.clear()
+    result = _suggest(session, kb.id, "退货怎么处理", refine_async=True)
+    fake.gate.set()
+    assert result["route"] == "llm"
+    assert result["reply"] == FALLBACK_TEMPLATES["after_sales"]
+    ref_id = result["refinement_id"]
+    deadline = time.time() + 5
+    while get_refinement(ref_id).status == "pending" and time.time() < deadline:
+        time.sleep(0.01)
+    ref = get_refinement(ref_id)
+    assert ref.status == "done"
+    assert ref.reply == "LLM 回复"
+    assert ref.meta["prompt_tokens"] > 0
+
+    monkeypatch.setattr(refine, "_refinements", refine.OrderedDict())
+    assert get_refinement(ref_id) is None
+    stored = get_refinement(ref_id, session)
+    assert (stored.status, stored.reply) == ("done", "LLM 回复")
+    event = session.exec(select(ReplyEvent)).one()
+    assert not event.llm_used
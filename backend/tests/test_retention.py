@@ -0,0 +1,80 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import func, select
+
+from app.modules.kb.models import KnowledgeChunk, KnowledgeItem
+from app.modules.kb.chunking import ChunkConfig
+from app.modules.kb.service import create_item, create_kb, create_revision, publish_kb, publish_revision, rechunk_kb
+from app.modules.vector.models import VectorIndex, VectorRecord
+from app.modules.vector.retention import collect_garbage, set_version_pinned
+from app.modules.vector.service import reindex_kb, search
+
+
+def _count(session, model, where=True):
+    return session.exec(select(func.count()).select_from(model).where(where)).one()
+
+
+def _seed_versions(session, n):
+    kb = create_kb(session, slug="gc", name="gc", description="")
+    item = create_item(session, kb_id=kb.id, key="faq", title="faq", tags="", content="版本 0 内容", source="test")
+    revisions = [item.current_revision_id]
+    for v in range(1, n + 1):
+        if v > 1:
+            rev = create_revision(session, item.id, content=f"版本 {v} 内容", source="test")
+            publish_revision(session, item.id, rev.id)
+            revisions.append(rev.id)
+        reindex_kb(session, kb_id=kb.id, kb_version=publish_kb(session, kb.id))
+    return kb, revisions
+
+
+def test_gc_keeps_latest_and_pinned_versions(session):
+    kb, revisions = _seed_versions(session, 4)
+    set_version_pinned(session, kb.id, 1, True)
+    v2_dir = os.path.dirname(session.exec(select(VectorIndex.index_path).where(VectorIndex.kb_version == 2)).one())
+    assert os.path.isdir(v2_dir)
+
+    preview = collect_garbage(session, keep_latest=2, dry_run=True)
+    assert preview.versions_deleted == 1 and preview.vector_records_deleted == 1 and preview.bytes_reclaimed > 0
+    assert os.path.isdir(v2_dir) and _count(session, VectorIndex) == 4
+
+    report = collect_garbage(session, keep_latest=2)
+    assert report.kept[str(kb.id)] == [1, 3, 4]
+    assert report.vector_indexes_deleted == 1 and report.dirs_deleted == 1
+    assert not os.path.isdir(v2_dir)
+    assert sorted(session.exec(select(VectorIndex.kb_version)).all()) == [1, 3, 4]
+    assert _count(session, VectorRecord, VectorRecord.kb_version == 2) == 0
+    assert report.chunks_deleted == 1
+    assert _count(session, KnowledgeChunk, KnowledgeChunk.revision_id == revisions[1]) == 0
+    assert _count(session, KnowledgeChunk, KnowledgeChunk.revision_id == revisions[0]) == 1
+
+    again = collect_garbage(session, keep_latest=2)
+    assert again.versions_deleted == 0 and again.chunks_deleted == 0
+
+
+def test_rollback_to_collected_revision_rebuilds_chunks(session):
+    kb, revisions = _seed_versions(session, 4)
+    collect_garbage(session, keep_latest=1)
+    assert _count(session, KnowledgeChunk, KnowledgeChunk.revision_id == revisions[1]) == 0
+
+    item_id = session.exec(select(KnowledgeItem.id).where(KnowledgeItem.kb_id == kb.id)).one()
+    publish_revision(session, item_id, revisions[1])
+    version = publish_kb(session, kb.id)
+    reindex_kb(session, kb_id=kb.id, kb_version=version)
+    assert _count(session, VectorRecord, VectorRecord.kb_version == version) == 1
+    assert search(session, kb_id=kb.id, query="版本 2 内容", top_k=1, kb_version=None)[1][0]["content"] == "版本 2 内容"
+
+
+def test_rechunk_swaps_chunks_and_keeps_index_searchable(session):
+    kb, revisions = _seed_versions(session, 2)
+    old_ids = set(session.exec(select(KnowledgeChunk.id)).all())
+
+    assert rechunk_kb(session, kb.id, ChunkConfig(target_tokens=2, max_tokens=4, overlap_tokens=0)) > 1
+    new_ids = set(session.exec(select(KnowledgeChunk.id).where(KnowledgeChunk.revision_id == revisions[1])).all())
+    assert len(new_ids) > 1 and not new_ids & old_ids
+    assert set(session.exec(select(VectorRecord.chunk_id).where(VectorRecord.kb_version == 2)).all()) == new_ids
+    hits = search(session, kb_id=kb.id, query="版本 2 内容", top_k=5, kb_version=None)[1]
+    assert hits and {h["chunk_id"] for h in hits} <= new_ids
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.modules.kb.service import create_item, create_kb, publish_kb
+from app.modules.vector import service as vector_service
+from app.modules.vector.faiss_store import FaissVectorStore, MmapVectorStore
+from app.modules.vector.manifest import index_generation, read_manifest
+from app.modules.vector.service import reindex_kb, search
+from app.modules.vector.sidecar import SidecarClient, SidecarVectorStore, start_in_thread
+
+ROWS = [("cream", "面霜 质地 滋润", "护肤"), ("ship", "发货 物流 48 小时", "物流"), ("refund", "退货 退款 流程", "售后")]
+
+
+def _seed(session):
+    kb = create_kb(session, slug="shared", name="shared", description="")
+    for key, content, tags in ROWS:
+        create_item(session, kb_id=kb.id, key=key, title=key, tags=tags, content=content, source="test")
+    return kb, reindex_kb(session, kb_id=kb.id, kb_version=publish_kb(session, kb.id))
+
+
+def test_reindex_publishes_manifest_generation(session):
+    kb, idx = _seed(session)
+    entry = read_manifest()[idx.index_path]
+    assert entry["kb_id"] == str(kb.id) and entry["size"] == 3 and entry["dim"] == idx.dim
+    first = index_generation(idx.index_path)
+    store = vector_service._get_store(idx)
+
+    again = reindex_kb(session, kb_id=kb.id, kb_version=idx.kb_version)
+    assert index_generation(idx.index_path) > first
+    assert vector_service._get_store(again) is not store
+
+
+def test_mmap_store_matches_local(session, monkeypatch):
+    _, idx = _seed(session)
+    local = FaissVectorStore.load(idx.index_path)
+    shared = MmapVectorStore.load(idx.index_path)
+    assert isinstance(shared._codes.data, np.memmap)
+    qv = local.vectors()[1]
+    assert [h.pos for h in shared.search(qv, top_k=3)] == [h.pos for h in local.search(qv, top_k=3)]
+
+    monkeypatch.setattr(settings, "vector_serving_mode", "mmap")
+    vector_service._evict_stores(idx.index_path)
+    _, hits = search(session, kb_id=idx.kb_id, query="发货 物流", top_k=1, kb_version=None)
+    assert hits[0]["content"] == "发货 物流 48 小时"
+
+
+def test_sidecar_serves_filtered_search(session, tmp_path):
+    _, idx = _seed(session)
+    socket_path = str(tmp_path / "v.sock")
+    server, _ = start_in_thread(socket_path)
+    try:
+        client = SidecarClient(socket_path)
+        assert client.ping()
+        local = FaissVectorStore.load(idx.index_path)
+        remote = SidecarVectorStore(client, idx.index_path, idx.dim)
+        qv = local.vectors()[0]
+        assert [h.pos for h in remote.search(qv, top_k=3)] == [h.pos for h in local.search(qv, top_k=3)]
+        allowed = np.packbits(np.array([False, True, True]), bitorder="little")
+        assert {h.pos for h in remote.search(qv, top_k=3, allowed=allowed)} == {1, 2}
+        assert client.request({"op": "search", "dim": idx.dim, "top_k": 3})[0] == {"error": "invalid_request"}
+        assert client.request({"op": "search", "index_path": idx.index_path, "dim": "x", "top_k": 3})[0] == {"error": "invalid_request"}
+        assert client.request({"op": "search", "index_path": idx.index_path, "dim": idx.dim, "top_k": 3}, b"\0" * 4)[0] == {"error": "invalid_request"}
+        assert client.ping()
+    finally:
+        server.shutdown()
+        server.server_close()
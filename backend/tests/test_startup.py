@@ -0,0 +1,62 @@
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import startup
+from app.core.config import settings
+from app.modules.kb.service import create_item, create_kb, get_kb_by_slug, publish_kb
+from app.modules.vector import service as vector_service
+from app.modules.vector.service import reindex_kb
+
+
+def test_app_import_defers_heavy_modules():
+    code = "import sys, app.main; print(','.join(m for m in ('numpy', 'faiss', 'httpx', 'rapidfuzz') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_warmup_loads_hot_indexes(session, monkeypatch):
+    kb = create_kb(session, slug="hot", name="hot", description="")
+    create_item(session, kb_id=kb.id, key="ship", title="ship", tags="物流", content="发货 物流 48 小时", source="test")
+    idx = reindex_kb(session, kb_id=kb.id, kb_version=publish_kb(session, kb.id))
+    vector_service._evict_stores(idx.index_path)
+
+    @contextmanager
+    def _scope():
+        yield session
+
+    monkeypatch.setattr("app.core.db.session_scope", _scope)
+    monkeypatch.setattr(settings, "prewarm_kb_slugs", "hot,missing")
+    monkeypatch.setattr(startup, "state", startup.StartupState())
+    startup.run_warmup()
+
+    report = startup.state.report()
+    assert report["ready"] is True
+    assert report["warmed_kbs"] == ["hot"]
+    assert report["errors"] == {"kb:missing": "kb_not_found"}
+    assert {"warmup.imports", "warmup.indexes", "warmup.glm", "warmup.total"} <= set(report["phases_ms"])
+    assert any(k[1] == idx.index_path for k in vector_service._store_cache)
+
+
+def test_boot_steps_run_off_the_startup_hook_and_gate_readiness(session, monkeypatch):
+    @contextmanager
+    def _scope():
+        yield session
+
+    monkeypatch.setattr("app.core.db.session_scope", _scope)
+    monkeypatch.setattr(settings, "startup_create_tables", False)
+    monkeypatch.setattr(settings, "prewarm_enabled", False)
+    monkeypatch.setattr(startup, "state", startup.StartupState())
+    startup.start_warmup().join(10)
+    report = startup.state.report()
+    assert report["ready"] is True and "startup.default_kb" in report["phases_ms"]
+    assert get_kb_by_slug(session, settings.default_kb_slug) is not None
+
+    monkeypatch.setattr(startup, "state", startup.StartupState())
+    monkeypatch.setattr("app.modules.kb.service.ensure_default_kb", lambda s: 1 / 0)
+    startup.run_startup()
+    report = startup.state.report()
+    assert report["ready"] is False and "startup.default_kb" in report["errors"]
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import textnorm
+from app.core.textnorm import normalize_batch, normalize_text
+from app.modules.leads.service import score_lead
+from app.modules.reply.intent import detect_intent
+
+
+def test_normalize_text_folds_width_script_and_stickers():
+    raw = "  這個面霜［doge R］好用嗎？？😂😂\n\n  ＡＢＣ　１２３ [笑哭R]#護膚[话题]# "
+    assert normalize_text(raw) == "这个面霜 好用吗?? abc 123 #护肤 #"
+    assert normalize_text("") == ""
+    assert normalize_text(normalize_text(raw)) == normalize_text(raw)
+
+
+def test_normalize_batch_matches_single_and_memoizes():
+    texts = ["請問怎麼買[赞R]", "", "ＹＹＤＳ👍🏻", "請問怎麼買[赞R]", "a\x00b"]
+    textnorm._memo.clear()
+    batch = normalize_batch(texts)
+    assert batch == ["请问怎么买", "", "yyds", "请问怎么买", "a b"]
+    assert "ＹＹＤＳ👍🏻" in textnorm._memo
+    textnorm._memo.clear()
+    assert [normalize_text(t) for t in texts] == batch
+
+
+def test_classifiers_match_variant_spellings():
+    assert detect_intent("請問哪裡買？[doge R]").intent == "buy_intent"
+    assert detect_intent("ＹＹＤＳ😍").intent == "praise"
+    assert score_lead("連結發我 怎麼買").features["buy_strong"] == 1
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.kb.service import create_item, create_kb, publish_kb
+from app.modules.vector import faiss_store
+from app.modules.vector.codec import decode, encode, scores
+from app.modules.vector.faiss_store import FaissVectorStore, MmapVectorStore
+from app.modules.vector.service import reindex_kb, search
+
+
+def _vectors(n=500, dim=64, seed=0):
+    x = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_encode_roundtrip_and_scores():
+    x = _vectors()
+    for codec, nbytes, tol in (("f32", 4, 1e-6), ("f16", 2, 1e-3), ("int8", 1, 2e-2)):
+        codes = encode(x, codec)
+        assert codes.data.itemsize == nbytes
+        assert np.abs(decode(codes) - x).max() < tol
+        assert np.abs(scores(codes, x[0], block_rows=64) - x @ x[0]).max() < tol * 8
+    with pytest.raises(ValueError):
+        encode(x, "pq")
+
+
+@pytest.mark.parametrize("has_faiss", [True, False])
+@pytest.mark.parametrize("codec", ["f16", "int8"])
+def test_quantized_store_roundtrip_keeps_recall(tmp_path, monkeypatch, codec, has_faiss):
+    if has_faiss and not faiss_store._HAS_FAISS:
+        pytest.skip("faiss not installed")
+    monkeypatch.setattr(faiss_store, "_HAS_FAISS", has_faiss)
+    x = _vectors()
+    store = FaissVectorStore(dim=64, codec=codec)
+    store.add(x)
+    path = str(tmp_path / "index.faiss")
+    store.save(path)
+    loaded = FaissVectorStore.load(path)
+    assert loaded.codec == codec and loaded.size == 500
+    assert MmapVectorStore.load(path).codec == codec
+
+    exact = FaissVectorStore(dim=64)
+    exact.add(x)
+    found = 0
+    for q in x[:50]:
+        truth = {h.pos for h in exact.search(q, 10)}
+        found += len(truth & {h.pos for h in loaded.search(q, 10)})
+    assert found / 500 > 0.9
+
+
+def test_reindex_records_codec(session):
+    kb = create_kb(session, slug="q", name="q", description="")
+    create_item(session, kb_id=kb.id, key="ship", title="ship", tags="", content="发货 物流 48 小时", source="test")
+    create_item(session, kb_id=kb.id, key="refund", title="refund", tags="", content="退货 退款 流程", source="test")
+    idx = reindex_kb(session, kb_id=kb.id, kb_version=publish_kb(session, kb.id), codec="int8")
+    assert idx.codec == "int8"
+    _, hits = search(session, kb_id=kb.id, query="退货 退款 流程", top_k=1, kb_version=None)
+    assert hits[0]["content"] == "退货 退款 流程"
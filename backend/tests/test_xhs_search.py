@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.core.textnorm import normalize_text
+from app.modules.xhs import search
+from app.modules.xhs.service import list_comments, list_notes
+
+TEXTS = ["链接在哪里买", "质量太差要退货", "面霜好用爱了", "垃圾别买", "油皮能用面霜吗", "yyds 回购", "面霜面霜面霜真的好用"]
+MIXED = ["ok好的", "买了A面霜", "求link谢谢", "面霜abc好用", "iphone15手机壳"]
+
+
+def _write(tmp_path, notes, comments, bump):
+    d = tmp_path / "xhs"
+    d.mkdir(exist_ok=True)
+    for name, rows in (("search_contents_2026-01-01.json", notes), ("search_comments_2026-01-01.json", comments)):
+        path = d / name
+        path.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+        os.utime(path, ns=(bump * 10**9, bump * 10**9))
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "xhs_json_dir", str(tmp_path / "xhs"))
+    monkeypatch.setattr(settings, "xhs_index_path", str(tmp_path / "index" / "xhs.db"))
+    notes = [{"note_id": f"note{i:02d}", "title": f"面霜测评 {i}" if i % 2 else "秋冬穿搭", "desc": "", "tag_list": ""} for i in range(10)]
+    comments = [
+        {"comment_id": f"c{i}", "note_id": f"note{i % 3:02d}", "content": TEXTS[i % len(TEXTS)], "like_count": str(i), "create_time": 1000 - i}
+        for i in range(70)
+    ] + [{"comment_id": f"m{i}", "note_id": "note09", "content": text, "like_count": "0", "create_time": 0} for i, text in enumerate(MIXED)]
+    _write(tmp_path, notes, comments, 1)
+    return notes, comments
+
+
+def test_search_matches_substrings_and_ranks(tmp_path, monkeypatch):
+    notes, comments = _setup(tmp_path, monkeypatch)
+
+    for q in ["面霜", "买", "好用", "在哪里", "yyds", "ds", "ok好", "A面", "link谢", "bc好", "15手机", "e15"]:
+        expected = {c["comment_id"] for c in comments if normalize_text(q) in normalize_text(c["content"])}
+        rows, total = search.search_comments(q)
+        assert total == len(expected) and {r["comment_id"] for r in rows} == expected, q
+
+    rows, total = search.search_comments("面霜")
+    assert total == 32 and rows[0]["content"] == TEXTS[6]
+    assert search.search_comments("面霜 好用")[1] == 21
+    assert search.search_comments('"好用爱了"')[1] == 10
+    assert search.search_comments("爱了 退货") == ([], 0)
+
+    page, total = list_comments("note01", offset=2, limit=3, sort="like", q="面霜")
+    full = sorted((c for c in comments if c["note_id"] == "note01" and "面霜" in c["content"]), key=lambda c: -int(c["like_count"]))
+    assert total == len(full) and [r["comment_id"] for r in page] == [c["comment_id"] for c in full[2:5]]
+    newest = sorted(full, key=lambda c: -c["create_time"])
+    assert [r["comment_id"] for r in list_comments("note01", 0, 3, "time", "面霜")[0]] == [c["comment_id"] for c in newest[:3]]
+
+    found, total, _ = list_notes("测评", offset=1, limit=2)
+    assert total == 5 and len(found) == 2
+    assert [n["note_id"] for n in list_notes("note03")[0]] == ["note03"]
+
+
+def test_index_persists_and_rebuilds_on_new_snapshot(tmp_path, monkeypatch):
+    notes, comments = _setup(tmp_path, monkeypatch)
+    assert search.search_comments("退货")[1] == 10
+
+    rebuilt = []
+    rebuild = search._rebuild
+    monkeypatch.setattr(search, "_rebuild", lambda *a: rebuilt.append(a[0]) or rebuild(*a))
+    search._fresh.clear()
+    assert search.search_comments("退货")[1] == 10 and rebuilt == []
+
+    comments.append({"comment_id": "c-new", "note_id": "note00", "content": "收到就退货了", "like_count": "0"})
+    _write(tmp_path, notes, comments, 2)
+    assert search.search_comments("退货")[1] == 11 and rebuilt == ["comment"]
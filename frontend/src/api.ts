@@ -80,6 +80,8 @@ export type XhsAnalyzeResponse = {
   total_comments: number;
   top_comments: XhsComment[];
   intent_counts: Record<string, number>;
+  classified: number;
+  cached: boolean;
   generated_at: string;
 };
 
@@ -104,7 +106,8 @@ async function http<T>(path: string, init: RequestInit): Promise<T> {
 }
 
 export const api = {
-  listKbs: () => http<KnowledgeBase[]>("/kbs", { method: "GET" }),
+  listKbs: () =>
+    http<{ items: KnowledgeBase[]; next_cursor: string | null }>("/kbs?limit=500", { method: "GET" }).then((page) => page.items),
   createKb: (payload: { slug: string; name: string; description?: string }) =>
     http<KnowledgeBase>("/kbs", { method: "POST", body: JSON.stringify(payload) }),
   publishKb: (kbId: UUID) => http<{ kb_id: UUID; published_version: number }>(`/kbs/${kbId}/publish`, { method: "POST" }),
@@ -131,6 +134,6 @@ export const api = {
     });
     return http<XhsListCommentsResponse>(`/xhs/notes/${encodeURIComponent(noteId)}/comments?${qs.toString()}`, { method: "GET" });
   },
-  xhsAnalyze: (noteId: string, maxSamples = 500) =>
-    http<XhsAnalyzeResponse>(`/xhs/notes/${encodeURIComponent(noteId)}/analyze?max_samples=${maxSamples}`, { method: "GET" })
+  xhsAnalyze: (noteId: string) =>
+    http<XhsAnalyzeResponse>(`/xhs/notes/${encodeURIComponent(noteId)}/analyze`, { method: "GET" })
 };
@@ -60,7 +60,7 @@ export function XhsPanel(props: { kb: KnowledgeBase | null }) {
     setAnalyze(null);
     setAnalyzeError("");
     api
-      .xhsAnalyze(activeNoteId, 500)
+      .xhsAnalyze(activeNoteId)
       .then(setAnalyze)
       .catch((e) => setAnalyzeError(String(e)));
   }, [activeNoteId]);